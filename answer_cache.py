@@ -0,0 +1,184 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : answer_cache.py
+# Deskripsi    : Cache jawaban semantik untuk pertanyaan dokumen. Pertanyaan
+#                yang mirip dengan pertanyaan sebelumnya pada dokumen yang
+#                sama langsung dijawab dari cache tanpa retrieval dan LLM.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Key cache: key dokumen (hash dokumen + model) dan embedding pertanyaan
+# - Pertanyaan identik (setelah normalisasi) dicocokkan langsung; selain itu
+#   dipakai cosine similarity terhadap pertanyaan lain pada dokumen yang sama
+# - Eviction: TTL per entri dan LRU saat melewati batas jumlah entri
+# - Cache ada di memori proses dan dipakai bersama oleh semua sesi
+#
+# ============================================================================
+
+"""
+Modul cache jawaban semantik
+"""
+
+from collections import OrderedDict
+from array import array
+from typing import Dict, List, Optional
+import math
+import threading
+import time
+
+from embedding_cache import text_hash
+
+
+def normalize_question(question: str) -> str:
+    """Normalisasi pertanyaan untuk pencocokan persis (huruf kecil, spasi tunggal)"""
+    return " ".join(question.lower().split())
+
+
+def _unit_vector(vector: List[float]) -> array:
+    """Normalisasi vektor ke panjang 1 agar cosine similarity cukup dot product"""
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return array("f", (x / norm for x in vector))
+
+
+class AnswerCache:
+    """Cache jawaban per dokumen dengan pencocokan pertanyaan berbasis embedding"""
+    
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 24 * 3600,
+        max_entries: int = 2000
+    ):
+        """
+        Inisialisasi cache jawaban
+        
+        Args:
+            similarity_threshold: Cosine similarity minimum agar pertanyaan dianggap sama
+            ttl_seconds: Umur maksimum jawaban di cache (detik)
+            max_entries: Jumlah maksimum jawaban yang disimpan (LRU)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        # (document_key, hash pertanyaan) -> entri, urut dari yang paling lama dipakai
+        self._entries = OrderedDict()
+        self._by_document: Dict[str, set] = {}
+        self._lock = threading.Lock()
+    
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._by_document.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_document[key[0]]
+    
+    def _is_expired(self, entry: Dict, now: float) -> bool:
+        return now - entry["created_at"] > self.ttl_seconds
+    
+    def get(self, document_key: str, question: str, vector: List[float]) -> Optional[Dict]:
+        """
+        Cari jawaban untuk pertanyaan yang sama atau mirip
+        
+        Args:
+            document_key: Key dokumen (berubah jika dokumen atau model berubah)
+            question: Pertanyaan user
+            vector: Embedding pertanyaan
+            
+        Returns:
+            Dictionary {question, answer, sources, similarity} atau None
+        """
+        now = time.time()
+        exact_key = (document_key, text_hash(normalize_question(question)))
+        query_vector = _unit_vector(vector)
+        
+        with self._lock:
+            best_key, best_score = None, -1.0
+            
+            entry = self._entries.get(exact_key)
+            if entry is not None and not self._is_expired(entry, now):
+                best_key, best_score = exact_key, 1.0
+            else:
+                for key in list(self._by_document.get(document_key, ())):
+                    entry = self._entries[key]
+                    if self._is_expired(entry, now):
+                        self._remove(key)
+                        continue
+                    score = sum(a * b for a, b in zip(query_vector, entry["vector"]))
+                    if score > best_score:
+                        best_key, best_score = key, score
+            
+            if best_key is None or best_score < self.similarity_threshold:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            if best_key != exact_key:
+                self.semantic_hits += 1
+            entry = self._entries[best_key]
+            return {
+                "question": entry["question"],
+                "answer": entry["answer"],
+                "sources": list(entry["sources"]),
+                "similarity": best_score,
+            }
+    
+    def put(self, document_key: str, question: str, vector: List[float], answer: str, sources: List[Dict]):
+        """
+        Simpan jawaban ke cache
+        
+        Args:
+            document_key: Key dokumen
+            question: Pertanyaan user
+            vector: Embedding pertanyaan
+            answer: Jawaban lengkap
+            sources: Sumber jawaban
+        """
+        key = (document_key, text_hash(normalize_question(question)))
+        
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = {
+                "question": question,
+                "vector": _unit_vector(vector),
+                "answer": answer,
+                "sources": list(sources),
+                "created_at": time.time(),
+            }
+            self._by_document.setdefault(document_key, set()).add(key)
+            
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+    
+    def record_bypass(self):
+        """Catat permintaan yang sengaja tidak memakai cache"""
+        with self._lock:
+            self.bypassed += 1
+    
+    def invalidate(self, document_key: str):
+        """Hapus semua jawaban untuk satu dokumen"""
+        with self._lock:
+            for key in list(self._by_document.get(document_key, ())):
+                self._remove(key)
+    
+    def stats(self) -> Dict:
+        """Statistik cache: hits, misses, bypass, jumlah entri dan hit rate"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
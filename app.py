@@ -14,21 +14,28 @@
 # - Menggunakan model Google Gemini 2.0 Flash untuk percakapan
 # - Mengimplementasikan persistensi riwayat chat menggunakan database SQLite
 # - Menyediakan parameter AI yang dapat disesuaikan (temperature, top_p, top_k)
+# - Stack RAG (Chroma, embeddings, cache jawaban) dan agent baru diimpor saat
+#   fitur terkait pertama dipakai agar cold start cepat
 #
 # ============================================================================
 
 # Import library yang diperlukan
 import streamlit as st  # Untuk membuat interface aplikasi web
-from langchain_google_genai import ChatGoogleGenerativeAI  # Untuk berinteraksi dengan Google Gemini via LangChain
-from langgraph.prebuilt import create_react_agent  # Untuk membuat ReAct agent
-from langchain_core.messages import HumanMessage, AIMessage  # Untuk format pesan
 import json
 import os
+import threading
 import time
+import uuid
 from database import ChatbotDatabase
 from streamlit_lottie import st_lottie
-import requests
-from document_rag import DocumentRAG
+from conversation_context import ConversationContext
+from client_pool import ClientPool
+from document_summary import DocumentSummarizer
+from ingestion_jobs import CANCELLED, QUEUED, IngestionJobRunner
+from rag_registry import DocumentRAGRegistry
+from engine import ChatEngine, DocumentEngine, EventLoopThread
+from lottie_cache import LottieCache
+from tracing import MetricsExporter, span, tracer
 
 # --- Custom CSS for Chat Layout ---
 st.markdown("""
@@ -80,36 +87,68 @@ LOADING_ANIMATIONS = {
 
 DEFAULT_ANIMATION = LOADING_ANIMATIONS["dots"]
 
+# Jumlah pesan yang dimuat per halaman riwayat chat
+CHAT_HISTORY_PAGE_SIZE = 50
+
 # --- Fungsi Helper ---
 
+@st.cache_resource
+def get_lottie_cache():
+    """Cache animasi Lottie bersama; semua animasi dimuat saat startup"""
+    cache = LottieCache(LOADING_ANIMATIONS)
+    cache.preload()
+    return cache
+
 def load_lottie_url(url: str):
-    """Memuat animasi Lottie dari URL"""
-    try:
-        r = requests.get(url)
-        if r.status_code != 200:
-            return None
-        return r.json()
-    except:
-        return None
+    """Memuat animasi Lottie dari cache (tidak pernah menunggu jaringan)"""
+    return get_lottie_cache().get(url)
+
+def format_pages(source: dict) -> str:
+    """Label halaman sumber; chunk lintas halaman ditampilkan sebagai rentang"""
+    page, page_end = source["page"], source.get("page_end", source["page"])
+    if page_end != page:
+        return f"Halaman {page + 1}–{page_end + 1}"
+    return f"Halaman {page + 1}"
 
-def simulate_typing(text: str, container):
-    """Simulasi efek mengetik seperti ChatGPT :D"""
+def render_stream(chunks, container, max_fps: float = 15.0, on_first_token=None):
+    """
+    Tampilkan token streaming saat tiba, dengan laju render terbatas
+    
+    Args:
+        chunks: Iterator potongan teks dari LLM
+        container: Placeholder Streamlit (st.empty()) untuk menampilkan teks
+        max_fps: Jumlah maksimum re-render per detik
+        on_first_token: Dipanggil sekali saat token pertama tiba
+        
+    Returns:
+        tuple: (teks lengkap, time-to-first-token dalam detik atau None)
+    """
+    min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
     full_response = ""
-    message_placeholder = container.empty()
-    
-    # Pisahkan teks menjadi kata-kata untuk efek mengetik yang lebih halus
-    words = text.split()
-    
-    for i, word in enumerate(words):
-        full_response += word + " "
-        # Tambahkan kursor mengetik
-        message_placeholder.markdown(full_response + "▌")
-        # Atur kecepatan: lebih cepat untuk kata pendek, lebih lambat untuk kata panjang
-        time.sleep(0.05)
+    time_to_first_token = None
+    last_render = 0.0
+    start = time.perf_counter()
+    
+    for chunk in chunks:
+        if not chunk:
+            continue
+        now = time.perf_counter()
+        if time_to_first_token is None:
+            time_to_first_token = now - start
+            if on_first_token:
+                on_first_token()
+        full_response += chunk
+        
+        # Render ulang paling banyak max_fps kali per detik, bukan per token
+        if now - last_render >= min_interval:
+            with span("ui.render"):
+                container.markdown(full_response + "▌")
+            last_render = now
     
     # Tampilkan pesan akhir tanpa kursor
-    message_placeholder.markdown(full_response)
-    return full_response.strip()
+    with span("ui.render"):
+        container.markdown(full_response)
+    return full_response, time_to_first_token
 
 # --- 1. Muat Konfigurasi ---
 
@@ -157,19 +196,139 @@ config = load_config()
 google_api_key = config["google_api_key"]
 chat_model = config.get("chat_model", "gemini-2.0-flash")
 embedding_model = config.get("embedding_model", "models/text-embedding-004")
+stream_render_fps = float(config.get("stream_render_fps", 15))
+# Endpoint API Gemini pengganti, mis. server palsu dari benchmarks/fake_gemini.py
+gemini_base_url = config.get("gemini_base_url")
+# Tracing per tahap dan ekspor metrik Prometheus (lihat tracing.py)
+tracing_enabled = bool(config.get("tracing_enabled", tracer.enabled))
+metrics_port = config.get("metrics_port")
+metrics_file = config.get("metrics_file")
+# Chunking dokumen: "token" (lintas halaman) atau "recursive_character" (koleksi lama)
+rag_splitter = config.get("rag_splitter", "token")
+# Kuota per koleksi dokumen user; upload baru ditolak (bukan menghapus dokumen lama)
+collection_max_documents = config.get("collection_max_documents")
+collection_max_mb = config.get("collection_max_mb")
+
+@st.cache_resource
+def get_client_pool():
+    """Pool klien Gemini dan agent yang dipakai bersama oleh semua sesi"""
+    return ClientPool(google_api_key, base_url=gemini_base_url)
+
+client_pool = get_client_pool()
 
 # --- 2. Inisialisasi Database ---
 @st.cache_resource
 def get_database():
     """Inisialisasi dan kembalikan instance database"""
-    return ChatbotDatabase()
+    database = ChatbotDatabase()
+    # Indeks pencarian untuk pesan lama dibangun bertahap di latar belakang
+    threading.Thread(target=database.backfill_search_index, daemon=True).start()
+    return database
 
 db = get_database()
 
+@st.cache_resource
+def get_conversation_context():
+    """Pengelola jendela konteks percakapan (ringkasan bergulir) bersama"""
+    # Klien (dan stack Gemini) baru dibuat saat ringkasan pertama diperlukan
+    summarizer = client_pool.lazy_chat_model(chat_model, temperature=0.2)
+    return ConversationContext(db, summarizer=summarizer)
+
+conversation_context = get_conversation_context()
+
+@st.cache_resource
+def get_embedding_cache():
+    """Cache embedding per chunk yang dipakai bersama oleh semua sesi"""
+    from embedding_cache import EmbeddingCache
+    
+    return EmbeddingCache()
+
+@st.cache_resource
+def get_answer_cache():
+    """Cache jawaban semantik untuk pertanyaan dokumen, dipakai bersama semua sesi"""
+    from answer_cache import AnswerCache
+    
+    return AnswerCache()
+
+@st.cache_resource
+def get_rag_registry():
+    """Registry DocumentRAG semua sesi; koleksi yang idle dilepas dari memori"""
+    return DocumentRAGRegistry()
+
+@st.cache_resource
+def get_ingestion_runner():
+    """Runner job ingestion dokumen bersama; job tetap berjalan walaupun sesi di-rerun"""
+    return IngestionJobRunner()
+
+@st.cache_resource
+def get_document_summarizer():
+    """Mesin ringkasan dokumen map-reduce bersama (thread pool & cache ringkasan)"""
+    return DocumentSummarizer(client_pool.get_chat_model(chat_model, temperature=0.3))
+
+# --- Engine Chat & Dokumen ---
+# Orkestrasi berada di engine.py; script ini hanya menampilkan hasilnya.
+# Semua sesi berbagi satu event loop yang berjalan di thread latar.
+@st.cache_resource
+def get_engine_loop():
+    """Event loop bersama untuk semua engine async"""
+    return EventLoopThread()
+
+@st.cache_resource
+def get_chat_engine():
+    """Engine chat (konteks, agent, streaming, penyimpanan riwayat)"""
+    return ChatEngine(db, client_pool, conversation_context)
+
+@st.cache_resource
+def get_document_engine():
+    """Engine dokumen (sesi DocumentRAG, ingestion dan query)"""
+    def create_rag(collection_id, rag_chat_model, rag_embedding_model):
+        # Stack RAG (Chroma, text splitter) baru dimuat saat fitur dokumen dibuka
+        from document_rag import DocumentRAG
+        
+        return DocumentRAG(
+            google_api_key,
+            chat_model=rag_chat_model,
+            embedding_model=rag_embedding_model,
+            splitter=rag_splitter,
+            embedding_cache=get_embedding_cache(),
+            llm=client_pool.get_chat_model(rag_chat_model, temperature=0.3),
+            embedding_backend=client_pool.get_embeddings(rag_embedding_model),
+            answer_cache=get_answer_cache(),
+            collection_id=collection_id,
+            summarizer=get_document_summarizer(),
+            max_documents=collection_max_documents,
+            max_collection_bytes=int(collection_max_mb * 1024 ** 2) if collection_max_mb else None,
+        )
+    return DocumentEngine(get_rag_registry(), get_ingestion_runner(), create_rag)
+
+engine_loop = get_engine_loop()
+chat_engine = get_chat_engine()
+document_engine = get_document_engine()
+
+@st.cache_resource
+def get_metrics_exporter():
+    """Aktifkan tracing dan ekspor metrik lewat /metrics dan/atau file teks"""
+    if not tracing_enabled:
+        return None
+    tracer.enabled = True
+    tracer.register_collector("client_pool", client_pool.stats)
+    tracer.register_collector("answer_cache", get_answer_cache().stats)
+    tracer.register_collector("rag_registry", get_rag_registry().stats)
+    exporter = MetricsExporter(tracer)
+    if metrics_port:
+        exporter.start_http(int(metrics_port))
+    if metrics_file:
+        exporter.start_file(metrics_file)
+    return exporter
+
+get_metrics_exporter()
+
 # --- 3. Konfigurasi Halaman dan Judul ---
 col1, col2 = st.columns([1.5,8])
 with col1:
-    st_lottie(load_lottie_url(LOADING_ANIMATIONS["loading_bars"]), height=100, width=100, key="welcome")
+    header_animation = load_lottie_url(LOADING_ANIMATIONS["loading_bars"])
+    if header_animation:
+        st_lottie(header_animation, height=100, width=100, key="welcome")
 with col2:
     st.title("Teman Gemini - AI Chatbot")
 st.caption("Chat dengan asisten AI Cerdas menggunakan Google's Gemini model")
@@ -254,30 +413,39 @@ with st.sidebar:
         if st.button("🔄 Reset Percakapan", help="Hapus semua pesan dan mulai dari awal"):
             db.clear_user_history(st.session_state.user_id)
             st.session_state.pop("messages", None)
-            st.session_state.pop("agent", None)
             st.rerun()
     elif current_feature == "document":
-        # Tombol hapus dokumen
-        if st.button("🗑️ Hapus Dokumen", help="Hapus dokumen yang sudah diupload"):
-            if "document_rag" in st.session_state:
-                st.session_state.document_rag.cleanup()
-            st.session_state.pop("document_rag", None)
+        # Tombol kosongkan koleksi dokumen
+        document_rag = document_engine.session(st.session_state.get("rag_key"))
+        if st.button(
+            "🗑️ Kosongkan Koleksi",
+            help="Hapus semua dokumen dari koleksi Anda",
+            disabled=document_rag is None or document_rag.indexing
+        ):
+            for info in document_rag.list_documents():
+                engine_loop.run(document_engine.remove_document(st.session_state.rag_key, info["document_id"]))
             st.session_state.pop("document_qa_history", None)
-            st.session_state.pop("uploaded_file_name", None)
+            st.session_state.pop("document_summaries", None)
+            st.session_state.pop("summary_jobs", None)
             st.rerun()
     
     # Tombol logout
     if st.button("🚪 Logout", help="Keluar dan kembali ke halaman login"):
-        # Bersihkan dokumen jika ada
-        if "document_rag" in st.session_state:
-            st.session_state.document_rag.cleanup()
+        # Batalkan job ingestion sesi ini, lalu bersihkan dokumen jika ada
+        document_engine.close_session(
+            st.session_state.get("rag_key"),
+            st.session_state.get("ingestion_job_ids", [])
+        )
         st.session_state.pop("user_id", None)
         st.session_state.pop("username", None)
         st.session_state.pop("messages", None)
-        st.session_state.pop("agent", None)
         st.session_state.pop("selected_feature", None)
-        st.session_state.pop("document_rag", None)
+        st.session_state.pop("rag_key", None)
         st.session_state.pop("document_qa_history", None)
+        st.session_state.pop("document_summaries", None)
+        st.session_state.pop("summary_jobs", None)
+        st.session_state.pop("processed_uploads", None)
+        st.session_state.pop("ingestion_job_ids", None)
         st.rerun()
     
     st.divider()
@@ -290,6 +458,28 @@ with st.sidebar:
             assistant_msgs = sum(1 for msg in st.session_state.messages if msg["role"] == "assistant")
             st.metric("Pesan Anda", user_msgs)
             st.metric("Balasan AI", assistant_msgs)
+        if st.session_state.get("last_ttft") is not None:
+            st.metric("Time to first token", f"{st.session_state.last_ttft:.2f} dtk")
+        
+        st.divider()
+        
+        # Pencarian riwayat chat
+        st.subheader("🔎 Cari Riwayat")
+        search_query = st.text_input(
+            "Cari pesan",
+            placeholder="Ketik kata kunci...",
+            key="history_search",
+            label_visibility="collapsed"
+        )
+        if search_query.strip():
+            results = db.search_messages(st.session_state.user_id, search_query, limit=10)
+            if results:
+                for result in results:
+                    role_icon = "🧑" if result["role"] == "user" else "🤖"
+                    st.markdown(f"{role_icon} {result['snippet']}")
+                    st.caption(result["timestamp"])
+            else:
+                st.caption("Tidak ada pesan yang cocok.")
         
         st.divider()
         
@@ -309,12 +499,39 @@ with st.sidebar:
         
     elif current_feature == "document":
         st.subheader("📄 Info Dokumen")
-        if "uploaded_file_name" in st.session_state:
-            st.success(f"Dokumen: {st.session_state.uploaded_file_name}")
+        document_rag = document_engine.session(st.session_state.get("rag_key"))
+        if document_rag is not None and document_rag.catalog:
+            st.metric("Dokumen di koleksi", len(document_rag.catalog))
             if "document_qa_history" in st.session_state:
                 st.metric("Pertanyaan", len(st.session_state.document_qa_history))
+            if st.session_state.get("last_ttft") is not None:
+                st.metric("Time to first token", f"{st.session_state.last_ttft:.2f} dtk")
         else:
             st.info("Belum ada dokumen yang diupload")
+        
+        if document_rag is not None:
+            cache_stats = document_rag.embeddings.stats()
+            st.caption(
+                f"Cache embedding: {cache_stats['hits']} hit, {cache_stats['misses']} miss "
+                f"({cache_stats['hit_rate']:.0%})"
+            )
+        
+        st.divider()
+        
+        # Cache jawaban untuk pertanyaan yang sama/mirip
+        st.subheader("⚡ Cache Jawaban")
+        answer_stats = get_answer_cache().stats()
+        st.metric("Hit rate", f"{answer_stats['hit_rate']:.0%}")
+        st.caption(
+            f"{answer_stats['hits']} hit ({answer_stats['semantic_hits']} mirip), "
+            f"{answer_stats['misses']} miss, {answer_stats['bypassed']} dilewati, "
+            f"{answer_stats['entries']} jawaban tersimpan"
+        )
+        st.checkbox(
+            "Lewati cache jawaban",
+            key="bypass_answer_cache",
+            help="Selalu buat jawaban baru dari dokumen untuk pertanyaan berikutnya"
+        )
 
 # --- 7. Tampilkan Konten Berdasarkan Fitur yang Dipilih ---
 
@@ -323,18 +540,13 @@ if st.session_state.get("selected_feature") == "document":
     st.header("📄 Chat dengan Dokumen")
     st.write("Upload dokumen PDF dan tanyakan apapun tentang isinya menggunakan AI")
     
-    # Inisialisasi RAG jika belum ada
-    current_document_models = (chat_model, embedding_model)
-    stored_document_models = st.session_state.get("document_models")
-    if "document_rag" not in st.session_state or stored_document_models != current_document_models:
-        if "document_rag" in st.session_state:
-            st.session_state.document_rag.cleanup()
-        st.session_state.document_rag = DocumentRAG(
-            google_api_key,
-            chat_model=chat_model,
-            embedding_model=embedding_model,
-        )
-        st.session_state.document_models = current_document_models
+    # Inisialisasi RAG (koleksi dokumen milik user) jika belum ada; instance
+    # disimpan di registry engine dan koleksi yang sudah di-spill dimuat ulang dari disk
+    rag_key = st.session_state.setdefault("rag_key", uuid.uuid4().hex)
+    with st.spinner("Memuat koleksi dokumen..."):
+        document_rag = engine_loop.run(document_engine.open_session(
+            rag_key, f"user-{st.session_state.user_id}", chat_model, embedding_model
+        ))
     
     # Inisialisasi riwayat QA jika belum ada
     if "document_qa_history" not in st.session_state:
@@ -342,137 +554,232 @@ if st.session_state.get("selected_feature") == "document":
     
     # File uploader
     st.subheader("1️⃣ Upload Dokumen PDF")
-    uploaded_file = st.file_uploader(
+    uploaded_files = st.file_uploader(
         "Pilih file PDF",
         type=["pdf"],
-        help="Upload file PDF yang ingin Anda analisis",
+        accept_multiple_files=True,
+        help="Upload satu atau beberapa file PDF; dokumen disimpan di koleksi Anda",
         key="pdf_uploader"
     )
     
-    if uploaded_file is not None:
-        # Cek apakah ini file baru
-        if "uploaded_file_name" not in st.session_state or st.session_state.uploaded_file_name != uploaded_file.name:
-            st.session_state.uploaded_file_name = uploaded_file.name
-            
-            with st.spinner("Memproses dokumen..."):
-                # Tampilkan animasi loading
-                col_load1, col_load2 = st.columns([1, 3])
-                with col_load1:
-                    lottie_json = load_lottie_url(DEFAULT_ANIMATION)
-                    if lottie_json:
-                        st_lottie(lottie_json, height=80, key="doc_loading")
-                with col_load2:
-                    st.write("_Membaca dan menganalisis PDF..._")
-                
-                # Muat PDF
-                success, message, num_pages = st.session_state.document_rag.load_pdf(uploaded_file)
-                
-                if success:
-                    st.success(f"✅ {message}")
-                    
-                    # Dapatkan ringkasan dokumen
-                    with st.spinner("Membuat ringkasan dokumen..."):
-                        summary = st.session_state.document_rag.get_document_summary()
-                        st.session_state.document_summary = summary
-                    
-                    # Reset riwayat QA untuk dokumen baru
-                    st.session_state.document_qa_history = []
-                else:
-                    st.error(f"❌ {message}")
-                    st.session_state.pop("uploaded_file_name", None)
+    processed_uploads = st.session_state.setdefault("processed_uploads", set())
+    ingestion_job_ids = st.session_state.setdefault("ingestion_job_ids", [])
+    
+    # File baru dijadwalkan sebagai job latar belakang: job tetap berjalan walaupun
+    # script di-rerun, dan file yang sama dari sesi lain memakai job yang sama
+    for upload in uploaded_files or []:
+        if upload.file_id not in processed_uploads:
+            processed_uploads.add(upload.file_id)
+            job = document_engine.submit(rag_key, upload)
+            if job.job_id not in ingestion_job_ids:
+                ingestion_job_ids.append(job.job_id)
+    
+    # Muat ulang koleksi jika dokumen ditambah/dihapus oleh sesi lain
+    document_rag.refresh_collection()
+    
+    ingestion_jobs = [job for job in map(document_engine.job, ingestion_job_ids) if job is not None]
+    active_jobs = [job for job in ingestion_jobs if not job.finished]
+    
+    # Laporkan job yang baru selesai
+    for job in ingestion_jobs:
+        if not job.finished:
+            continue
+        ingestion_job_ids.remove(job.job_id)
+        success, message, num_pages = job.result
         
-        # Tampilkan info dokumen jika sudah dimuat
-        if "uploaded_file_name" in st.session_state:
-            st.markdown("---")
-            st.subheader("📋 Informasi Dokumen")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.info(f"**Nama File:** {st.session_state.uploaded_file_name}")
-            with col2:
-                if "document_summary" in st.session_state:
-                    with st.expander("📝 Ringkasan Dokumen"):
-                        st.write(st.session_state.document_summary)
+        if job.status == CANCELLED:
+            st.warning(f"⏹️ {job.file_name}: dibatalkan")
+        elif success:
+            st.success(f"✅ {job.file_name}: {message}")
             
-            # Bagian Q&A
+            # Ringkasan dibuat di latar belakang; Q&A langsung bisa dipakai
+            summaries = st.session_state.setdefault("document_summaries", {})
+            summary_jobs = st.session_state.setdefault("summary_jobs", {})
+            if job.document_id not in summaries:
+                summary_job = document_rag.summarize_in_background(job.document_id)
+                if summary_job is not None:
+                    summary_jobs[job.document_id] = summary_job
+        else:
+            st.error(f"❌ {job.file_name}: {message}")
+    
+    if active_jobs:
+        # Tampilkan progres setiap job ingestion
+        col_load1, col_load2 = st.columns([1, 3])
+        with col_load1:
+            lottie_json = load_lottie_url(DEFAULT_ANIMATION)
+            if lottie_json:
+                st_lottie(lottie_json, height=80, key="doc_loading")
+        with col_load2:
+            for job in active_jobs:
+                col_progress, col_cancel = st.columns([4, 1])
+                with col_progress:
+                    if job.status == QUEUED:
+                        st.progress(0.0, text=f"{job.file_name}: menunggu giliran...")
+                    else:
+                        st.progress(
+                            job.pages_indexed / job.total_pages if job.total_pages else 0.0,
+                            text=(f"{job.file_name}: terindeks {job.pages_indexed}/{job.total_pages or '?'} halaman "
+                                  f"({job.chunks_per_sec:.1f} bagian/detik)")
+                        )
+                with col_cancel:
+                    if st.button("✖️ Batalkan", key=f"cancel_{job.job_id}"):
+                        document_engine.cancel(job.job_id)
+                        st.rerun()
+            if document_rag.indexing and document_rag.retriever is not None:
+                st.caption("Anda sudah bisa bertanya tentang halaman yang sudah terindeks.")
+    
+    if document_rag.catalog or active_jobs:
+        # Tampilkan daftar dokumen di koleksi
+        collection = document_rag.list_documents()
+        summaries = st.session_state.setdefault("document_summaries", {})
+        summary_jobs = st.session_state.setdefault("summary_jobs", {})
+        for document_id in [doc_id for doc_id in summary_jobs if doc_id not in document_rag.catalog]:
+            summary_jobs.pop(document_id)
+        if collection:
             st.markdown("---")
-            st.subheader("2️⃣ Tanyakan tentang Dokumen")
-            
-            # Tampilkan riwayat QA
-            if st.session_state.document_qa_history:
-                st.markdown("### 💬 Riwayat Percakapan")
-                for i, qa in enumerate(st.session_state.document_qa_history):
-                    with st.chat_message("user", avatar="🧑"):
-                        st.markdown(qa["question"])
+            st.subheader(f"📚 Koleksi Dokumen ({len(collection)})")
+            for info in collection:
+                with st.expander(f"📄 {info['file_name']} — {info['num_pages']} halaman, {info['num_chunks']} bagian"):
+                    document_id = info["document_id"]
+                    job = summary_jobs.get(document_id)
+                    if document_id not in summaries and job is not None and job.done():
+                        summary_jobs.pop(document_id)
+                        try:
+                            summaries[document_id] = job.result()
+                        except Exception as e:
+                            summaries[document_id] = f"Error membuat ringkasan: {e}"
+                    elif document_id not in summaries and job is None:
+                        cached_summary = document_rag.get_cached_summary(document_id)
+                        if cached_summary is not None:
+                            summaries[document_id] = cached_summary
                     
-                    with st.chat_message("assistant", avatar="🤖"):
-                        st.markdown(qa["answer"])
-                        
-                        # Tampilkan sumber
-                        if qa.get("sources"):
-                            with st.expander(f"📚 Sumber (dari {len(qa['sources'])} bagian dokumen)"):
-                                for j, source in enumerate(qa["sources"], 1):
-                                    st.markdown(f"**Halaman {source['page'] + 1}:**")
-                                    st.caption(source["content"])
-                                    if j < len(qa["sources"]):
-                                        st.markdown("---")
-            
-            # Input pertanyaan
-            question = st.chat_input("Tanyakan sesuatu tentang dokumen ini...")
-            
-            if question:
-                # Tambahkan pertanyaan ke tampilan riwayat
+                    if document_id in summaries:
+                        st.write(summaries[document_id])
+                    elif document_id in summary_jobs:
+                        st.caption("⏳ Ringkasan sedang dibuat...")
+                    elif st.button("📝 Buat ringkasan", key=f"summarize_{document_id}"):
+                        job = document_rag.summarize_in_background(document_id)
+                        if job is not None:
+                            summary_jobs[document_id] = job
+                        st.rerun()
+                    if st.button(
+                        "🗑️ Hapus dari koleksi",
+                        key=f"remove_{info['document_id']}",
+                        disabled=document_rag.indexing
+                    ):
+                        engine_loop.run(document_engine.remove_document(rag_key, document_id))
+                        summaries.pop(document_id, None)
+                        st.rerun()
+        
+        # Bagian Q&A
+        st.markdown("---")
+        st.subheader("2️⃣ Tanyakan tentang Dokumen")
+        
+        # Pilih dokumen yang dijadikan sumber jawaban
+        document_names = {info["document_id"]: info["file_name"] for info in collection}
+        selected_documents = st.multiselect(
+            "Cari jawaban di dokumen",
+            options=list(document_names),
+            format_func=lambda document_id: document_names.get(document_id, document_id[:12]),
+            placeholder="Semua dokumen",
+            key="document_scope"
+        )
+        # Kosong = semua dokumen di koleksi (termasuk yang sedang diindeks)
+        document_scope = [doc_id for doc_id in selected_documents if doc_id in document_names] or None
+        
+        # Tampilkan riwayat QA
+        if st.session_state.document_qa_history:
+            st.markdown("### 💬 Riwayat Percakapan")
+            for i, qa in enumerate(st.session_state.document_qa_history):
                 with st.chat_message("user", avatar="🧑"):
-                    st.markdown(question)
+                    st.markdown(qa["question"])
                 
-                # Dapatkan jawaban dengan loading
                 with st.chat_message("assistant", avatar="🤖"):
-                    # Tampilkan loading
-                    col_think1, col_think2 = st.columns([1, 4])
-                    with col_think1:
-                        lottie_json = load_lottie_url(DEFAULT_ANIMATION)
-                        if lottie_json:
-                            lottie_placeholder = st.empty()
-                            with lottie_placeholder:
-                                st_lottie(lottie_json, height=50, key=f"thinking_{len(st.session_state.document_qa_history)}")
-                    
-                    with col_think2:
-                        status_placeholder = st.empty()
-                        status_placeholder.markdown("_Mencari jawaban dalam dokumen..._")
-                    
-                    # Query dokumen
-                    answer, sources = st.session_state.document_rag.query(question)
-                    
-                    # Hapus loading
-                    if lottie_json:
-                        lottie_placeholder.empty()
-                    status_placeholder.empty()
-                    
-                    # Tampilkan jawaban dengan efek mengetik
-                    answer_placeholder = st.empty()
-                    simulate_typing(answer, answer_placeholder)
+                    st.markdown(qa["answer"])
+                    if qa.get("cached"):
+                        st.caption("⚡ Dari cache jawaban")
                     
                     # Tampilkan sumber
-                    if sources:
-                        with st.expander(f"📚 Sumber (dari {len(sources)} bagian dokumen)"):
-                            for j, source in enumerate(sources, 1):
-                                st.markdown(f"**Halaman {source['page'] + 1}:**")
+                    if qa.get("sources"):
+                        with st.expander(f"📚 Sumber (dari {len(qa['sources'])} bagian dokumen)"):
+                            for j, source in enumerate(qa["sources"], 1):
+                                st.markdown(f"**{source.get('source') or 'Dokumen'} — {format_pages(source)}:**")
                                 st.caption(source["content"])
-                                if j < len(sources):
+                                if j < len(qa["sources"]):
                                     st.markdown("---")
+        
+        # Input pertanyaan (tersedia setelah batch halaman pertama terindeks)
+        question = st.chat_input(
+            "Tanyakan sesuatu tentang dokumen ini...",
+            disabled=document_rag.retriever is None
+        )
+        
+        if question:
+            # Tambahkan pertanyaan ke tampilan riwayat
+            with st.chat_message("user", avatar="🧑"):
+                st.markdown(question)
+            
+            # Dapatkan jawaban dengan loading
+            with st.chat_message("assistant", avatar="🤖"):
+                # Tampilkan loading
+                col_think1, col_think2 = st.columns([1, 4])
+                with col_think1:
+                    lottie_json = load_lottie_url(DEFAULT_ANIMATION)
+                    if lottie_json:
+                        lottie_placeholder = st.empty()
+                        with lottie_placeholder:
+                            st_lottie(lottie_json, height=50, key=f"thinking_{len(st.session_state.document_qa_history)}")
                 
-                # Simpan ke riwayat
-                st.session_state.document_qa_history.append({
-                    "question": question,
-                    "answer": answer,
-                    "sources": sources
-                })
+                with col_think2:
+                    status_placeholder = st.empty()
+                    status_placeholder.markdown("_Mencari jawaban dalam dokumen..._")
                 
-                # Rerun untuk update tampilan
-                st.rerun()
+                # Query dokumen: retrieval langsung, jawaban di-stream
+                tokens, sources, answer_cached = engine_loop.run(document_engine.stream_query(
+                    rag_key,
+                    question,
+                    use_cache=not st.session_state.get("bypass_answer_cache", False),
+                    document_ids=document_scope
+                ))
+                
+                def hide_loading():
+                    if lottie_json:
+                        lottie_placeholder.empty()
+                    status_placeholder.empty()
+                
+                # Tampilkan jawaban saat token tiba
+                answer_placeholder = st.empty()
+                answer, time_to_first_token = render_stream(
+                    engine_loop.iterate(tokens),
+                    answer_placeholder,
+                    max_fps=stream_render_fps,
+                    on_first_token=hide_loading
+                )
+                hide_loading()
+                st.session_state.last_ttft = time_to_first_token
+                
+                # Tampilkan sumber
+                if sources:
+                    with st.expander(f"📚 Sumber (dari {len(sources)} bagian dokumen)"):
+                        for j, source in enumerate(sources, 1):
+                            st.markdown(f"**{source.get('source') or 'Dokumen'} — {format_pages(source)}:**")
+                            st.caption(source["content"])
+                            if j < len(sources):
+                                st.markdown("---")
+            
+            # Simpan ke riwayat
+            st.session_state.document_qa_history.append({
+                "question": question,
+                "answer": answer,
+                "sources": sources,
+                "cached": answer_cached
+            })
+            
+            # Rerun untuk update tampilan
+            st.rerun()
     
     else:
-        # Tidak ada file yang diupload
+        # Koleksi masih kosong
         st.info("👆 Silakan upload file PDF untuk memulai")
         
         # Tampilkan contoh pertanyaan
@@ -490,13 +797,18 @@ if st.session_state.get("selected_feature") == "document":
         st.markdown("---")
         st.markdown("### ℹ️ Cara Penggunaan:")
         st.info("""
-        1. **Upload PDF** - Pilih file PDF yang ingin Anda analisis
+        1. **Upload PDF** - Pilih satu atau beberapa file PDF; semuanya disimpan di koleksi Anda
         2. **Tunggu Proses** - AI akan membaca dan memproses dokumen
         3. **Lihat Ringkasan** - Baca ringkasan otomatis dokumen
         4. **Tanyakan Apapun** - Ketik pertanyaan Anda di chat box
         5. **Dapatkan Jawaban** - AI akan menjawab berdasarkan isi dokumen
         6. **Cek Sumber** - Lihat dari halaman mana jawaban diambil
         """)
+    
+    # Perbarui progres ingestion dan ringkasan secara berkala
+    if active_jobs or document_rag.indexing or st.session_state.get("summary_jobs"):
+        time.sleep(1.0)
+        st.rerun()
 
 else:
     # ========== FITUR CHAT (Default) ==========
@@ -507,44 +819,36 @@ else:
     top_p = st.session_state.get("top_p", 0.95)
     top_k = st.session_state.get("top_k", 20)
     
-    # --- Inisialisasi Agent untuk Chat ---
-    # Reinisialisasi agent jika parameter berubah atau agent belum ada
-    current_params = (chat_model, temperature, top_p, top_k)
-    stored_params = st.session_state.get("last_params", None)
-    
-    if "agent" not in st.session_state or current_params != stored_params:
-        try:
-            # Inisialisasi LLM dengan API key dan parameter dari slider
-            llm = ChatGoogleGenerativeAI(
-                model=chat_model,
-                google_api_key=google_api_key,
-                temperature=temperature,
-                top_p=top_p,
-                top_k=top_k
-            )
-            
-            # Buat ReAct agent sederhana dengan LLM
-            st.session_state.agent = create_react_agent(
-                model=llm,
-                tools=[],  # Tidak ada tools untuk contoh sederhana ini
-                prompt=f"You are a helpful, friendly assistant chatting with {st.session_state.username}. Respond concisely and clearly in Indonesian when appropriate."
-            )
-            
-            # Simpan parameter saat ini
-            st.session_state.last_params = current_params
-            
-        except Exception as e:
-            st.error(f"❌ Error initializing agent: {e}")
-            st.stop()
-
     # --- Muat Riwayat Chat dari Database ---
     if "messages" not in st.session_state:
-        # Muat riwayat chat dari database
-        history = db.get_chat_history(st.session_state.user_id)
+        # Muat hanya halaman terakhir riwayat chat dari database
+        history = engine_loop.run(chat_engine.history_page(
+            st.session_state.user_id,
+            page_size=CHAT_HISTORY_PAGE_SIZE
+        ))
         st.session_state.messages = [
             {"role": msg["role"], "content": msg["content"]} 
             for msg in history
         ]
+        st.session_state.history_oldest_id = history[0]["id"] if history else None
+        st.session_state.history_has_more = len(history) == CHAT_HISTORY_PAGE_SIZE
+
+    # --- Muat Halaman Riwayat Sebelumnya Jika Diminta ---
+    if st.session_state.get("history_has_more"):
+        if st.button("⬆️ Muat pesan sebelumnya", key="load_older_messages"):
+            older = engine_loop.run(chat_engine.history_page(
+                st.session_state.user_id,
+                before_id=st.session_state.history_oldest_id,
+                page_size=CHAT_HISTORY_PAGE_SIZE
+            ))
+            st.session_state.messages = [
+                {"role": msg["role"], "content": msg["content"]}
+                for msg in older
+            ] + st.session_state.messages
+            if older:
+                st.session_state.history_oldest_id = older[0]["id"]
+            st.session_state.history_has_more = len(older) == CHAT_HISTORY_PAGE_SIZE
+            st.rerun()
 
     # --- Tampilkan Pesan Sebelumnya ---
     for msg in st.session_state.messages:
@@ -564,14 +868,11 @@ else:
         # 1. Tambahkan pesan user ke riwayat pesan
         st.session_state.messages.append({"role": "user", "content": prompt})
         
-        # 2. Simpan pesan user ke database
-        db.save_message(st.session_state.user_id, "user", prompt)
-        
-        # 3. Tampilkan pesan user
+        # 2. Tampilkan pesan user
         with st.chat_message("user", avatar="🧑"):
             st.markdown(prompt)
 
-        # 4. Tampilkan animasi loading saat memproses
+        # 3. Tampilkan animasi loading saat memproses
         with st.chat_message("assistant", avatar="🤖"):
             # Buat kolom untuk animasi loading
             col1, col2 = st.columns([1, 4])
@@ -589,42 +890,37 @@ else:
                 status_placeholder = st.empty()
                 status_placeholder.markdown("_Sedang berpikir..._")
             
-            # 5. Dapatkan respon dari assistant
-            try:
-                # Konversi riwayat pesan ke format yang diharapkan agent
-                messages = []
-                for msg in st.session_state.messages:
-                    if msg["role"] == "user":
-                        messages.append(HumanMessage(content=msg["content"]))
-                    elif msg["role"] == "assistant":
-                        messages.append(AIMessage(content=msg["content"]))
-                
-                # Kirim prompt user ke agent
-                response = st.session_state.agent.invoke({"messages": messages})
-                
-                # Ekstrak jawaban dari respon
-                if "messages" in response and len(response["messages"]) > 0:
-                    answer = response["messages"][-1].content
-                else:
-                    answer = "Maaf, saya tidak bisa menghasilkan respons."
-
-            except Exception as e:
-                answer = f"Terjadi kesalahan: {e}"
-            
-            # Hapus animasi loading
-            if lottie_json:
-                lottie_placeholder.empty()
-            status_placeholder.empty()
+            def hide_loading():
+                if lottie_json:
+                    lottie_placeholder.empty()
+                status_placeholder.empty()
             
-            # 6. Tampilkan respon assistant dengan efek mengetik
+            # 4. Kirim pesan ke engine chat dan tampilkan jawaban saat token tiba;
+            #    engine menyimpan pesan user dan jawaban ke database (write-behind)
+            #    dan memperbarui ringkasan percakapan lama di latar belakang
+            tokens = chat_engine.stream_chat(
+                st.session_state.user_id,
+                st.session_state.username,
+                prompt,
+                chat_model,
+                temperature=temperature,
+                top_p=top_p,
+                top_k=top_k
+            )
             response_container = st.empty()
-            final_answer = simulate_typing(answer, response_container)
+            answer, time_to_first_token = render_stream(
+                engine_loop.iterate(tokens),
+                response_container,
+                max_fps=stream_render_fps,
+                on_first_token=hide_loading
+            )
+            st.session_state.last_ttft = time_to_first_token
+            
+            # Hapus animasi loading
+            hide_loading()
         
-        # 7. Tambahkan respon assistant ke riwayat pesan
+        # 5. Tambahkan respon assistant ke riwayat pesan
         st.session_state.messages.append({"role": "assistant", "content": answer})
         
-        # 8. Simpan pesan assistant ke database
-        db.save_message(st.session_state.user_id, "assistant", answer)
-        
-        # 9. Rerun untuk menampilkan pesan dengan format yang tepat
+        # 6. Rerun untuk menampilkan pesan dengan format yang tepat
         st.rerun()
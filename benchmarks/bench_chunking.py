@@ -0,0 +1,144 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_chunking.py
+# Deskripsi    : Benchmark chunking: TokenChunker (lintas halaman) dibanding
+#                RecursiveCharacterTextSplitter per halaman.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - PDF sintetis dibuat dengan beberapa kepadatan halaman (baris per
+#   halaman); halaman pendek memperlihatkan chunk kecil di sisa halaman
+# - Statistik chunk (jumlah, token rata-rata/minimum, chunk kecil) dan waktu
+#   split diukur pada teks halaman yang sudah diekstrak
+# - Waktu ingestion lengkap diukur lewat DocumentRAG terhadap server Gemini
+#   palsu (fake_gemini.py), dengan koleksi dan cache embedding baru per run
+# - Jalankan: python benchmarks/bench_chunking.py --pages 200 --lines 6 20 40
+#
+# ============================================================================
+
+"""
+Benchmark chunking token lintas halaman vs splitter karakter per halaman
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_gemini import FakeGeminiServer
+from synthetic_pdf import make_pdf
+from client_pool import ClientPool
+from document_rag import DocumentRAG, TokenBucket, VectorIndexStore
+from embedding_cache import EmbeddingCache
+from pdf_extract import extract_pages
+
+CHAT_MODEL = "gemini-2.0-flash"
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+SPLITTERS = ("recursive_character", "token")
+
+
+class UploadedPDF(io.BytesIO):
+    """Pengganti UploadedFile Streamlit: buffer bytes dengan nama file"""
+    
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            super().__init__(f.read())
+        self.name = os.path.basename(path)
+
+
+def create_rag(splitter: str, pool: ClientPool, workdir: str, args) -> DocumentRAG:
+    """DocumentRAG dengan koleksi dan cache embedding kosong"""
+    rag = DocumentRAG(
+        "fake-key",
+        chat_model=CHAT_MODEL,
+        embedding_model=EMBEDDING_MODEL,
+        splitter=splitter,
+        chunk_tokens=args.chunk_tokens,
+        chunk_overlap_tokens=args.overlap_tokens,
+        index_store=VectorIndexStore(os.path.join(workdir, "vector_indexes")),
+        embedding_cache=EmbeddingCache(os.path.join(workdir, "embedding_cache.db")),
+        rate_limiter=TokenBucket(rate=args.embed_rps),
+        extract_workers=1,
+        llm=pool.get_chat_model(CHAT_MODEL, temperature=0.3),
+        embedding_backend=pool.get_embeddings(EMBEDDING_MODEL),
+        collection_id=f"bench-{splitter}"
+    )
+    rag.open_collection()
+    return rag
+
+
+def bench_split(rag: DocumentRAG, pages, args) -> dict:
+    """Statistik chunk dan waktu split (median) untuk teks halaman yang sudah diekstrak"""
+    timings = []
+    for _ in range(args.repeat):
+        chunker = rag._create_chunker()
+        start = time.perf_counter()
+        chunks = [chunk for page, text in pages for chunk in chunker.add_page(text, page)]
+        chunks += chunker.finish()
+        timings.append(time.perf_counter() - start)
+    
+    tokens = [chunk.tokens for chunk in chunks]
+    tiny = args.chunk_tokens // 4
+    return {
+        "chunks": len(chunks),
+        "avg_tokens": sum(tokens) / len(tokens),
+        "min_tokens": min(tokens),
+        "tiny_chunks": sum(1 for count in tokens if count < tiny),
+        "multi_page": sum(1 for chunk in chunks if chunk.page_end != chunk.page_start),
+        "split_ms": sorted(timings)[len(timings) // 2] * 1000,
+    }
+
+
+def bench_ingest(rag: DocumentRAG, pdf_path: str) -> float:
+    """Durasi load_pdf lengkap (ekstraksi, split, embedding, index)"""
+    start = time.perf_counter()
+    success, message, _ = rag.load_pdf(UploadedPDF(pdf_path))
+    elapsed = time.perf_counter() - start
+    if not success:
+        raise RuntimeError(message)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200, help="Jumlah halaman PDF sintetis")
+    parser.add_argument("--lines", type=int, nargs="+", default=[6, 20, 40], help="Baris per halaman")
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=48)
+    parser.add_argument("--repeat", type=int, default=5, help="Pengulangan pengukuran split")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latensi server palsu per request (detik)")
+    parser.add_argument("--embed-rps", type=float, default=1000.0, help="Rate limit request embedding")
+    parser.add_argument("--skip-ingest", action="store_true", help="Hanya ukur split, tanpa ingestion")
+    args = parser.parse_args()
+    
+    server = FakeGeminiServer(latency=args.latency)
+    with server, tempfile.TemporaryDirectory(prefix="teman-gemini-chunking-") as workdir:
+        pool = ClientPool("fake-key", base_url=server.url)
+        
+        print(f"{'baris':>5} {'splitter':<20} {'chunk':>6} {'token rata2':>11} {'min':>5} "
+              f"{'kecil':>6} {'lintas hal.':>11} {'split ms':>9} {'ingest s':>9}")
+        for lines in args.lines:
+            pdf_path = make_pdf(os.path.join(workdir, f"bench-{lines}.pdf"), args.pages, lines_per_page=lines)
+            pages = list(extract_pages(pdf_path, workers=1))
+            
+            for splitter in SPLITTERS:
+                rag_dir = os.path.join(workdir, f"{splitter}-{lines}")
+                rag = create_rag(splitter, pool, rag_dir, args)
+                stats = bench_split(rag, pages, args)
+                ingest = "-" if args.skip_ingest else f"{bench_ingest(rag, pdf_path):.2f}"
+                print(f"{lines:>5} {splitter:<20} {stats['chunks']:>6} {stats['avg_tokens']:>11.1f} "
+                      f"{stats['min_tokens']:>5} {stats['tiny_chunks']:>6} {stats['multi_page']:>11} "
+                      f"{stats['split_ms']:>9.1f} {ingest:>9}")
+
+
+if __name__ == "__main__":
+    main()
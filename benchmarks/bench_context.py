@@ -0,0 +1,95 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_context.py
+# Deskripsi    : Benchmark ukuran prompt dan latensi penyusunan konteks chat
+#                terhadap panjang percakapan: riwayat penuh vs jendela token
+#                dengan ringkasan bergulir.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Ringkasan dibuat oleh summarizer palsu (tanpa memanggil API)
+# - Latensi model diperkirakan dari jumlah token prompt (--ms-per-1k-tokens)
+# - Jalankan: python benchmarks/bench_context.py --lengths 10 100 1000 10000
+#
+# ============================================================================
+
+"""
+Benchmark ukuran prompt chat terhadap panjang percakapan
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_context import ConversationContext, estimate_tokens
+from database import ChatbotDatabase
+
+
+class FakeSummarizer:
+    """Summarizer palsu: ringkasan berukuran tetap"""
+    
+    def invoke(self, prompt: str):
+        return SimpleNamespace(content="Ringkasan: " + "topik penting " * 60)
+
+
+def fill_history(db: ChatbotDatabase, user_id: int, num_messages: int):
+    for i in range(num_messages):
+        role = "user" if i % 2 == 0 else "assistant"
+        length = 20 if role == "user" else 80
+        db.queue_message(user_id, role, f"Pesan {i}: " + "kata " * length)
+    db.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=20.0,
+                        help="Perkiraan latensi prefill model per 1000 token prompt")
+    args = parser.parse_args()
+    
+    print(
+        f"{'pesan':>7} {'token penuh':>12} {'token jendela':>14} "
+        f"{'susun penuh (ms)':>17} {'susun jendela (ms)':>19} "
+        f"{'est. model penuh (ms)':>22} {'est. model jendela (ms)':>24}"
+    )
+    for length in args.lengths:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ChatbotDatabase(os.path.join(tmp, "bench.db"))
+            user_id = db.create_user("bench")
+            fill_history(db, user_id, length)
+            context = ConversationContext(db, summarizer=FakeSummarizer())
+            
+            # Ringkasan sudah mengejar riwayat, seperti user lama pada sesi berikutnya
+            while context.update_summary(user_id):
+                pass
+            
+            start = time.perf_counter()
+            full_history = db.get_chat_history(user_id)
+            full_tokens = sum(estimate_tokens(msg["content"]) for msg in full_history)
+            full_ms = (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            messages = context.build_messages(user_id)
+            window_ms = (time.perf_counter() - start) * 1000
+            window_tokens = sum(estimate_tokens(str(msg.content)) for msg in messages)
+            
+            db.close()
+        
+        print(
+            f"{length:>7} {full_tokens:>12} {window_tokens:>14} "
+            f"{full_ms:>17.1f} {window_ms:>19.1f} "
+            f"{full_tokens / 1000 * args.ms_per_1k_tokens:>22.0f} "
+            f"{window_tokens / 1000 * args.ms_per_1k_tokens:>24.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
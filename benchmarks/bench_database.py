@@ -0,0 +1,125 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_database.py
+# Deskripsi    : Benchmark throughput penulisan pesan ChatbotDatabase dengan
+#                beberapa thread penulis secara bersamaan.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - "before" meniru pola lama: buka koneksi baru, commit, lalu tutup per pesan
+#   (journal mode default)
+# - "after" memakai ChatbotDatabase dengan connection pool dan WAL
+# - "write-behind" memakai queue_message() dan menghitung waktu sampai flush()
+# - Jalankan: python benchmarks/bench_database.py --threads 1 4 16
+#
+# ============================================================================
+
+"""
+Benchmark throughput penulisan pesan (pesan/detik) dengan N thread penulis
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import ChatbotDatabase
+
+
+class NaiveDatabase:
+    """Meniru perilaku lama: satu koneksi baru per operasi"""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        conn.close()
+    
+    def save_message(self, user_id: int, role: str, content: str):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute(
+            "INSERT INTO chat_history (user_id, role, content) VALUES (?, ?, ?)",
+            (user_id, role, content)
+        )
+        conn.commit()
+        conn.close()
+
+
+def run_writers(db, num_threads: int, messages_per_thread: int, write_behind: bool = False) -> float:
+    """Jalankan N thread penulis dan kembalikan throughput (pesan/detik)"""
+    errors = []
+    save = db.queue_message if write_behind else db.save_message
+    
+    def writer(user_id: int):
+        try:
+            for i in range(messages_per_thread):
+                role = "user" if i % 2 == 0 else "assistant"
+                save(user_id, role, f"Pesan benchmark nomor {i} dari user {user_id}")
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=writer, args=(t + 1,)) for t in range(num_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if write_behind:
+        db.flush()
+    elapsed = time.perf_counter() - start
+    
+    if errors:
+        raise errors[0]
+    
+    return (num_threads * messages_per_thread) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--messages", type=int, default=200, help="Pesan per thread")
+    args = parser.parse_args()
+    
+    print(
+        f"{'threads':>8} {'before (msg/s)':>16} {'after (msg/s)':>16} "
+        f"{'write-behind':>14} {'commits':>8}"
+    )
+    for num_threads in args.threads:
+        with tempfile.TemporaryDirectory() as tmp:
+            naive = NaiveDatabase(os.path.join(tmp, "naive.db"))
+            before = run_writers(naive, num_threads, args.messages)
+            
+            pooled = ChatbotDatabase(os.path.join(tmp, "pooled.db"), pool_size=num_threads)
+            after = run_writers(pooled, num_threads, args.messages)
+            pooled.close()
+            
+            batched = ChatbotDatabase(os.path.join(tmp, "batched.db"), pool_size=num_threads)
+            write_behind = run_writers(batched, num_threads, args.messages, write_behind=True)
+            commits = batched.writer.batches_committed
+            batched.close()
+        
+        print(
+            f"{num_threads:>8} {before:>16.0f} {after:>16.0f} "
+            f"{write_behind:>14.0f} {commits:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_embedding_cache.py
+# Deskripsi    : Benchmark cache embedding per chunk menggunakan backend
+#                embedding palsu (tanpa memanggil API Gemini).
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Meng-ingest dokumen sintetis, lalu versi revisinya yang mengubah sebagian
+#   kecil chunk; hanya chunk yang berubah yang boleh sampai ke backend
+# - Jalankan: python benchmarks/bench_embedding_cache.py --chunks 2000 --changed 50
+#
+# ============================================================================
+
+"""
+Benchmark cache embedding: ingest ulang dokumen yang diedit
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class FakeEmbeddings(Embeddings):
+    """Backend embedding deterministik dengan latensi buatan per panggilan"""
+    
+    def __init__(self, dim: int = 768, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.texts_embedded = 0
+    
+    def _vector(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        return [rng.uniform(-1, 1) for _ in range(self.dim)]
+    
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        self.texts_embedded += len(texts)
+        return [self._vector(text) for text in texts]
+    
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def make_chunks(num_chunks: int):
+    """Buat chunk sintetis, termasuk boilerplate yang berulang"""
+    chunks = []
+    for i in range(num_chunks):
+        if i % 10 == 0:
+            chunks.append("Dokumen ini bersifat rahasia dan hanya untuk penggunaan internal.")
+        else:
+            chunks.append(f"Pasal {i}. Para pihak sepakat atas ketentuan nomor {i} dalam perjanjian ini.")
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--changed", type=int, default=50, help="Jumlah chunk yang diedit di revisi")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latensi backend per panggilan (detik)")
+    args = parser.parse_args()
+    
+    original = make_chunks(args.chunks)
+    revised = list(original)
+    for i in random.Random(0).sample(range(1, args.chunks, 10), args.changed):
+        revised[i] = revised[i] + " (revisi)"
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = FakeEmbeddings(latency=args.latency)
+        embeddings = CachedEmbeddings(
+            backend,
+            model_name="fake-embedding",
+            cache=EmbeddingCache(os.path.join(tmp, "cache.db"))
+        )
+        
+        for label, chunks in (("original", original), ("revised", revised)):
+            before = backend.texts_embedded
+            start = time.perf_counter()
+            vectors = embeddings.embed_documents(chunks)
+            elapsed = time.perf_counter() - start
+            assert len(vectors) == len(chunks)
+            print(
+                f"{label:>9}: {len(chunks)} chunk, "
+                f"{backend.texts_embedded - before} dikirim ke backend, "
+                f"{elapsed * 1000:.1f} ms"
+            )
+        
+        embedded_for_revision = backend.texts_embedded - len(set(original))
+        assert embedded_for_revision == args.changed, embedded_for_revision
+        print(f"stats: {embeddings.stats()}")
+        embeddings.cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_import_time.py
+# Deskripsi    : Benchmark waktu import saat cold start (python -X importtime)
+#                dengan anggaran regresi.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Modul startup diambil dari import tingkat atas app.py, sehingga daftar
+#   selalu mengikuti kode aplikasi
+# - Setiap skenario diukur di proses Python baru; hasil yang dilaporkan
+#   adalah median beberapa pengulangan
+# - Selain anggaran waktu, startup juga gagal jika ada modul stack RAG/agent
+#   (chromadb, langchain_google_genai, langgraph, ...) yang ikut termuat
+# - Keluar dengan kode 1 jika anggaran dilanggar, sehingga bisa dipakai di CI:
+#   python benchmarks/bench_import_time.py --budget-ms 1000
+#
+# ============================================================================
+
+"""
+Benchmark waktu import cold start
+"""
+
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modul yang harus baru dimuat saat fitur terkait pertama dipakai
+LAZY_MODULES = (
+    "chromadb",
+    "langchain_community",
+    "langchain_google_genai",
+    "langchain_text_splitters",
+    "langgraph",
+    "pypdf",
+    "document_rag",
+)
+
+# Import tambahan saat fitur pertama kali dipakai, di atas modul startup
+FIRST_USE = {
+    "chat": ["langchain_core.messages", "langchain_google_genai", "langgraph.prebuilt"],
+    "dokumen": ["document_rag", "langchain_community.vectorstores", "langchain_text_splitters", "chromadb"],
+}
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def startup_modules(app_path: str) -> List[str]:
+    """Modul yang diimpor di tingkat atas app.py"""
+    with open(app_path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure(modules: List[str]) -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Import modul di proses baru dengan -X importtime
+    
+    Returns:
+        tuple: (total_ms, {paket tingkat atas: ms kumulatif}, modul lazy yang termuat)
+    """
+    code = (
+        f"import {', '.join(modules)}\n"
+        "import sys\n"
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        # Hanya baris tingkat atas (tanpa indentasi); anaknya sudah termasuk kumulatif
+        if match is None or match.group(3):
+            continue
+        package = match.group(4).split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(match.group(2)) / 1000.0
+    
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return sum(packages.values()), packages, loaded
+
+
+def measure_median(modules: List[str], repeat: int) -> Tuple[float, Dict[str, float], List[str]]:
+    """Median total dari beberapa pengulangan; rincian paket dari pengulangan median"""
+    runs = sorted((measure(modules) for _ in range(repeat)), key=lambda run: run[0])
+    return runs[len(runs) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="Jumlah pengulangan per skenario")
+    parser.add_argument("--budget-ms", type=float, default=1000.0,
+                        help="Batas total waktu import modul startup (ms)")
+    parser.add_argument("--top", type=int, default=8, help="Jumlah paket terberat yang ditampilkan")
+    args = parser.parse_args()
+    
+    modules = startup_modules(os.path.join(ROOT_DIR, "app.py"))
+    print(f"Modul startup app.py: {', '.join(modules)}\n")
+    
+    startup_ms, packages, loaded = measure_median(modules, args.repeat)
+    print(f"{'skenario':<10} {'import (ms)':>12}")
+    print(f"{'startup':<10} {startup_ms:>12.1f}")
+    for scenario, extra in FIRST_USE.items():
+        total_ms, _, _ = measure_median(modules + extra, args.repeat)
+        print(f"{scenario:<10} {total_ms:>12.1f}   (+{total_ms - startup_ms:.1f} ms saat pertama dipakai)")
+    
+    print("\nPaket terberat saat startup:")
+    for package, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<28} {ms:>8.1f} ms")
+    
+    failures = []
+    if startup_ms > args.budget_ms:
+        failures.append(f"import startup {startup_ms:.1f} ms melebihi anggaran {args.budget_ms:.0f} ms")
+    if loaded:
+        failures.append(f"modul lazy ikut termuat saat startup: {', '.join(loaded)}")
+    
+    if failures:
+        for failure in failures:
+            print(f"\nGAGAL: {failure}")
+        sys.exit(1)
+    print(f"\nOK: startup {startup_ms:.1f} ms (anggaran {args.budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
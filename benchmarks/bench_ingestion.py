@@ -0,0 +1,141 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_ingestion.py
+# Deskripsi    : Benchmark embedding paralel saat ingestion terhadap server
+#                embedding palsu lokal (HTTP) dengan latensi dan rate limit.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Server palsu mengembalikan HTTP 429 jika request melebihi batas per detik,
+#   sehingga jalur retry/backoff ikut teruji
+# - Jalankan: python benchmarks/bench_ingestion.py --workers 1 2 4 8
+#
+# ============================================================================
+
+"""
+Benchmark throughput embedding (chunk/detik) untuk berbagai jumlah worker
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from document_rag import TokenBucket, embed_in_batches
+
+
+def fake_vector(text: str, dim: int):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [digest[i % len(digest)] / 255.0 for i in range(dim)]
+
+
+def start_fake_server(latency: float, max_rps: float, dim: int):
+    """Jalankan server embedding palsu di thread latar, kembalikan (server, url)"""
+    limiter_lock = threading.Lock()
+    window = {"start": time.monotonic(), "count": 0}
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            
+            with limiter_lock:
+                now = time.monotonic()
+                if now - window["start"] >= 1.0:
+                    window["start"], window["count"] = now, 0
+                window["count"] += 1
+                limited = window["count"] > max_rps
+            
+            if limited:
+                self.send_response(429)
+                self.end_headers()
+                return
+            
+            time.sleep(latency)
+            payload = json.dumps({
+                "embeddings": [fake_vector(text, dim) for text in body["texts"]]
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/embed"
+
+
+class HttpEmbeddings(Embeddings):
+    """Client embedding sederhana untuk server palsu"""
+    
+    def __init__(self, url: str):
+        self.url = url
+    
+    def embed_documents(self, texts):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"texts": texts}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())["embeddings"]
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"HTTP {e.code} dari server embedding") from e
+    
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.2, help="Latensi server per request (detik)")
+    parser.add_argument("--server-rps", type=float, default=20, help="Batas request/detik di server")
+    parser.add_argument("--client-rps", type=float, default=15, help="Rate limit token bucket di client")
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+    
+    server, url = start_fake_server(args.latency, args.server_rps, args.dim)
+    embeddings = HttpEmbeddings(url)
+    texts = [f"Chunk sintetis nomor {i} untuk benchmark ingestion." for i in range(args.chunks)]
+    expected = [fake_vector(text, args.dim) for text in texts]
+    
+    print(f"{'workers':>8} {'chunk/detik':>12} {'detik':>8}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        vectors = embed_in_batches(
+            embeddings,
+            texts,
+            batch_size=args.batch_size,
+            max_workers=workers,
+            rate_limiter=TokenBucket(rate=args.client_rps)
+        )
+        elapsed = time.perf_counter() - start
+        
+        # Urutan hasil harus sama dengan urutan chunk
+        assert vectors == expected
+        print(f"{workers:>8} {len(texts) / elapsed:>12.0f} {elapsed:>8.2f}")
+    
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_pdf_extract.py
+# Deskripsi    : Benchmark ekstraksi teks PDF paralel multi-proses terhadap
+#                PDF sintetis (default 500 halaman).
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - workers=1 adalah baseline serial
+# - Jalankan: python benchmarks/bench_pdf_extract.py --pages 500 --workers 1 2 4 8
+#
+# ============================================================================
+
+"""
+Benchmark skala ekstraksi teks PDF terhadap jumlah worker
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from pdf_extract import extract_pages
+from synthetic_pdf import make_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=60, help="Baris teks per halaman")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_pdf(os.path.join(tmp, "synthetic.pdf"), args.pages, args.lines)
+        baseline = None
+        
+        print(f"{'workers':>8} {'halaman/detik':>14} {'detik':>8} {'speedup':>8}")
+        for workers in args.workers:
+            start = time.perf_counter()
+            pages = list(extract_pages(path, workers=workers, min_pages_for_parallel=0))
+            elapsed = time.perf_counter() - start
+            
+            # Halaman harus lengkap dan berurutan
+            assert [number for number, _ in pages] == list(range(args.pages))
+            
+            baseline = baseline or elapsed
+            print(
+                f"{workers:>8} {args.pages / elapsed:>14.0f} {elapsed:>8.2f} "
+                f"{baseline / elapsed:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
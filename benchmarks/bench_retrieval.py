@@ -0,0 +1,189 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_retrieval.py
+# Deskripsi    : Benchmark kualitas dan latensi retrieval: vektor saja, BM25
+#                saja, dan hybrid (RRF) pada korpus sintetis.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Embedding palsu berupa bag-of-words ter-hash yang mengabaikan angka,
+#   meniru kelemahan model dense pada ID, nomor pasal, dan kode
+# - Dua jenis query: term persis (ID/nama) dan parafrase (kata-kata isi chunk)
+# - Metrik: recall@k, MRR, dan latensi p50/p95 per query
+# - Jalankan: python benchmarks/bench_retrieval.py --chunks 5000 --queries 200
+#
+# ============================================================================
+
+"""
+Benchmark retrieval vektor vs BM25 vs hybrid
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from document_rag import HybridRetriever
+from lexical_index import BM25Index, tokenize
+from synthetic_pdf import WORDS
+
+NAMES = (
+    "andi budi citra dewi eko fajar gita hadi indah joko kartika lukman "
+    "mega nanda oki putri rahmat sari taufik umar vina wahyu yusuf zahra"
+).split()
+
+
+class BagOfWordsEmbeddings(Embeddings):
+    """Embedding palsu: bag-of-words ter-hash, angka diabaikan"""
+    
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+    
+    def _vector(self, text: str):
+        vector = [0.0] * self.dim
+        for token in tokenize(text):
+            if token.isdigit():
+                continue
+            bucket = int.from_bytes(hashlib.md5(token.encode("utf-8")).digest()[:4], "big") % self.dim
+            vector[bucket] += 1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+    
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+    
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def make_corpus(num_chunks: int, rng: random.Random):
+    """Chunk sintetis, masing-masing dengan nomor referensi dan nama unik"""
+    chunks = []
+    for i in range(num_chunks):
+        name = f"{rng.choice(NAMES)} {rng.choice(NAMES)}"
+        body = " ".join(rng.choice(WORDS) for _ in range(60))
+        chunks.append({
+            "text": f"Nomor referensi {100000 + i}. Penanggung jawab {name}. {body}",
+            "ref": str(100000 + i),
+            "name": name,
+            "body": body,
+        })
+    return chunks
+
+
+def make_queries(chunks, num_queries: int, rng: random.Random):
+    """Query (teks, id chunk target) jenis term persis dan parafrase"""
+    exact, paraphrase = [], []
+    for target in rng.sample(range(len(chunks)), num_queries):
+        chunk = chunks[target]
+        exact.append((f"apa isi ketentuan nomor {chunk['ref']}?", target))
+        words = chunk["body"].split()
+        start = rng.randrange(0, len(words) - 12)
+        paraphrase.append((" ".join(words[start:start + 12]), target))
+    return {"term persis": exact, "parafrase": paraphrase}
+
+
+def evaluate(retriever, queries, k: int):
+    """Hitung recall@k, MRR dan latensi untuk satu set query"""
+    hits, reciprocal_ranks, latencies = 0, [], []
+    for query, target in queries:
+        start = time.perf_counter()
+        results = retriever.invoke(query)
+        latencies.append(time.perf_counter() - start)
+        ranked = [doc.metadata["chunk_index"] for doc in results]
+        if target in ranked:
+            hits += 1
+            reciprocal_ranks.append(1.0 / (ranked.index(target) + 1))
+        else:
+            reciprocal_ranks.append(0.0)
+    latencies.sort()
+    return {
+        "recall": hits / len(queries),
+        "mrr": statistics.mean(reciprocal_ranks),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument("--vector-weight", type=float, default=1.0, help="Bobot RRF vektor untuk mode hybrid")
+    parser.add_argument("--lexical-weight", type=float, default=1.0, help="Bobot RRF BM25 untuk mode hybrid")
+    parser.add_argument("--rrf-k", type=int, default=60)
+    parser.add_argument("--lexical-min-ratio", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    chunks = make_corpus(args.chunks, rng)
+    queries = make_queries(chunks, args.queries, rng)
+    documents = [
+        Document(page_content=chunk["text"], metadata={"chunk_index": i})
+        for i, chunk in enumerate(chunks)
+    ]
+    
+    embeddings = BagOfWordsEmbeddings()
+    start = time.perf_counter()
+    vectorstore = Chroma(collection_name=f"bench-{uuid.uuid4().hex}", embedding_function=embeddings)
+    for offset in range(0, len(documents), 1000):
+        vectorstore.add_documents(documents[offset:offset + 1000])
+    vector_build = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    lexical_index = BM25Index()
+    lexical_index.add(doc.page_content for doc in documents)
+    lexical_build = time.perf_counter() - start
+    
+    print(f"korpus: {len(documents)} chunk, {args.queries} query per jenis, k={args.k}")
+    print(f"build vektor: {vector_build:.2f} dtk")
+    print(
+        f"build BM25: {lexical_build:.2f} dtk, {lexical_index.vocabulary_size} term, "
+        f"posting {lexical_index.memory_bytes() / 1024:.0f} KiB"
+    )
+    
+    modes = {
+        "vektor": (1.0, 0.0),
+        "bm25": (0.0, 1.0),
+        "hybrid": (args.vector_weight, args.lexical_weight),
+    }
+    for query_type, query_set in queries.items():
+        print(f"\n[{query_type}]")
+        for mode, (vector_weight, lexical_weight) in modes.items():
+            retriever = HybridRetriever(
+                vectorstore=vectorstore,
+                lexical_index=lexical_index,
+                documents=documents,
+                k=args.k,
+                fetch_k=args.fetch_k,
+                vector_weight=vector_weight,
+                lexical_weight=lexical_weight,
+                rrf_k=args.rrf_k,
+                lexical_min_ratio=args.lexical_min_ratio
+            )
+            result = evaluate(retriever, query_set, args.k)
+            print(
+                f"{mode:>7}: recall@{args.k} {result['recall']:.2f}, MRR {result['mrr']:.2f}, "
+                f"p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_suite.py
+# Deskripsi    : Suite benchmark end-to-end offline terhadap server Gemini palsu
+#                lokal: ingestion PDF, retrieval, giliran chat dan database.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Klien Gemini asli (ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings)
+#   diarahkan ke fake_gemini.py lewat ClientPool(base_url=...), jadi jalur
+#   kode yang diukur sama dengan aplikasi tanpa memakai kuota
+# - Semua data sintetis memakai seed tetap dan latensi server deterministik
+# - Latensi retrieval diukur dengan latensi server 0 agar mencerminkan biaya
+#   lokal (embedding query lewat HTTP loopback + pencarian vektor/BM25)
+# - Hasil ditulis sebagai JSON; --compare menampilkan selisih terhadap hasil
+#   commit lain
+# - Jalankan: python benchmarks/bench_suite.py --output hasil.json
+#             python benchmarks/bench_suite.py --compare hasil_lama.json
+#
+# ============================================================================
+
+"""
+Suite benchmark end-to-end offline dengan server Gemini palsu
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_gemini import FakeGeminiServer
+from synthetic_pdf import WORDS, make_pdf
+from client_pool import ClientPool
+from conversation_context import ConversationContext
+from database import ChatbotDatabase
+from document_rag import DocumentRAG, TokenBucket, VectorIndexStore
+from embedding_cache import EmbeddingCache
+from engine import ChatEngine
+
+CHAT_MODEL = "gemini-2.0-flash"
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+# Metrik yang lebih besar lebih baik; sisanya (latensi, detik) lebih kecil lebih baik
+HIGHER_IS_BETTER = ("per_sec",)
+
+
+class UploadedPDF(io.BytesIO):
+    """Pengganti UploadedFile Streamlit: buffer bytes dengan nama file"""
+    
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            super().__init__(f.read())
+        self.name = os.path.basename(path)
+
+
+def latency_summary(samples) -> dict:
+    """Persentil latensi (milidetik) dari daftar durasi dalam detik"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+    
+    return {
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+    }
+
+
+def bench_ingestion(args, pool: ClientPool, workdir: str):
+    """Ingestion satu PDF sintetis: halaman/detik dan chunk/detik"""
+    pdf_path = make_pdf(os.path.join(workdir, "bench.pdf"), args.pages, seed=args.seed)
+    rag = DocumentRAG(
+        "fake-key",
+        chat_model=CHAT_MODEL,
+        embedding_model=EMBEDDING_MODEL,
+        index_store=VectorIndexStore(os.path.join(workdir, "vector_indexes")),
+        embedding_cache=EmbeddingCache(os.path.join(workdir, "embedding_cache.db")),
+        rate_limiter=TokenBucket(rate=args.embed_rps),
+        extract_workers=args.extract_workers,
+        llm=pool.get_chat_model(CHAT_MODEL, temperature=0.3),
+        embedding_backend=pool.get_embeddings(EMBEDDING_MODEL),
+        collection_id="bench"
+    )
+    rag.open_collection()
+    
+    start = time.perf_counter()
+    success, message, num_pages = rag.load_pdf(UploadedPDF(pdf_path))
+    elapsed = time.perf_counter() - start
+    if not success:
+        raise RuntimeError(message)
+    
+    num_chunks = sum(info["num_chunks"] for info in rag.catalog.values())
+    return {
+        "pages": num_pages,
+        "chunks": num_chunks,
+        "seconds": elapsed,
+        "pages_per_sec": num_pages / elapsed,
+        "chunks_per_sec": num_chunks / elapsed,
+    }, rag
+
+
+def bench_retrieval(args, rag: DocumentRAG, server: FakeGeminiServer):
+    """Latensi retrieval hybrid dan latensi query lengkap (retrieval + jawaban streaming)"""
+    rng = random.Random(args.seed)
+    questions = [
+        f"Apa isi Pasal {rng.randint(1, args.pages)} tentang {' '.join(rng.sample(WORDS, 3))}?"
+        for _ in range(args.queries)
+    ]
+    
+    # Biaya lokal saja: server menjawab tanpa latensi buatan
+    latency, jitter = server.latency, server.jitter
+    server.latency, server.jitter = 0.0, 0.0
+    try:
+        retrieval = []
+        for question in questions:
+            start = time.perf_counter()
+            rag.retriever.invoke(question)
+            retrieval.append(time.perf_counter() - start)
+    finally:
+        server.latency, server.jitter = latency, jitter
+    
+    first_token, total = [], []
+    for question in questions:
+        start = time.perf_counter()
+        tokens, _ = rag.stream_query(question, use_cache=False)
+        first = None
+        for _ in tokens:
+            if first is None:
+                first = time.perf_counter() - start
+        total.append(time.perf_counter() - start)
+        first_token.append(first if first is not None else total[-1])
+    
+    return {
+        "retrieval": latency_summary(retrieval),
+        "query_ttft": latency_summary(first_token),
+        "query_total": latency_summary(total),
+    }
+
+
+def bench_chat(args, pool: ClientPool, workdir: str):
+    """Giliran chat lewat ChatEngine: beberapa user bersamaan di satu event loop"""
+    db = ChatbotDatabase(os.path.join(workdir, "chat.db"))
+    context = ConversationContext(db, summarizer=pool.get_chat_model(CHAT_MODEL, temperature=0.2))
+    engine = ChatEngine(db, pool, context)
+    user_ids = [db.create_user(f"bench-{i}") for i in range(args.chat_users)]
+    first_token, total = [], []
+    
+    async def conversation(user_id: int):
+        for turn in range(args.chat_turns):
+            start = time.perf_counter()
+            first = None
+            async for _ in engine.stream_chat(user_id, "Bench", f"Pertanyaan ke-{turn + 1}", CHAT_MODEL):
+                if first is None:
+                    first = time.perf_counter() - start
+            total.append(time.perf_counter() - start)
+            first_token.append(first if first is not None else total[-1])
+    
+    async def run_all():
+        await asyncio.gather(*[conversation(user_id) for user_id in user_ids])
+    
+    start = time.perf_counter()
+    asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+    db.close()
+    
+    return {
+        "turns": len(total),
+        "turns_per_sec": len(total) / elapsed,
+        "ttft": latency_summary(first_token),
+        "total": latency_summary(total),
+    }
+
+
+def bench_database(args, workdir: str):
+    """Throughput tulis (write-behind) dan baca halaman riwayat chat"""
+    db = ChatbotDatabase(os.path.join(workdir, "db_bench.db"))
+    user_ids = [db.create_user(f"db-{i}") for i in range(args.db_threads)]
+    per_thread = args.db_messages // args.db_threads
+    
+    def writer(user_id: int):
+        for i in range(per_thread):
+            db.queue_message(user_id, "user" if i % 2 == 0 else "assistant", f"Pesan benchmark nomor {i}")
+    
+    start = time.perf_counter()
+    threads = [threading.Thread(target=writer, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.flush()
+    write_elapsed = time.perf_counter() - start
+    
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    for _ in range(args.db_reads):
+        db.get_chat_history_page(rng.choice(user_ids), page_size=50)
+    read_elapsed = time.perf_counter() - start
+    db.close()
+    
+    return {
+        "writes": per_thread * len(user_ids),
+        "writes_per_sec": per_thread * len(user_ids) / write_elapsed,
+        "page_reads_per_sec": args.db_reads / read_elapsed,
+    }
+
+
+def git_revision() -> dict:
+    """Commit yang sedang diukur (kosong jika bukan repository git)"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Ratakan hasil bertingkat menjadi {"bagian.metrik": nilai}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def print_comparison(baseline: dict, current: dict):
+    """Tampilkan selisih metrik terhadap hasil sebelumnya"""
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    print(f"\nDibandingkan dengan {baseline['meta'].get('commit') or '?'}:")
+    print(f"{'metrik':<32} {'sebelum':>12} {'sesudah':>12} {'selisih':>9}")
+    for name in sorted(set(old) & set(new)):
+        change = (new[name] - old[name]) / old[name] * 100 if old[name] else 0.0
+        better = change > 0 if name.endswith(HIGHER_IS_BETTER) else change < 0
+        marker = "" if abs(change) < 5 else (" +" if better else " -")
+        print(f"{name:<32} {old[name]:>12.2f} {new[name]:>12.2f} {change:>8.1f}%{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--only", nargs="+", choices=["ingestion", "retrieval", "chat", "database"],
+                        help="Jalankan sebagian benchmark saja (retrieval memerlukan ingestion)")
+    parser.add_argument("--pages", type=int, default=50, help="Jumlah halaman PDF sintetis")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--chat-users", type=int, default=8, help="Jumlah percakapan bersamaan")
+    parser.add_argument("--chat-turns", type=int, default=5, help="Giliran per percakapan")
+    parser.add_argument("--db-messages", type=int, default=5000)
+    parser.add_argument("--db-threads", type=int, default=4)
+    parser.add_argument("--db-reads", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latensi server palsu per request (detik)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Variasi latensi +/- (detik)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Jeda antar token streaming (detik)")
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--embed-rps", type=float, default=1000.0, help="Rate limit request embedding")
+    parser.add_argument("--extract-workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Tulis hasil JSON ke file ini (default: stdout)")
+    parser.add_argument("--compare", help="File JSON hasil sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+    
+    sections = set(args.only or ["ingestion", "retrieval", "chat", "database"])
+    if "retrieval" in sections:
+        sections.add("ingestion")
+    
+    results = {}
+    server = FakeGeminiServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        token_latency=args.token_latency,
+        answer_tokens=args.answer_tokens
+    )
+    with server, tempfile.TemporaryDirectory(prefix="teman-gemini-bench-") as workdir:
+        pool = ClientPool("fake-key", base_url=server.url)
+        
+        if "ingestion" in sections:
+            print("Benchmark ingestion...", file=sys.stderr)
+            results["ingestion"], rag = bench_ingestion(args, pool, workdir)
+            if "retrieval" in sections:
+                print("Benchmark retrieval...", file=sys.stderr)
+                results["retrieval"] = bench_retrieval(args, rag, server)
+            rag.cleanup()
+        if "chat" in sections:
+            print("Benchmark chat...", file=sys.stderr)
+            results["chat"] = bench_chat(args, pool, workdir)
+        if "database" in sections:
+            print("Benchmark database...", file=sys.stderr)
+            results["database"] = bench_database(args, workdir)
+        
+        requests = dict(server.requests)
+    
+    report = {
+        "meta": dict(
+            git_revision(),
+            timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            args=vars(args),
+            fake_server_requests=requests
+        ),
+        "results": results,
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Hasil ditulis ke {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    
+    if args.compare:
+        with open(args.compare, "r") as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
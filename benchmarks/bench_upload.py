@@ -0,0 +1,97 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/bench_upload.py
+# Deskripsi    : Benchmark latensi dan memori membuka upload PDF besar: lewat
+#                file sementara (cara lama) vs langsung dari buffer memori.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Upload disimulasikan dengan io.BytesIO, sama seperti UploadedFile Streamlit
+# - Yang diukur: waktu sampai teks semua halaman terekstrak dan puncak alokasi
+#   memori Python (tracemalloc)
+# - Jalankan: python benchmarks/bench_upload.py --size-mb 10 50 100
+#
+# ============================================================================
+
+"""
+Benchmark upload PDF besar: file sementara vs buffer di memori
+"""
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from pdf_extract import extract_pages
+from synthetic_pdf import make_pdf
+
+
+def via_temp_file(uploaded_file) -> int:
+    """Cara lama: tulis buffer upload ke file sementara lalu baca ulang"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, "upload.pdf")
+        with open(path, "wb") as f:
+            f.write(uploaded_file.getbuffer())
+        return sum(1 for _ in extract_pages(path, workers=1))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def via_memory(uploaded_file) -> int:
+    """Cara baru: baca langsung dari buffer upload"""
+    return sum(1 for _ in extract_pages(uploaded_file.getbuffer(), workers=1))
+
+
+def measure(func, uploaded_file):
+    """Kembalikan (detik, puncak memori dalam MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(uploaded_file)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+    
+    print(
+        f"{'ukuran':>8} {'temp file (s)':>14} {'memori (s)':>11} "
+        f"{'temp file (MB)':>15} {'memori (MB)':>12}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.size_mb:
+            path = make_pdf(
+                os.path.join(tmp, f"upload_{size_mb}.pdf"),
+                args.pages,
+                padding_bytes=size_mb * 1024 ** 2
+            )
+            with open(path, "rb") as f:
+                uploaded_file = io.BytesIO(f.read())
+            
+            old_time, old_peak = measure(via_temp_file, uploaded_file)
+            new_time, new_peak = measure(via_memory, uploaded_file)
+            print(
+                f"{size_mb:>6}MB {old_time:>14.3f} {new_time:>11.3f} "
+                f"{old_peak:>15.1f} {new_peak:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
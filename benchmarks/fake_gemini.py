@@ -0,0 +1,266 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/fake_gemini.py
+# Deskripsi    : Server palsu lokal untuk endpoint chat dan embedding Gemini
+#                (REST v1beta) dengan respons deterministik dan latensi yang
+#                bisa diatur.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Mendukung generateContent, streamGenerateContent (SSE), embedContent dan
+#   batchEmbedContents; cukup untuk ChatGoogleGenerativeAI dan
+#   GoogleGenerativeAIEmbeddings lewat parameter base_url
+# - Jawaban dan vektor hanya bergantung pada isi request, sehingga hasil
+#   benchmark bisa diulang; jitter latensi juga diturunkan dari hash request
+# - Vektor berupa bag-of-words ter-hash, jadi retrieval tetap bermakna
+# - Jalankan sebagai server biasa lalu isi "gemini_base_url" di config.json:
+#   python benchmarks/fake_gemini.py --port 8765 --latency 0.05 --jitter 0.02
+#
+# ============================================================================
+
+"""
+Server Gemini palsu untuk benchmark offline
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexical_index import tokenize
+
+PATH_PATTERN = re.compile(r"^/v1beta/models/(?P<model>[^:/]+):(?P<method>\w+)")
+
+ANSWER_WORDS = (
+    "berdasarkan dokumen tersebut ketentuan pasal menyebutkan bahwa pihak pertama "
+    "wajib menyelesaikan laporan keuangan sesuai jadwal yang disepakati bersama "
+    "dan hasil analisis menunjukkan pendapatan meningkat pada tahun berjalan"
+).split()
+
+
+def request_digest(body: bytes) -> bytes:
+    """Hash isi request; dasar semua respons deterministik"""
+    return hashlib.sha256(body).digest()
+
+
+def fake_vector(text: str, dim: int) -> List[float]:
+    """Vektor bag-of-words ter-hash yang dinormalisasi"""
+    vector = [0.0] * dim
+    for token in tokenize(text):
+        bucket = int.from_bytes(hashlib.md5(token.encode("utf-8")).digest()[:4], "big") % dim
+        vector[bucket] += 1.0
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def fake_answer(digest: bytes, num_tokens: int) -> List[str]:
+    """Potongan jawaban deterministik (satu kata per potongan)"""
+    start = digest[0] % len(ANSWER_WORDS)
+    words = [ANSWER_WORDS[(start + i) % len(ANSWER_WORDS)] for i in range(num_tokens)]
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+
+def content_text(content: Dict) -> str:
+    """Gabungan teks semua part di satu objek content Gemini"""
+    return " ".join(part.get("text", "") for part in content.get("parts", []))
+
+
+class FakeGeminiServer:
+    """Server HTTP lokal yang meniru endpoint Gemini di thread latar"""
+    
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        token_latency: float = 0.005,
+        answer_tokens: int = 40,
+        dim: int = 768,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Inisialisasi server
+        
+        Args:
+            latency: Latensi dasar per request (detik); untuk streaming, waktu sampai token pertama
+            jitter: Variasi latensi maksimum (+/- detik), deterministik per isi request
+            token_latency: Jeda antar potongan jawaban streaming (detik)
+            answer_tokens: Jumlah potongan kata per jawaban
+            dim: Dimensi vektor embedding
+            host: Alamat bind
+            port: Port bind (0 = pilih port bebas)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.answer_tokens = answer_tokens
+        self.dim = dim
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL untuk parameter base_url klien Gemini"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "FakeGeminiServer":
+        """Jalankan server di thread latar"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+    
+    def serve_forever(self):
+        """Jalankan server di thread ini sampai dihentikan (Ctrl+C)"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+    
+    def stop(self):
+        """Hentikan server"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def delay(self, digest: bytes) -> float:
+        """Latensi request: latency +/- jitter, ditentukan oleh hash request"""
+        unit = int.from_bytes(digest[1:5], "big") / 0xFFFFFFFF
+        return max(0.0, self.latency + self.jitter * (2 * unit - 1))
+    
+    def _count(self, method: str):
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+    
+    def _handler_class(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Header dan body ditulis terpisah; tanpa ini koneksi keep-alive
+            # tertahan delayed ACK (~40 ms) dan latensi lokal tidak terukur
+            disable_nagle_algorithm = True
+            
+            def do_POST(self):
+                match = PATH_PATTERN.match(self.path)
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if match is None:
+                    self.send_json(404, {"error": {"code": 404, "message": f"Path tidak dikenal: {self.path}"}})
+                    return
+                
+                method = match.group("method")
+                fake._count(method)
+                digest = request_digest(body)
+                payload = json.loads(body or b"{}")
+                time.sleep(fake.delay(digest))
+                
+                if method == "generateContent":
+                    self.send_json(200, self.generate(digest))
+                elif method == "streamGenerateContent":
+                    self.stream(digest)
+                elif method == "batchEmbedContents":
+                    self.send_json(200, {"embeddings": [
+                        {"values": fake_vector(content_text(request.get("content", {})), fake.dim)}
+                        for request in payload.get("requests", [])
+                    ]})
+                elif method == "embedContent":
+                    self.send_json(200, {"embedding": {
+                        "values": fake_vector(content_text(payload.get("content", {})), fake.dim)
+                    }})
+                else:
+                    self.send_json(404, {"error": {"code": 404, "message": f"Method tidak didukung: {method}"}})
+            
+            def generate(self, digest: bytes) -> Dict:
+                tokens = fake_answer(digest, fake.answer_tokens)
+                return {
+                    "candidates": [{
+                        "content": {"role": "model", "parts": [{"text": "".join(tokens)}]},
+                        "finishReason": "STOP",
+                    }],
+                    "usageMetadata": {
+                        "promptTokenCount": 0,
+                        "candidatesTokenCount": len(tokens),
+                        "totalTokenCount": len(tokens),
+                    },
+                }
+            
+            def stream(self, digest: bytes):
+                # SSE tanpa Content-Length: koneksi ditutup setelah event terakhir
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                self.close_connection = True
+                
+                tokens = fake_answer(digest, fake.answer_tokens)
+                for i, token in enumerate(tokens):
+                    if i:
+                        time.sleep(fake.token_latency)
+                    candidate = {"content": {"role": "model", "parts": [{"text": token}]}}
+                    if i == len(tokens) - 1:
+                        candidate["finishReason"] = "STOP"
+                    event = json.dumps({"candidates": [candidate]})
+                    self.wfile.write(f"data: {event}\r\n\r\n".encode("utf-8"))
+                    self.wfile.flush()
+            
+            def send_json(self, status: int, payload: Dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latensi dasar per request (detik)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variasi latensi +/- (detik)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Jeda antar token streaming (detik)")
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+    
+    server = FakeGeminiServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        token_latency=args.token_latency,
+        answer_tokens=args.answer_tokens,
+        dim=args.dim,
+        host=args.host,
+        port=args.port
+    )
+    print(f"Server Gemini palsu berjalan di {server.url} (Ctrl+C untuk berhenti)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : benchmarks/synthetic_pdf.py
+# Deskripsi    : Pembuat file PDF sintetis berisi teks untuk benchmark, tanpa
+#                dependency tambahan.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+
+"""
+Pembuat PDF sintetis untuk benchmark
+"""
+
+import random
+
+WORDS = (
+    "perjanjian pihak pertama kedua pasal ayat ketentuan kewajiban hak "
+    "pembayaran jangka waktu berlaku sejak tanggal ditandatangani sengketa "
+    "diselesaikan secara musyawarah mufakat dokumen laporan keuangan tahun "
+    "pendapatan biaya operasional analisis data hasil penelitian kesimpulan"
+).split()
+
+
+def page_lines(page_number: int, lines_per_page: int, rng: random.Random):
+    """Baris teks deterministik untuk satu halaman"""
+    lines = [f"Halaman {page_number + 1} - Pasal {page_number + 1}"]
+    for _ in range(lines_per_page - 1):
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(12)))
+    return lines
+
+
+def make_pdf(
+    path: str,
+    num_pages: int,
+    lines_per_page: int = 40,
+    seed: int = 0,
+    padding_bytes: int = 0
+) -> str:
+    """
+    Tulis PDF berisi teks biasa (font Helvetica) ke path
+    
+    Args:
+        path: Lokasi file PDF yang dibuat
+        num_pages: Jumlah halaman
+        lines_per_page: Jumlah baris teks per halaman
+        seed: Seed agar isi teks deterministik
+        padding_bytes: Ukuran stream tambahan yang tidak dirujuk halaman mana pun,
+            untuk mensimulasikan file besar (mis. berisi gambar)
+        
+    Returns:
+        Path file PDF
+    """
+    rng = random.Random(seed)
+    objects = []
+    
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+    
+    catalog_id = add(b"")  # diisi setelah pages dibuat
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    page_ids = []
+    for page_number in range(num_pages):
+        text = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        for line in page_lines(page_number, lines_per_page, rng):
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            text.append(f"({escaped}) Tj T*")
+        text.append("ET")
+        stream = "\n".join(text).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+    
+    if padding_bytes:
+        padding = bytes(rng.getrandbits(8) for _ in range(4096)) * (padding_bytes // 4096 + 1)
+        padding = padding[:padding_bytes]
+        add(b"<< /Length %d >>\nstream\n" % len(padding) + padding + b"\nendstream")
+    
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+    
+    with open(path, "wb") as f:
+        f.write(output)
+    return path
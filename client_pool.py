@@ -0,0 +1,205 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : client_pool.py
+# Deskripsi    : Pool klien Gemini dan agent LangGraph yang dipakai bersama
+#                oleh semua sesi dalam satu proses
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Klien chat dan agent dikunci dengan (model, temperature, top_p, top_k);
+#   sesi dengan parameter sama memakai klien (dan koneksi HTTP) yang sama
+# - Agent dikompilasi tanpa system prompt; prompt per user dikirim saat invoke
+# - Pool dibatasi dengan LRU agar kombinasi slider tidak menumpuk di memori
+# - langchain_google_genai dan langgraph baru diimpor saat klien pertama
+#   dibuat, sehingga startup aplikasi tidak menunggu stack agent; klien yang
+#   dibutuhkan saat startup bisa diambil sebagai LazyClient
+#
+# ============================================================================
+
+"""
+Modul pool klien LLM, embeddings, dan agent
+"""
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable, Optional
+import threading
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+
+
+class LazyClient:
+    """Proxy klien yang baru dibuat (beserta import-nya) saat pertama kali dipakai"""
+    
+    def __init__(self, factory: Callable):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+    
+    def _resolve(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+    
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+
+class ClientPool:
+    """Pool klien Gemini dan agent yang aman dipakai lintas thread"""
+    
+    def __init__(self, api_key: str, max_entries: int = 32, base_url: Optional[str] = None):
+        """
+        Inisialisasi pool
+        
+        Args:
+            api_key: Google API key
+            max_entries: Jumlah maksimum klien/agent yang disimpan (LRU)
+            base_url: Endpoint API Gemini pengganti (mis. server palsu benchmark); None = endpoint resmi
+        """
+        self.api_key = api_key
+        self.max_entries = max_entries
+        self.base_url = base_url
+        self.created = 0
+        self.reused = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _get_or_create(self, key: Hashable, factory: Callable):
+        """Ambil entry dari pool atau buat baru, lalu tandai sebagai terbaru"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.reused += 1
+                return self._entries[key]
+        
+        # Pembuatan klien dilakukan di luar lock; jika dua thread berlomba,
+        # yang pertama tersimpan yang dipakai
+        value = factory()
+        
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.reused += 1
+                return self._entries[key]
+            self._entries[key] = value
+            self.created += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+    
+    @staticmethod
+    def _params_key(model: str, temperature: Optional[float], top_p: Optional[float], top_k: Optional[int]):
+        # Nilai slider dibulatkan agar noise floating point tidak membuat key baru
+        return (
+            model,
+            None if temperature is None else round(temperature, 3),
+            None if top_p is None else round(top_p, 3),
+            None if top_k is None else int(top_k),
+        )
+    
+    def get_chat_model(
+        self,
+        model: str,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        top_k: Optional[int] = None
+    ) -> "ChatGoogleGenerativeAI":
+        """
+        Dapatkan klien chat Gemini untuk kombinasi parameter tertentu
+        
+        Args:
+            model: Nama model Gemini
+            temperature: Temperature sampling
+            top_p: Top-p sampling
+            top_k: Top-k sampling
+            
+        Returns:
+            Instance ChatGoogleGenerativeAI yang dipakai bersama
+        """
+        key = ("llm",) + self._params_key(model, temperature, top_p, top_k)
+        
+        def factory():
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            
+            params = {"temperature": temperature, "top_p": top_p, "top_k": top_k}
+            return ChatGoogleGenerativeAI(
+                model=model,
+                google_api_key=self.api_key,
+                base_url=self.base_url,
+                **{name: value for name, value in params.items() if value is not None}
+            )
+        
+        return self._get_or_create(key, factory)
+    
+    def lazy_chat_model(
+        self,
+        model: str,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        top_k: Optional[int] = None
+    ) -> LazyClient:
+        """Seperti get_chat_model, tetapi klien baru diambil dari pool saat pertama dipakai"""
+        return LazyClient(lambda: self.get_chat_model(model, temperature, top_p, top_k))
+    
+    def get_agent(
+        self,
+        model: str,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        top_k: Optional[int] = None
+    ):
+        """
+        Dapatkan agent ReAct terkompilasi untuk kombinasi parameter tertentu
+        
+        Agent tidak menyimpan state percakapan; system prompt per user dikirim
+        sebagai SystemMessage pertama di input.
+        
+        Args:
+            model: Nama model Gemini
+            temperature: Temperature sampling
+            top_p: Top-p sampling
+            top_k: Top-k sampling
+            
+        Returns:
+            Graph LangGraph terkompilasi yang dipakai bersama
+        """
+        key = ("agent",) + self._params_key(model, temperature, top_p, top_k)
+        
+        def factory():
+            from langgraph.prebuilt import create_react_agent
+            
+            return create_react_agent(
+                model=self.get_chat_model(model, temperature, top_p, top_k),
+                tools=[]  # Tidak ada tools untuk contoh sederhana ini
+            )
+        
+        return self._get_or_create(key, factory)
+    
+    def get_embeddings(self, model: str) -> "GoogleGenerativeAIEmbeddings":
+        """
+        Dapatkan klien embeddings Gemini
+        
+        Args:
+            model: Nama model embedding
+            
+        Returns:
+            Instance GoogleGenerativeAIEmbeddings yang dipakai bersama
+        """
+        def factory():
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            
+            return GoogleGenerativeAIEmbeddings(model=model, google_api_key=self.api_key, base_url=self.base_url)
+        
+        return self._get_or_create(("embeddings", model), factory)
+    
+    def stats(self) -> dict:
+        """Statistik pool: jumlah entry, klien dibuat, dan klien dipakai ulang"""
+        with self._lock:
+            size = len(self._entries)
+        return {"entries": size, "created": self.created, "reused": self.reused}
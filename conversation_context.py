@@ -0,0 +1,243 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : conversation_context.py
+# Deskripsi    : Pengelola jendela konteks percakapan: beberapa giliran terakhir
+#                dikirim utuh, percakapan lama diwakili ringkasan bergulir.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Jumlah token diperkirakan dari panjang teks (±4 karakter per token)
+# - Ringkasan disimpan di ChatbotDatabase dan diperbarui bertahap, sehingga
+#   tidak dihitung ulang setiap sesi
+# - Pembaruan ringkasan dapat dijalankan di thread latar setelah jawaban tampil
+# - Pesan user giliran berjalan bisa diberikan langsung dari memori, sehingga
+#   konteks tidak menunggu pesan itu di-commit oleh writer database
+# - Kelas pesan LangChain baru diimpor saat pesan pertama disusun
+#
+# ============================================================================
+
+"""
+Modul jendela konteks percakapan dengan batas token dan ringkasan bergulir
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import threading
+
+from database import ChatbotDatabase
+from llm_utils import message_text
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+
+SUMMARY_PROMPT = """Perbarui ringkasan percakapan antara user dan asisten AI berikut.
+Pertahankan fakta penting, preferensi user, keputusan, dan topik yang masih terbuka.
+Tulis ringkasan padat dalam bahasa yang sama dengan percakapan.
+
+Ringkasan sebelumnya:
+{summary}
+
+Percakapan baru:
+{transcript}
+
+Ringkasan terbaru:"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Perkiraan kasar jumlah token (±4 karakter per token)"""
+    return len(text) // 4 + 1
+
+
+class ConversationContext:
+    """Jendela konteks percakapan dengan batas token dan ringkasan bergulir"""
+    
+    def __init__(
+        self,
+        db: ChatbotDatabase,
+        summarizer=None,
+        max_tokens: int = 6000,
+        keep_turns: int = 6,
+        summarize_after: int = 8,
+        max_pending_messages: int = 200,
+        max_summary_input_tokens: int = 8000
+    ):
+        """
+        Inisialisasi pengelola konteks
+        
+        Args:
+            db: Database chatbot (sumber riwayat dan tempat menyimpan ringkasan)
+            summarizer: LLM untuk membuat ringkasan (punya method invoke)
+            max_tokens: Batas token riwayat yang dikirim ke model
+            keep_turns: Jumlah giliran (user + asisten) terakhir yang dikirim utuh
+            summarize_after: Jumlah pesan lama yang belum diringkas sebelum
+                ringkasan diperbarui
+            max_pending_messages: Batas pesan lama yang dipertimbangkan per pembaruan
+            max_summary_input_tokens: Batas token transkrip per pembaruan ringkasan
+        """
+        self.db = db
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summarize_after = summarize_after
+        self.max_pending_messages = max_pending_messages
+        self.max_summary_input_tokens = max_summary_input_tokens
+        self._lock = threading.Lock()
+        self._updating = set()
+    
+    def _load_window(
+        self,
+        user_id: int,
+        oldest_first: bool = False
+    ) -> Tuple[Optional[Dict], List[Dict], List[Dict]]:
+        """
+        Muat ringkasan, pesan lama yang belum diringkas, dan giliran terakhir
+        
+        Args:
+            user_id: ID User
+            oldest_first: Jika pesan tertunda melebihi max_pending_messages,
+                ambil yang terlama (untuk ringkasan, agar watermark maju tanpa
+                melompati pesan) alih-alih yang terbaru (untuk konteks model)
+        
+        Returns:
+            tuple: (ringkasan atau None, pesan tertunda, pesan terbaru)
+        """
+        summary = self.db.get_conversation_summary(user_id)
+        recent = self.db.get_chat_history_page(user_id, page_size=self.keep_turns * 2)
+        if not recent:
+            return summary, [], []
+        
+        last_summarized_id = summary["last_message_id"] if summary else 0
+        boundary_id = recent[0]["id"]
+        pending = []
+        if boundary_id > last_summarized_id + 1:
+            if oldest_first:
+                pending = self.db.get_chat_history_page(
+                    user_id,
+                    before_id=boundary_id,
+                    after_id=last_summarized_id,
+                    page_size=self.max_pending_messages
+                )
+            else:
+                older = self.db.get_chat_history_page(
+                    user_id,
+                    before_id=boundary_id,
+                    page_size=self.max_pending_messages
+                )
+                pending = [msg for msg in older if msg["id"] > last_summarized_id]
+        
+        return summary, pending, recent
+    
+    def build_messages(self, user_id: int, prompt: Optional[str] = None) -> List["BaseMessage"]:
+        """
+        Susun pesan untuk dikirim ke model dalam batas token
+        
+        Urutan: ringkasan (sebagai SystemMessage), pesan lama yang belum
+        diringkas, lalu giliran terakhir. Pesan terlama dibuang lebih dulu
+        jika melewati batas token.
+        
+        Args:
+            user_id: ID User
+            prompt: Pesan user giliran ini yang belum disimpan; ditambahkan
+                sebagai pesan terakhir tanpa menunggu commit write-behind
+            
+        Returns:
+            List pesan LangChain
+        """
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+        
+        summary, pending, recent = self._load_window(user_id)
+        if prompt is not None:
+            recent = recent + [{"role": "user", "content": prompt}]
+        
+        messages = []
+        budget = self.max_tokens
+        if summary:
+            summary_text = f"Ringkasan percakapan sebelumnya dengan user:\n{summary['summary']}"
+            messages.append(SystemMessage(content=summary_text))
+            budget -= estimate_tokens(summary_text)
+        
+        kept = []
+        used = 0
+        for msg in reversed(pending + recent):
+            tokens = estimate_tokens(msg["content"])
+            if kept and used + tokens > budget:
+                break
+            kept.append(msg)
+            used += tokens
+        kept.reverse()
+        
+        # Percakapan ke model dimulai dari pesan user
+        while kept and kept[0]["role"] != "user":
+            kept.pop(0)
+        
+        for msg in kept:
+            if msg["role"] == "user":
+                messages.append(HumanMessage(content=msg["content"]))
+            elif msg["role"] == "assistant":
+                messages.append(AIMessage(content=msg["content"]))
+        
+        return messages
+    
+    def update_summary(self, user_id: int) -> bool:
+        """
+        Gabungkan pesan lama yang belum diringkas ke ringkasan jika sudah waktunya
+        
+        Args:
+            user_id: ID User
+            
+        Returns:
+            True jika ringkasan diperbarui
+        """
+        if self.summarizer is None:
+            return False
+        
+        # Backlog panjang (mis. ringkasan pertama) diringkas dari pesan terlama,
+        # satu batch per pembaruan, sampai menyusul giliran terakhir
+        summary, pending, _ = self._load_window(user_id, oldest_first=True)
+        if len(pending) < self.summarize_after:
+            return False
+        
+        # Ambil pesan tertua lebih dulu sampai batas token transkrip
+        batch = []
+        used = 0
+        for msg in pending:
+            tokens = estimate_tokens(msg["content"])
+            if batch and used + tokens > self.max_summary_input_tokens:
+                break
+            batch.append(msg)
+            used += tokens
+        
+        transcript = "\n".join(
+            f"{'User' if msg['role'] == 'user' else 'Asisten'}: {msg['content']}"
+            for msg in batch
+        )
+        prompt = SUMMARY_PROMPT.format(
+            summary=summary["summary"] if summary else "(belum ada)",
+            transcript=transcript
+        )
+        response = self.summarizer.invoke(prompt)
+        
+        self.db.save_conversation_summary(user_id, message_text(response.content), batch[-1]["id"])
+        return True
+    
+    def update_summary_in_background(self, user_id: int):
+        """Jalankan update_summary di thread latar (maksimal satu per user)"""
+        with self._lock:
+            if user_id in self._updating:
+                return
+            self._updating.add(user_id)
+        
+        def run():
+            try:
+                self.update_summary(user_id)
+            except Exception:
+                # Ringkasan hanya optimasi; coba lagi pada giliran berikutnya
+                pass
+            finally:
+                with self._lock:
+                    self._updating.discard(user_id)
+        
+        threading.Thread(target=run, name="conversation-summary", daemon=True).start()
@@ -13,6 +13,15 @@
 # - Menggunakan SQLite untuk penyimpanan database lokal
 # - Mengelola dua tabel utama: users dan chat_history
 # - Mendukung operasi CRUD untuk users dan pesan chat
+# - Koneksi dipakai ulang lewat connection pool dengan mode WAL
+# - Pesan chat dapat disimpan write-behind secara batch oleh thread latar;
+#   pembacaan riwayat hanya menunggu pesan tertunda milik user yang dibaca,
+#   bukan seluruh antrian, dan kegagalan batch dilaporkan lewat writer
+#   (last_error, failed_messages, on_error), bukan lewat pembaca
+# - Riwayat chat dapat dicari dengan full-text search (FTS5)
+# - Menyimpan ringkasan bergulir percakapan lama per user
+# - Setiap method publik ChatbotDatabase dicatat sebagai span "db.<nama>"
+#   (lihat tracing.py)
 #
 # ============================================================================
 
@@ -22,28 +31,424 @@ Menangani semua operasi database termasuk manajemen user dan riwayat chat
 """
 
 import sqlite3
+import atexit
 import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
+from tracing import traced
+
+
+# Migrasi skema berurutan. Elemen ke-i menaikkan PRAGMA user_version menjadi i + 1,
+# sehingga database lama hanya menjalankan migrasi yang belum pernah diterapkan.
+SCHEMA_MIGRATIONS = [
+    # v1: indeks untuk memuat riwayat per user tanpa scan seluruh tabel
+    [
+        "CREATE INDEX IF NOT EXISTS idx_chat_history_user_id "
+        "ON chat_history (user_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_chat_history_user_timestamp "
+        "ON chat_history (user_id, timestamp)",
+    ],
+    # v2: indeks full-text (FTS5) untuk pencarian riwayat chat
+    [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS chat_history_fts USING fts5(
+            content,
+            user_id UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS chat_history_fts_insert
+        AFTER INSERT ON chat_history BEGIN
+            INSERT INTO chat_history_fts (rowid, content, user_id)
+            VALUES (new.id, new.content, new.user_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS chat_history_fts_delete
+        AFTER DELETE ON chat_history BEGIN
+            DELETE FROM chat_history_fts WHERE rowid = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS chat_history_fts_update
+        AFTER UPDATE OF content, user_id ON chat_history BEGIN
+            DELETE FROM chat_history_fts WHERE rowid = old.id;
+            INSERT INTO chat_history_fts (rowid, content, user_id)
+            VALUES (new.id, new.content, new.user_id);
+        END
+        """,
+        # Pesan lama (id <= end_id) diindeks bertahap oleh backfill_search_index()
+        """
+        CREATE TABLE IF NOT EXISTS search_backfill (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_id INTEGER NOT NULL,
+            end_id INTEGER NOT NULL
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO search_backfill (id, last_id, end_id)
+        SELECT 1, 0, IFNULL(MAX(id), 0) FROM chat_history
+        """,
+    ],
+    # v3: ringkasan bergulir percakapan lama per user
+    [
+        """
+        CREATE TABLE IF NOT EXISTS conversation_summaries (
+            user_id INTEGER PRIMARY KEY,
+            summary TEXT NOT NULL,
+            last_message_id INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+    ],
+]
+
+
+class ConnectionPool:
+    """Pool koneksi SQLite yang thread-safe dan dapat dipakai ulang"""
+    
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 8,
+        timeout: float = 30.0,
+        busy_timeout_ms: int = 5000,
+        cached_statements: int = 256
+    ):
+        """
+        Inisialisasi pool koneksi
+        
+        Args:
+            db_path: Path file database SQLite
+            max_size: Jumlah maksimum koneksi yang dibuka bersamaan
+            timeout: Waktu tunggu (detik) untuk mendapatkan koneksi dari pool
+            busy_timeout_ms: Waktu tunggu SQLite (ms) saat database terkunci
+            cached_statements: Jumlah prepared statement yang di-cache per koneksi
+        """
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+    
+    def _create_connection(self) -> sqlite3.Connection:
+        """Buka koneksi baru dengan pragma yang sudah disetel"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,  # Koneksi berpindah thread lewat pool
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row  # Ini mengaktifkan akses kolom berdasarkan nama
+        
+        # WAL: pembaca tidak memblokir penulis, dan commit tidak perlu fsync penuh
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Ambil koneksi dari pool, buat baru jika pool belum penuh"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool sudah ditutup")
+        
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        
+        if create:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Tidak ada koneksi tersedia setelah {self.timeout} detik"
+            )
+    
+    def release(self, conn: sqlite3.Connection):
+        """Kembalikan koneksi ke pool"""
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+    
+    @contextmanager
+    def connection(self):
+        """
+        Context manager untuk meminjam koneksi dalam satu transaksi
+        
+        Commit otomatis jika blok selesai tanpa error, rollback jika gagal.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+    
+    def close(self):
+        """Tutup semua koneksi yang sedang idle di pool"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+class MessageWriter:
+    """Penulis write-behind: thread latar yang menyimpan pesan secara batch"""
+    
+    _STOP = object()
+    
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        max_queue_size: int = 10000,
+        batch_size: int = 256,
+        max_retries: int = 3,
+        on_error: Optional[Callable[[Exception, List[tuple]], None]] = None
+    ):
+        """
+        Inisialisasi writer
+        
+        Args:
+            pool: Connection pool yang dipakai untuk menulis
+            max_queue_size: Kapasitas antrian; put() akan menunggu jika penuh
+            batch_size: Jumlah maksimum pesan per transaksi
+            max_retries: Jumlah percobaan ulang jika commit batch gagal
+            on_error: Dipanggil di thread penulis dengan (error, batch) jika
+                batch tetap gagal setelah semua percobaan ulang
+        """
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.on_error = on_error
+        self.batches_committed = 0
+        self.messages_written = 0
+        self.failed_messages = 0
+        self.last_error = None
+        # user_id -> jumlah pesan di antrian yang belum selesai ditulis
+        self._pending: Dict[int, int] = {}
+        self._pending_changed = threading.Condition()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        atexit.register(self.close)
+    
+    def _ensure_started(self):
+        """Jalankan thread penulis saat pertama kali dibutuhkan"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="chatbot-db-writer",
+                    daemon=True
+                )
+                self._thread.start()
+    
+    def put(self, user_id: int, role: str, content: str):
+        """Masukkan pesan ke antrian untuk disimpan di latar belakang"""
+        if self._closed:
+            raise RuntimeError("MessageWriter sudah ditutup")
+        self._ensure_started()
+        with self._pending_changed:
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        self._queue.put((user_id, role, content))
+    
+    def wait_for_user(self, user_id: int, timeout: Optional[float] = None) -> bool:
+        """
+        Tunggu sampai pesan tertunda milik satu user selesai ditulis
+        
+        Pesan user lain di antrian tidak ditunggu. Pesan yang gagal disimpan
+        juga dianggap selesai (lihat last_error).
+        
+        Returns:
+            True jika tidak ada lagi pesan tertunda untuk user ini
+        """
+        with self._pending_changed:
+            return self._pending_changed.wait_for(lambda: user_id not in self._pending, timeout)
+    
+    def _done(self, batch: List[tuple]):
+        """Kurangi hitungan pesan tertunda per user untuk batch yang sudah diproses"""
+        with self._pending_changed:
+            for user_id, _, _ in batch:
+                remaining = self._pending[user_id] - 1
+                if remaining:
+                    self._pending[user_id] = remaining
+                else:
+                    del self._pending[user_id]
+            self._pending_changed.notify_all()
+    
+    def _run(self):
+        """Loop thread penulis: kuras antrian dan commit per batch"""
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                self._queue.task_done()
+                return
+            
+            batch = [item]
+            stop_requested = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop_requested = True
+                    break
+                batch.append(item)
+            
+            self._write_batch(batch)
+            self._done(batch)
+            for _ in batch:
+                self._queue.task_done()
+            
+            if stop_requested:
+                self._queue.task_done()
+                return
+    
+    @traced("db.write_batch")
+    def _write_batch(self, batch: List[tuple]):
+        """Simpan satu batch pesan dalam satu transaksi"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.pool.connection() as conn:
+                    conn.executemany(
+                        "INSERT INTO chat_history (user_id, role, content) VALUES (?, ?, ?)",
+                        batch
+                    )
+                self.batches_committed += 1
+                self.messages_written += len(batch)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.last_error = e
+                    self.failed_messages += len(batch)
+                    if self.on_error is not None:
+                        try:
+                            self.on_error(e, batch)
+                        except Exception:
+                            pass
+                    return
+                time.sleep(0.05 * (2 ** attempt))
+    
+    def flush(self):
+        """
+        Tunggu sampai semua pesan di antrian (semua user) tersimpan
+        
+        Untuk shutdown, benchmark dan test; jalur request memakai wait_for_user().
+        
+        Raises:
+            sqlite3.Error: Jika ada batch yang gagal disimpan sejak flush terakhir
+        """
+        if self._thread is not None:
+            self._queue.join()
+        
+        if self.last_error is not None:
+            error, self.last_error = self.last_error, None
+            raise error
+    
+    def close(self):
+        """Simpan semua pesan yang tersisa lalu hentikan thread penulis"""
+        if self._closed:
+            return
+        self._closed = True
+        
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join()
+        atexit.unregister(self.close)
 
 
 class ChatbotDatabase:
     """Pengelola database untuk aplikasi chatbot"""
     
-    def __init__(self, db_path: str = "chatbot.db"):
-        """Inisialisasi koneksi database dan buat tabel jika belum ada"""
+    def __init__(self, db_path: str = "chatbot.db", pool_size: int = 8):
+        """
+        Inisialisasi koneksi database dan buat tabel jika belum ada
+        
+        Args:
+            db_path: Path file database SQLite
+            pool_size: Jumlah maksimum koneksi di connection pool
+        """
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, max_size=pool_size)
+        self.writer = MessageWriter(self.pool)
         self.init_database()
     
     def get_connection(self):
-        """Buat dan kembalikan koneksi database"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Ini mengaktifkan akses kolom berdasarkan nama
-        return conn
+        """
+        Pinjam koneksi dari pool sebagai context manager
+        
+        Contoh:
+            with db.get_connection() as conn:
+                conn.execute(...)
+        """
+        return self.pool.connection()
+    
+    @traced("db.flush")
+    def flush(self):
+        """Tunggu sampai semua pesan dari queue_message() tersimpan"""
+        self.writer.flush()
+    
+    def _wait_for_user_writes(self, user_id: int):
+        """Read-your-writes: tunggu hanya pesan tertunda milik user ini"""
+        self.writer.wait_for_user(user_id)
     
+    @traced("db.close")
+    def close(self):
+        """Simpan pesan yang masih antri lalu tutup semua koneksi di pool"""
+        self.writer.close()
+        self.pool.close()
+    
+    @traced("db.init_database")
     def init_database(self):
         """Buat tabel database jika belum ada"""
-        conn = self.get_connection()
+        with self.get_connection() as conn:
+            self._create_tables(conn)
+            self._run_migrations(conn)
+    
+    def _create_tables(self, conn: sqlite3.Connection):
+        """Buat tabel dasar users dan chat_history"""
         cursor = conn.cursor()
         
         # Buat tabel users
@@ -66,10 +471,25 @@ class ChatbotDatabase:
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         """)
+    
+    def _run_migrations(self, conn: sqlite3.Connection):
+        """Terapkan migrasi skema yang belum dijalankan"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(SCHEMA_MIGRATIONS):
+            return
+        
+        # Kunci tulis selama migrasi agar proses lain tidak menulis di tengah jalan
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
         
-        conn.commit()
-        conn.close()
+        for target_version, statements in enumerate(SCHEMA_MIGRATIONS, start=1):
+            if version >= target_version:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={target_version}")
     
+    @traced("db.create_user")
     def create_user(self, name: str) -> int:
         """
         Buat user baru atau dapatkan ID user yang sudah ada
@@ -80,21 +500,20 @@ class ChatbotDatabase:
         Returns:
             ID User
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("INSERT INTO users (name) VALUES (?)", (name,))
-            user_id = cursor.lastrowid
-        except sqlite3.IntegrityError:
-            # User sudah ada, dapatkan ID mereka
-            cursor.execute("SELECT id FROM users WHERE name = ?", (name,))
-            user_id = cursor.fetchone()[0]
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute("INSERT INTO users (name) VALUES (?)", (name,))
+                user_id = cursor.lastrowid
+            except sqlite3.IntegrityError:
+                # User sudah ada, dapatkan ID mereka
+                cursor.execute("SELECT id FROM users WHERE name = ?", (name,))
+                user_id = cursor.fetchone()[0]
         
-        conn.commit()
-        conn.close()
         return user_id
     
+    @traced("db.get_user_id")
     def get_user_id(self, name: str) -> Optional[int]:
         """
         Dapatkan ID user berdasarkan nama
@@ -105,15 +524,14 @@ class ChatbotDatabase:
         Returns:
             ID User atau None jika tidak ditemukan
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE name = ?", (name,))
-        result = cursor.fetchone()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE name = ?", (name,))
+            result = cursor.fetchone()
         
-        conn.close()
         return result[0] if result else None
     
+    @traced("db.save_message")
     def save_message(self, user_id: int, role: str, content: str):
         """
         Simpan pesan chat ke database
@@ -123,17 +541,29 @@ class ChatbotDatabase:
             role: Role pesan ('user' atau 'assistant')
             content: Konten pesan
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO chat_history (user_id, role, content) VALUES (?, ?, ?)",
+                (user_id, role, content)
+            )
+    
+    @traced("db.queue_message")
+    def queue_message(self, user_id: int, role: str, content: str):
+        """
+        Simpan pesan chat secara write-behind (tanpa menunggu commit)
         
-        cursor.execute(
-            "INSERT INTO chat_history (user_id, role, content) VALUES (?, ?, ?)",
-            (user_id, role, content)
-        )
+        Pesan ditulis oleh thread latar dalam transaksi batch. Pembacaan
+        riwayat user yang sama menunggu pesan tertunda user itu saja;
+        kegagalan penulisan dilaporkan lewat self.writer, bukan pembaca.
         
-        conn.commit()
-        conn.close()
+        Args:
+            user_id: ID User
+            role: Role pesan ('user' atau 'assistant')
+            content: Konten pesan
+        """
+        self.writer.put(user_id, role, content)
     
+    @traced("db.get_chat_history")
     def get_chat_history(self, user_id: int, limit: Optional[int] = None) -> List[Dict]:
         """
         Dapatkan riwayat chat untuk user
@@ -145,23 +575,24 @@ class ChatbotDatabase:
         Returns:
             List pesan sebagai dictionary
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self._wait_for_user_writes(user_id)
         
         query = """
             SELECT role, content, timestamp 
             FROM chat_history 
             WHERE user_id = ? 
-            ORDER BY timestamp ASC
+            ORDER BY timestamp ASC, id ASC
         """
+        params = [user_id]
         
         if limit:
-            query += f" LIMIT {limit}"
+            query += " LIMIT ?"
+            params.append(int(limit))
         
-        cursor.execute(query, (user_id,))
-        rows = cursor.fetchall()
-        
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         
         # Konversi rows menjadi list dictionary
         messages = []
@@ -174,6 +605,229 @@ class ChatbotDatabase:
         
         return messages
     
+    @traced("db.get_chat_history_page")
+    def get_chat_history_page(
+        self,
+        user_id: int,
+        before_id: Optional[int] = None,
+        page_size: int = 50,
+        after_id: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Dapatkan satu halaman riwayat chat terbaru (keyset pagination)
+        
+        Args:
+            user_id: ID User
+            before_id: Ambil pesan dengan ID lebih kecil dari ini (None untuk halaman terbaru)
+            page_size: Jumlah maksimum pesan dalam satu halaman
+            after_id: Ambil pesan dengan ID lebih besar dari ini, mulai dari
+                yang terlama (untuk membaca maju dari suatu titik)
+            
+        Returns:
+            List pesan sebagai dictionary, urut dari yang terlama ke terbaru.
+            Gunakan "id" pesan pertama sebagai before_id untuk halaman sebelumnya.
+        """
+        self._wait_for_user_writes(user_id)
+        
+        if after_id is not None:
+            upper_bound = "AND id < ?" if before_id is not None else ""
+            query = f"""
+                SELECT id, role, content, timestamp
+                FROM chat_history
+                WHERE user_id = ? AND id > ? {upper_bound}
+                ORDER BY id ASC
+                LIMIT ?
+            """
+            params = (user_id, after_id) + ((before_id,) if before_id is not None else ()) + (page_size,)
+        elif before_id is None:
+            query = """
+                SELECT id, role, content, timestamp
+                FROM chat_history
+                WHERE user_id = ?
+                ORDER BY id DESC
+                LIMIT ?
+            """
+            params = (user_id, page_size)
+        else:
+            query = """
+                SELECT id, role, content, timestamp
+                FROM chat_history
+                WHERE user_id = ? AND id < ?
+                ORDER BY id DESC
+                LIMIT ?
+            """
+            params = (user_id, before_id, page_size)
+        
+        with self.get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        
+        # Balik urutan agar pesan tampil kronologis
+        if after_id is None:
+            rows = reversed(rows)
+        return [
+            {
+                "id": row["id"],
+                "role": row["role"],
+                "content": row["content"],
+                "timestamp": row["timestamp"]
+            }
+            for row in rows
+        ]
+    
+    @traced("db.search_messages")
+    def search_messages(self, user_id: int, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Cari pesan dalam riwayat chat user menggunakan full-text search
+        
+        Args:
+            user_id: ID User
+            query: Kata kunci pencarian
+            limit: Jumlah maksimum hasil
+            
+        Returns:
+            List hasil sebagai dictionary (id, role, snippet, timestamp),
+            urut dari yang paling relevan
+        """
+        # Kutip setiap kata agar karakter khusus FTS5 diperlakukan sebagai teks biasa
+        terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+        if not terms:
+            return []
+        
+        self._wait_for_user_writes(user_id)
+        
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT c.id, c.role, c.timestamp,
+                       snippet(chat_history_fts, 0, '**', '**', '…', 12) AS snippet
+                FROM chat_history_fts
+                JOIN chat_history c ON c.id = chat_history_fts.rowid
+                WHERE chat_history_fts MATCH ? AND chat_history_fts.user_id = ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (" ".join(terms), user_id, limit)
+            ).fetchall()
+        
+        return [
+            {
+                "id": row["id"],
+                "role": row["role"],
+                "snippet": row["snippet"],
+                "timestamp": row["timestamp"]
+            }
+            for row in rows
+        ]
+    
+    @traced("db.backfill_search_index")
+    def backfill_search_index(self, batch_size: int = 500, pause: float = 0.01) -> int:
+        """
+        Indeks pesan lama (sebelum migrasi FTS) ke tabel pencarian secara bertahap
+        
+        Setiap batch berjalan dalam transaksi pendek terpisah sehingga database
+        tidak terkunci lama. Aman dipanggil berulang kali atau dari beberapa proses.
+        
+        Args:
+            batch_size: Jumlah pesan yang diindeks per transaksi
+            pause: Jeda (detik) antar batch agar penulis lain mendapat giliran
+            
+        Returns:
+            Jumlah pesan yang diindeks
+        """
+        indexed = 0
+        
+        while True:
+            with self.get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                state = conn.execute(
+                    "SELECT last_id, end_id FROM search_backfill WHERE id = 1"
+                ).fetchone()
+                if state is None or state["last_id"] >= state["end_id"]:
+                    return indexed
+                
+                last_id, end_id = state["last_id"], state["end_id"]
+                upper = conn.execute(
+                    """
+                    SELECT MAX(id) FROM (
+                        SELECT id FROM chat_history
+                        WHERE id > ? AND id <= ?
+                        ORDER BY id
+                        LIMIT ?
+                    )
+                    """,
+                    (last_id, end_id, batch_size)
+                ).fetchone()[0]
+                if upper is None:
+                    upper = end_id
+                
+                # Hapus dulu agar baris yang sudah diindeks trigger tidak terduplikasi
+                conn.execute(
+                    "DELETE FROM chat_history_fts WHERE rowid > ? AND rowid <= ?",
+                    (last_id, upper)
+                )
+                cursor = conn.execute(
+                    """
+                    INSERT INTO chat_history_fts (rowid, content, user_id)
+                    SELECT id, content, user_id FROM chat_history
+                    WHERE id > ? AND id <= ?
+                    """,
+                    (last_id, upper)
+                )
+                indexed += cursor.rowcount
+                conn.execute("UPDATE search_backfill SET last_id = ? WHERE id = 1", (upper,))
+            
+            time.sleep(pause)
+    
+    @traced("db.get_conversation_summary")
+    def get_conversation_summary(self, user_id: int) -> Optional[Dict]:
+        """
+        Dapatkan ringkasan percakapan lama untuk user
+        
+        Args:
+            user_id: ID User
+            
+        Returns:
+            Dictionary (summary, last_message_id, updated_at) atau None jika belum ada
+        """
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT summary, last_message_id, updated_at FROM conversation_summaries WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        
+        return {
+            "summary": row["summary"],
+            "last_message_id": row["last_message_id"],
+            "updated_at": row["updated_at"]
+        }
+    
+    @traced("db.save_conversation_summary")
+    def save_conversation_summary(self, user_id: int, summary: str, last_message_id: int):
+        """
+        Simpan ringkasan percakapan lama untuk user
+        
+        Args:
+            user_id: ID User
+            summary: Teks ringkasan
+            last_message_id: ID pesan terakhir yang sudah tercakup ringkasan
+        """
+        with self.get_connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO conversation_summaries (user_id, summary, last_message_id, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    summary = excluded.summary,
+                    last_message_id = excluded.last_message_id,
+                    updated_at = excluded.updated_at
+                """,
+                (user_id, summary, last_message_id)
+            )
+    
+    @traced("db.clear_user_history")
     def clear_user_history(self, user_id: int):
         """
         Hapus semua riwayat chat untuk user
@@ -181,14 +835,14 @@ class ChatbotDatabase:
         Args:
             user_id: ID User
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM chat_history WHERE user_id = ?", (user_id,))
+        # Pesan tertunda user ini harus tertulis dulu agar ikut terhapus
+        self._wait_for_user_writes(user_id)
         
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM chat_history WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM conversation_summaries WHERE user_id = ?", (user_id,))
     
+    @traced("db.get_all_users")
     def get_all_users(self) -> List[Dict]:
         """
         Dapatkan semua user dari database
@@ -196,13 +850,10 @@ class ChatbotDatabase:
         Returns:
             List user sebagai dictionary
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id, name, created_at FROM users ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name, created_at FROM users ORDER BY created_at DESC")
+            rows = cursor.fetchall()
         
         users = []
         for row in rows:
@@ -14,6 +14,31 @@
 # - Mengimplementasikan pencarian vektor menggunakan ChromaDB untuk semantic search
 # - Mendukung loading dokumen PDF, chunking, dan Q&A
 # - Menggunakan model Gemini yang bisa dikonfigurasi untuk chat dan embeddings
+# - Setiap user punya koleksi berisi banyak dokumen dalam satu vector index
+#   persisten; dokumen dikenali dari hash isi file (document_id di metadata)
+# - Koleksi bernama (per user) adalah penyimpanan permanen: tidak terkena
+#   eviction LRU; ukurannya dibatasi kuota opsional yang menolak upload baru
+# - Dokumen yang sudah diindeks di koleksi lain (hash isi dan parameter index
+#   sama) disalin beserta vektornya tanpa parse/embedding ulang; setiap
+#   koleksi tetap menyimpan salinan vektornya sendiri di disk
+# - Menambah dokumen hanya memproses chunk dokumen itu, menghapus dokumen
+#   tidak membangun ulang index, dan query bisa dibatasi ke sebagian dokumen
+# - Embedding per chunk di-cache (lihat embedding_cache.py) dan dipakai ulang
+#   antar dokumen
+# - Embedding saat ingestion berjalan paralel per batch dengan rate limit
+#   (token bucket) dan retry ketika terkena batas kuota
+# - Ingestion streaming per batch halaman; query bisa dilakukan terhadap
+#   halaman yang sudah terindeks
+# - Ekstraksi teks PDF besar dibagi ke beberapa proses (lihat pdf_extract.py)
+# - PDF dibaca langsung dari buffer upload di memori, tanpa file sementara
+# - Koleksi yang lama tidak dipakai bisa di-spill (dilepas dari memori) dan
+#   dimuat ulang dari disk saat dibutuhkan (lihat rag_registry.py)
+# - Chroma (langchain_community/chromadb), klien Gemini dan text splitter
+#   baru diimpor saat pertama dipakai agar startup tetap cepat
+# - Chunking default berbasis perkiraan token dan lintas halaman (lihat
+#   text_chunker.py); metadata chunk berisi rentang halaman (page, page_end)
+#   dan offset karakter di teks dokumen. splitter="recursive_character"
+#   mempertahankan chunking per halaman untuk koleksi lama
 #
 # ============================================================================
 
@@ -22,15 +47,527 @@ Modul RAG (Retrieval Augmented Generation)
 Untuk membaca dan memproses dokumen PDF menggunakan Google Gemini
 """
 
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain_community.vectorstores import Chroma
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_classic.chains import RetrievalQA
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
-import tempfile
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from embedding_cache import CachedEmbeddings, EmbeddingCache, text_hash
+from answer_cache import AnswerCache
+from document_summary import DocumentSummarizer
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from pdf_extract import count_pages, extract_pages
+from text_chunker import PAGE_SEPARATOR, TextChunk, TokenChunker, estimate_tokens
+from llm_utils import message_text
+from tracing import StreamTimer, span, traced, tracer
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
 import os
 import shutil
+import sys
+import uuid
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+
+class TokenBucket:
+    """Rate limiter token bucket yang thread-safe"""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Inisialisasi token bucket
+        
+        Args:
+            rate: Jumlah token yang diisi ulang per detik
+            capacity: Jumlah token maksimum (burst), default sama dengan rate
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0):
+        """Ambil token, tunggu jika bucket kosong"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Prompt QA gaya "stuff": semua chunk hasil retrieval dimasukkan ke satu prompt
+QA_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+
+# Kuota embedding berlaku per API key, jadi rate limiter dibagi oleh semua instance
+EMBEDDING_RATE_LIMITER = TokenBucket(rate=10.0, capacity=10.0)
+
+# Dimensi vektor text-embedding-004, dipakai untuk memperkirakan memori index HNSW
+EMBEDDING_DIMENSIONS = 768
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """Cek apakah error berasal dari batas kuota/rate limit API"""
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ("resourceexhausted", "429", "quota", "rate limit"))
+
+
+def embed_in_batches(
+    embeddings,
+    texts: List[str],
+    batch_size: int = 64,
+    max_workers: int = 4,
+    rate_limiter: Optional[TokenBucket] = None,
+    max_retries: int = 5,
+    progress_callback: Optional[Callable[[int, int, float], None]] = None
+) -> List[List[float]]:
+    """
+    Embed teks dalam batch secara paralel dengan rate limit dan retry
+    
+    Args:
+        embeddings: Model embedding (punya method embed_documents)
+        texts: List teks yang akan di-embed
+        batch_size: Jumlah teks per request
+        max_workers: Jumlah request yang berjalan bersamaan
+        rate_limiter: Token bucket untuk membatasi request per detik
+        max_retries: Jumlah percobaan ulang saat terkena rate limit
+        progress_callback: Dipanggil dari thread pemanggil dengan
+            (chunk_selesai, total_chunk, chunk_per_detik)
+        
+    Returns:
+        List vektor dengan urutan yang sama seperti texts
+    """
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    results: List[Optional[List[List[float]]]] = [None] * len(batches)
+    
+    def embed_batch(batch: List[str]) -> List[List[float]]:
+        for attempt in range(max_retries + 1):
+            if rate_limiter:
+                rate_limiter.acquire()
+            try:
+                return embeddings.embed_documents(batch)
+            except Exception as e:
+                if attempt == max_retries or not _is_rate_limit_error(e):
+                    raise
+                # Exponential backoff dengan jitter
+                time.sleep(min(30.0, 2 ** attempt) * (0.5 + random.random()))
+    
+    start = time.perf_counter()
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(embed_batch, batch): i for i, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            done += len(batches[index])
+            if progress_callback:
+                elapsed = time.perf_counter() - start
+                progress_callback(done, len(texts), done / elapsed if elapsed > 0 else 0.0)
+    
+    return [vector for batch_vectors in results for vector in batch_vectors]
+
+
+class _CharacterChunker:
+    """
+    Adapter RecursiveCharacterTextSplitter per halaman dengan antarmuka TokenChunker
+    
+    Dipakai untuk splitter "recursive_character" (koleksi yang sudah ada);
+    chunk tidak pernah melewati batas halaman.
+    """
+    
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+        )
+        self._length = 0
+        self._num_pages = 0
+    
+    def add_page(self, text: str, page: int) -> List[TextChunk]:
+        if self._num_pages:
+            self._length += len(PAGE_SEPARATOR)
+        self._num_pages += 1
+        offset = self._length
+        self._length += len(text)
+        
+        chunks = []
+        position = 0
+        for piece in self._splitter.split_text(text):
+            # Splitter tidak mengembalikan offset; cari dari chunk sebelumnya
+            # (overlap membuat chunk berikutnya bisa mulai sebelum akhir chunk ini)
+            start = text.find(piece, position)
+            if start < 0:
+                start = text.find(piece)
+            position = start + 1
+            chunks.append(TextChunk(
+                text=piece,
+                char_start=offset + start,
+                char_end=offset + start + len(piece),
+                page_start=page,
+                page_end=page,
+                tokens=estimate_tokens(piece)
+            ))
+        return chunks
+    
+    def finish(self) -> List[TextChunk]:
+        return []
+
+
+def _close_chroma(vectorstore):
+    """Tutup client Chroma milik vector store (jika ada)"""
+    client = getattr(vectorstore, "_client", None)
+    if client is not None and hasattr(client, "close"):
+        client.close()
+
+
+class VectorIndexStore:
+    """Penyimpanan vector index persisten per key (mis. koleksi dokumen user)"""
+    
+    MANIFEST_NAME = "manifest.json"
+    
+    # Dibagi antar instance dalam satu proses
+    _lock = threading.Lock()
+    _key_locks: Dict[str, threading.Lock] = {}
+    _in_use: Dict[str, int] = {}
+    # key -> document_id yang sedang diingest (chunk-nya belum tercatat di manifest)
+    _ingesting: Dict[str, set] = {}
+    
+    def __init__(
+        self,
+        root_dir: str = "vector_indexes",
+        max_bytes: int = 2 * 1024 ** 3,
+        max_entries: int = 50
+    ):
+        """
+        Inisialisasi penyimpanan index
+        
+        Args:
+            root_dir: Direktori induk semua index
+            max_bytes: Batas total ukuran index sekali pakai di disk sebelum eviction (LRU)
+            max_entries: Batas jumlah index sekali pakai sebelum eviction (LRU)
+        """
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        # key -> ((build_id, version), byte); isi index hanya berubah bersama manifest
+        self._sizes: Dict[str, tuple] = {}
+        os.makedirs(self.root_dir, exist_ok=True)
+    
+    def key_lock(self, key: str) -> threading.Lock:
+        """Lock per key agar satu index tidak dibangun atau diubah dua kali bersamaan"""
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+    
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root_dir, key)
+    
+    def _manifest_path(self, key: str) -> str:
+        return os.path.join(self._entry_dir(key), self.MANIFEST_NAME)
+    
+    def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Cari index yang sudah selesai dibangun untuk key ini
+        
+        Returns:
+            Manifest index (dengan tambahan "path") atau None jika belum ada
+        """
+        manifest_path = self._manifest_path(key)
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+            # mtime manifest dipakai sebagai waktu akses terakhir untuk LRU
+            os.utime(manifest_path)
+        except (OSError, ValueError):
+            return None
+        
+        manifest["path"] = os.path.join(self._entry_dir(key), manifest["build_id"])
+        return manifest
+    
+    def find_document(self, document_id: str, params_key: str, exclude_key: Optional[str] = None) -> Optional[Dict]:
+        """
+        Cari index lain yang sudah berisi dokumen ini dengan parameter index yang sama
+        
+        Dipakai agar PDF yang sama di koleksi user lain tidak di-parse dan
+        di-embed ulang; chunk dan vektornya cukup disalin.
+        
+        Args:
+            document_id: Hash isi dokumen
+            params_key: Hash parameter chunking + model embedding (lihat DocumentRAG)
+            exclude_key: Key index yang dilewati (koleksi pemanggil)
+            
+        Returns:
+            Manifest index (dengan tambahan "key" dan "path") atau None
+        """
+        for key in os.listdir(self.root_dir):
+            if key == exclude_key:
+                continue
+            manifest = self._read_manifest(key)
+            if manifest is None:
+                continue
+            if manifest.get("params_key") == params_key and document_id in manifest.get("documents", {}):
+                manifest["key"] = key
+                manifest["path"] = os.path.join(self._entry_dir(key), manifest["build_id"])
+                return manifest
+        return None
+    
+    def new_build_path(self, key: str) -> tuple:
+        """
+        Siapkan direktori build baru untuk key ini
+        
+        Setiap build memakai nama direktori unik, sehingga client Chroma yang
+        masih menyimpan cache path lama tidak pernah menunjuk ke file yang dihapus.
+        
+        Returns:
+            tuple: (build_id: str, path: str)
+        """
+        entry_dir = self._entry_dir(key)
+        # Sisa build yang gagal (tanpa manifest) dibersihkan dulu
+        if os.path.isdir(entry_dir) and not os.path.exists(self._manifest_path(key)):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        
+        build_id = uuid.uuid4().hex
+        path = os.path.join(entry_dir, build_id)
+        os.makedirs(path)
+        return build_id, path
+    
+    def commit(self, key: str, build_id: str, manifest: Dict):
+        """Tulis manifest sebagai penanda bahwa build sudah lengkap"""
+        manifest = dict(manifest, build_id=build_id, created_at=time.time())
+        tmp_path = self._manifest_path(key) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path(key))
+    
+    def begin_ingest(self, key: str, document_id: str) -> bool:
+        """
+        Tandai dokumen sedang diingest ke index key ini
+        
+        Returns:
+            False jika dokumen yang sama sedang diingest oleh instance lain
+        """
+        with self._lock:
+            documents = self._ingesting.setdefault(key, set())
+            if document_id in documents:
+                return False
+            documents.add(document_id)
+            return True
+    
+    def end_ingest(self, key: str, document_id: str):
+        """Hapus tanda ingest dokumen"""
+        with self._lock:
+            documents = self._ingesting.get(key)
+            if documents is not None:
+                documents.discard(document_id)
+                if not documents:
+                    del self._ingesting[key]
+    
+    def ingesting(self, key: str) -> set:
+        """Dokumen yang sedang diingest ke index key ini"""
+        with self._lock:
+            return set(self._ingesting.get(key, ()))
+    
+    def remove(self, key: str):
+        """Hapus index satu key dari disk (mis. koleksi sekali pakai)"""
+        with self.key_lock(key):
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        self._sizes.pop(key, None)
+        with self._lock:
+            self._key_locks.pop(key, None)
+    
+    def acquire(self, key: str):
+        """Tandai index sedang dipakai agar tidak terkena eviction"""
+        with self._lock:
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+    
+    def release(self, key: str):
+        """Lepas tanda pemakaian index"""
+        with self._lock:
+            count = self._in_use.get(key, 0) - 1
+            if count > 0:
+                self._in_use[key] = count
+            else:
+                self._in_use.pop(key, None)
+    
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+    
+    def _read_manifest(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._manifest_path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _entry_size(self, key: str, manifest: Dict) -> int:
+        """
+        Ukuran index satu key, di-cache per (build_id, version) manifest
+        
+        Direktori hanya ditelusuri ulang jika koleksi berubah sejak
+        pengukuran terakhir (chunk yang sedang diingest belum terhitung
+        sampai katalognya di-commit).
+        """
+        stamp = (manifest.get("build_id"), manifest.get("version", 0))
+        cached = self._sizes.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        size = self._dir_size(self._entry_dir(key))
+        self._sizes[key] = (stamp, size)
+        return size
+    
+    def disk_bytes(self, key: Optional[str] = None) -> int:
+        """Ukuran index di disk (byte): satu key, atau semua index jika key None"""
+        keys = [key] if key is not None else os.listdir(self.root_dir)
+        total = 0
+        for entry_key in keys:
+            manifest = self._read_manifest(entry_key)
+            if manifest is not None:
+                total += self._entry_size(entry_key, manifest)
+        return total
+    
+    @staticmethod
+    def is_persistent(manifest: Dict) -> bool:
+        """
+        True untuk koleksi dokumen bernama (mis. milik user), yang tidak boleh terkena eviction
+        
+        Manifest lama tanpa tanda "persistent" dianggap koleksi jika punya
+        katalog dokumen; index lain (cache) tetap boleh dihapus.
+        """
+        return manifest.get("persistent", "documents" in manifest)
+    
+    def evict(self, max_bytes: Optional[int] = None):
+        """
+        Hapus index sekali pakai yang paling lama tidak dipakai sampai batas terpenuhi
+        
+        Koleksi persisten (lihat is_persistent) tidak pernah dihapus dan tidak
+        dihitung terhadap batas; ukurannya dibatasi lewat kuota per koleksi
+        di DocumentRAG.
+        
+        Args:
+            max_bytes: Batas ukuran untuk eviction ini (default: self.max_bytes)
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for key in os.listdir(self.root_dir):
+            manifest = self._read_manifest(key)
+            if manifest is None or self.is_persistent(manifest):
+                continue
+            try:
+                last_used = os.path.getmtime(self._manifest_path(key))
+            except OSError:
+                continue
+            entries.append({
+                "key": key,
+                "last_used": last_used,
+                "size": self._entry_size(key, manifest)
+            })
+        
+        entries.sort(key=lambda entry: entry["last_used"])
+        total_bytes = sum(entry["size"] for entry in entries)
+        total_entries = len(entries)
+        
+        for entry in entries:
+            if total_bytes <= max_bytes and total_entries <= self.max_entries:
+                break
+            with self._lock:
+                if entry["key"] in self._in_use:
+                    continue
+            shutil.rmtree(self._entry_dir(entry["key"]), ignore_errors=True)
+            self._sizes.pop(entry["key"], None)
+            total_bytes -= entry["size"]
+            total_entries -= 1
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever gabungan pencarian vektor (Chroma) dan leksikal (BM25) dengan RRF"""
+    
+    vectorstore: Any
+    lexical_index: Any
+    # List chunk milik DocumentRAG (dipakai bersama, bertambah selama ingestion;
+    # chunk dokumen yang dihapus diganti None)
+    documents: Any
+    # Batasi pencarian ke dokumen tertentu (None = semua dokumen di koleksi)
+    document_ids: Optional[List[str]] = None
+    k: int = 3
+    fetch_k: int = 20
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+    rrf_k: int = 60
+    # Hasil BM25 dengan skor di bawah rasio ini terhadap skor teratas dibuang;
+    # term umum menghasilkan ekor panjang yang menenggelamkan kecocokan persis
+    lexical_min_ratio: float = 0.25
+    
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        scope = set(self.document_ids) if self.document_ids is not None else None
+        if scope is not None and not scope:
+            return []
+        
+        candidates: Dict[str, Document] = {}
+        rankings, weights = [], []
+        
+        if self.vector_weight > 0:
+            search_kwargs = {}
+            if scope is not None:
+                search_kwargs["filter"] = {"document_id": {"$in": sorted(scope)}}
+            vector_ranking = []
+            for doc in self.vectorstore.similarity_search(query, k=self.fetch_k, **search_kwargs):
+                chunk_id = doc.metadata.get("chunk_id")
+                if chunk_id is None:
+                    continue
+                candidates[chunk_id] = doc
+                vector_ranking.append(chunk_id)
+            rankings.append(vector_ranking)
+            weights.append(self.vector_weight)
+        
+        if self.lexical_weight > 0:
+            documents = self.documents
+            
+            def in_scope(position: int) -> bool:
+                doc = documents[position]
+                return doc is not None and (scope is None or doc.metadata.get("document_id") in scope)
+            
+            lexical_ranking = []
+            lexical_hits = self.lexical_index.search(query, k=self.fetch_k, doc_filter=in_scope)
+            min_score = lexical_hits[0][1] * self.lexical_min_ratio if lexical_hits else 0.0
+            for position, score in lexical_hits:
+                if score < min_score:
+                    break
+                doc = documents[position]
+                chunk_id = doc.metadata["chunk_id"]
+                candidates.setdefault(chunk_id, doc)
+                lexical_ranking.append(chunk_id)
+            rankings.append(lexical_ranking)
+            weights.append(self.lexical_weight)
+        
+        fused = reciprocal_rank_fusion(rankings, weights, k=self.rrf_k)
+        return [candidates[chunk_id] for chunk_id, _ in fused[:self.k]]
 
 
 class DocumentRAG:
@@ -40,7 +577,32 @@ class DocumentRAG:
         self,
         api_key: str,
         chat_model: str = "gemini-2.0-flash",
-        embedding_model: str = "models/text-embedding-004"
+        embedding_model: str = "models/text-embedding-004",
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        splitter: str = "token",
+        chunk_tokens: int = 256,
+        chunk_overlap_tokens: int = 48,
+        index_store: Optional[VectorIndexStore] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embed_batch_size: int = 64,
+        embed_workers: int = 4,
+        rate_limiter: Optional[TokenBucket] = None,
+        extract_workers: int = 0,
+        min_pages_for_parallel: int = 64,
+        llm: Optional["ChatGoogleGenerativeAI"] = None,
+        embedding_backend: Optional[Embeddings] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        retrieval_k: int = 3,
+        fetch_k: int = 20,
+        vector_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        rrf_k: int = 60,
+        lexical_min_ratio: float = 0.25,
+        collection_id: Optional[str] = None,
+        summarizer: Optional[DocumentSummarizer] = None,
+        max_documents: Optional[int] = None,
+        max_collection_bytes: Optional[int] = None
     ):
         """
         Inisialisasi sistem RAG
@@ -49,154 +611,1028 @@ class DocumentRAG:
             api_key: Google API key
             chat_model: Nama model Gemini untuk chat dan ringkasan
             embedding_model: Nama model Gemini untuk embeddings
+            chunk_size: Ukuran maksimum chunk untuk splitter "recursive_character" (karakter)
+            chunk_overlap: Overlap antar chunk untuk splitter "recursive_character" (karakter)
+            splitter: "token" (TokenChunker, lintas halaman) atau "recursive_character"
+                (splitter karakter per halaman, untuk koleksi lama)
+            chunk_tokens: Ukuran maksimum chunk untuk splitter "token" (perkiraan token)
+            chunk_overlap_tokens: Overlap antar chunk untuk splitter "token" (perkiraan token)
+            index_store: Penyimpanan vector index persisten (default: ./vector_indexes)
+            embedding_cache: Cache embedding per chunk (default: ./embedding_cache.db)
+            embed_batch_size: Jumlah chunk per request embedding
+            embed_workers: Jumlah request embedding yang berjalan bersamaan
+            rate_limiter: Rate limiter request embedding (default: dibagi per proses)
+            extract_workers: Jumlah proses ekstraksi teks PDF (0 = jumlah CPU, 1 = serial)
+            min_pages_for_parallel: PDF dengan halaman lebih sedikit diekstrak serial
+            llm: Klien chat yang sudah ada (mis. dari ClientPool); default dibuat baru
+            embedding_backend: Klien embeddings yang sudah ada; default dibuat baru
+            answer_cache: Cache jawaban semantik bersama (None = tanpa cache jawaban)
+            retrieval_k: Jumlah chunk yang dikirim ke LLM sebagai konteks
+            fetch_k: Jumlah kandidat dari masing-masing pencarian sebelum digabung
+            vector_weight: Bobot RRF pencarian vektor (0 = nonaktif)
+            lexical_weight: Bobot RRF pencarian BM25 (0 = nonaktif)
+            rrf_k: Konstanta reciprocal rank fusion
+            lexical_min_ratio: Hasil BM25 di bawah rasio skor teratas tidak ikut digabung
+            collection_id: Id koleksi dokumen (mis. per user); None = koleksi sekali pakai
+                yang dihapus dari disk saat cleanup()
+            summarizer: Mesin ringkasan map-reduce bersama (default: dibuat dengan llm
+                instance ini saat ringkasan pertama diminta, ditutup di cleanup())
+            max_documents: Kuota jumlah dokumen per koleksi (None = tanpa batas)
+            max_collection_bytes: Kuota ukuran index koleksi di disk (None = tanpa batas);
+                upload baru ditolak jika kuota terlampaui, dokumen lama tidak dihapus
         """
         self.api_key = api_key
         self.chat_model = chat_model
         self.embedding_model = embedding_model
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model=self.embedding_model,
-            google_api_key=api_key
+        if splitter not in ("token", "recursive_character"):
+            raise ValueError(f"Splitter tidak dikenal: {splitter}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.splitter = splitter
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+        self.index_store = index_store or VectorIndexStore()
+        # Koleksi tanpa id hanya milik instance ini dan dihapus dari disk saat cleanup()
+        self.anonymous = collection_id is None
+        self.collection_id = collection_id or f"anonymous-{uuid.uuid4().hex}"
+        self.max_documents = max_documents
+        self.max_collection_bytes = max_collection_bytes
+        self.embed_batch_size = embed_batch_size
+        self.embed_workers = embed_workers
+        self.rate_limiter = rate_limiter or EMBEDDING_RATE_LIMITER
+        self.extract_workers = extract_workers
+        self.min_pages_for_parallel = min_pages_for_parallel
+        if embedding_backend is None or llm is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+        # Hanya chunk yang belum pernah di-embed yang dikirim ke API
+        self.embeddings = CachedEmbeddings(
+            embedding_backend or GoogleGenerativeAIEmbeddings(
+                model=self.embedding_model,
+                google_api_key=api_key
+            ),
+            model_name=self.embedding_model,
+            cache=embedding_cache
         )
-        self.llm = ChatGoogleGenerativeAI(
+        self.llm = llm or ChatGoogleGenerativeAI(
             model=self.chat_model,
             google_api_key=api_key,
             temperature=0.3
         )
+        self.answer_cache = answer_cache
+        self._summarizer = summarizer
+        self._owns_summarizer = summarizer is None
+        self._summarizer_lock = threading.Lock()
+        self.retrieval_k = retrieval_k
+        self.fetch_k = fetch_k
+        self.vector_weight = vector_weight
+        self.lexical_weight = lexical_weight
+        self.rrf_k = rrf_k
+        self.lexical_min_ratio = lexical_min_ratio
+        self.lexical_index = BM25Index()
+        self.last_answer_cached = False
         self.vectorstore = None
-        self.qa_chain = None
+        self.retriever = None
+        # Chunk semua dokumen koleksi, dokumen demi dokumen (None = sudah dihapus)
         self.documents = []
-        self.temp_dir = None
+        # document_id -> (posisi awal, posisi akhir) chunk di self.documents
+        self.document_positions: Dict[str, tuple] = {}
+        # document_id -> info dokumen (file_name, num_pages, num_chunks, added_at)
+        self.catalog: Dict[str, Dict] = {}
+        self.catalog_version = 0
+        self.collection_key = self._collection_key()
+        self.collection_build_id = None
+        self._collection_acquired = False
+        # True jika chunk dan vector store sudah dilepas dari memori (lihat spill)
+        self.spilled = False
+        # Jumlah query/ringkasan yang sedang memakai koleksi; spill ditunda selama > 0
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        self.document_hash = None
+        self.indexing = False
+        self.pages_indexed = 0
+        self.total_pages = 0
+    
+    def _params(self) -> Dict:
+        """Parameter yang menentukan isi index: chunking + model embedding"""
+        if self.splitter == "recursive_character":
+            # Sama dengan sebelum TokenChunker ada, agar key koleksi lama tetap cocok
+            return {
+                "splitter": "recursive_character",
+                "chunk_size": self.chunk_size,
+                "chunk_overlap": self.chunk_overlap,
+                "embedding_model": self.embedding_model,
+            }
+        return {
+            "splitter": "token",
+            "chunk_tokens": self.chunk_tokens,
+            "chunk_overlap_tokens": self.chunk_overlap_tokens,
+            "embedding_model": self.embedding_model,
+        }
+    
+    def _collection_key(self) -> str:
+        """Key index koleksi: id koleksi + parameter chunking + model embedding"""
+        params = json.dumps(dict(self._params(), collection_id=self.collection_id), sort_keys=True)
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()
+    
+    def _params_key(self) -> str:
+        """Hash parameter index tanpa id koleksi; sama untuk koleksi yang vektornya bisa dipakai bersama"""
+        return text_hash(json.dumps(self._params(), sort_keys=True))
+    
+    def open_collection(self):
+        """
+        Buka (atau buat) index koleksi dan muat semua chunk dokumennya
+        
+        Aman dipanggil berulang; koleksi hanya dimuat sekali.
+        """
+        if self.vectorstore is not None:
+            return
+        
+        with self.index_store.key_lock(self.collection_key):
+            self._attach_collection(self._lookup_or_create_manifest())
+    
+    def _lookup_or_create_manifest(self) -> Dict:
+        """Manifest koleksi; koleksi kosong dibuat jika belum ada (dipanggil di dalam key lock)"""
+        manifest = self.index_store.lookup(self.collection_key)
+        if manifest is None:
+            build_id, _ = self.index_store.new_build_path(self.collection_key)
+            self.index_store.commit(self.collection_key, build_id, {
+                "documents": {},
+                "version": 0,
+                "params_key": self._params_key(),
+                "persistent": not self.anonymous,
+            })
+            manifest = self.index_store.lookup(self.collection_key)
+        return manifest
+    
+    def _attach_collection(self, manifest: Dict):
+        """Pasang vector store koleksi dan muat ulang chunk semua dokumen"""
+        from langchain_community.vectorstores import Chroma
+        
+        self._release_index()
+        
+        self.vectorstore = Chroma(
+            embedding_function=self.embeddings,
+            persist_directory=manifest["path"]
+        )
+        self.index_store.acquire(self.collection_key)
+        self._collection_acquired = True
+        self.collection_build_id = manifest["build_id"]
+        self.catalog = dict(manifest.get("documents", {}))
+        self.catalog_version = manifest.get("version", 0)
+        
+        data = self.vectorstore.get(include=["documents", "metadatas"])
+        ingesting = self.index_store.ingesting(self.collection_key)
+        chunks_by_document: Dict[str, List[Document]] = {}
+        orphan_ids = []
+        for chunk_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+            metadata = metadata or {}
+            document_id = metadata.get("document_id")
+            if document_id not in self.catalog:
+                # Sisa ingestion yang terhenti di tengah jalan; dokumen yang
+                # masih diingest instance lain dilewati, bukan dihapus
+                if document_id not in ingesting:
+                    orphan_ids.append(chunk_id)
+                continue
+            chunks_by_document.setdefault(document_id, []).append(
+                Document(page_content=text, metadata=metadata)
+            )
+        if orphan_ids:
+            self.vectorstore._collection.delete(ids=orphan_ids)
+        
+        self.spilled = False
+        self.documents = []
+        self.document_positions = {}
+        for document_id in sorted(self.catalog, key=lambda doc_id: self.catalog[doc_id]["added_at"]):
+            chunks = chunks_by_document.get(document_id, [])
+            chunks.sort(key=lambda doc: doc.metadata.get("chunk_index", 0))
+            start = len(self.documents)
+            self.documents.extend(chunks)
+            self.document_positions[document_id] = (start, len(self.documents))
+        
+        self.lexical_index = BM25Index()
+        self.lexical_index.add(doc.page_content for doc in self.documents)
+        
+        self.retriever = self._build_retriever() if self.catalog else None
+    
+    def _sync_catalog(self):
+        """Muat ulang koleksi jika diubah oleh instance lain (dipanggil di dalam key lock)"""
+        manifest = self.index_store.lookup(self.collection_key)
+        if manifest is None or manifest.get("version", 0) != self.catalog_version:
+            self._attach_collection(self._lookup_or_create_manifest())
+    
+    def refresh_collection(self) -> bool:
+        """
+        Muat ulang koleksi jika dokumen ditambah/dihapus oleh sesi lain
+        
+        Returns:
+            True jika koleksi dimuat ulang
+        """
+        if self.vectorstore is None or self.indexing:
+            return False
+        manifest = self.index_store.lookup(self.collection_key)
+        if manifest is not None and manifest.get("version", 0) == self.catalog_version:
+            return False
+        with self.index_store.key_lock(self.collection_key):
+            self._sync_catalog()
+        return True
+    
+    def _commit_document(self, document_id: str, info: Dict):
+        """
+        Catat dokumen yang selesai diingest di manifest (dipanggil di dalam key lock)
+        
+        Key lock tidak dipegang selama ingestion, jadi sesi lain mungkin sudah
+        menambah/menghapus dokumen; dokumen ini ditambahkan ke katalog terbaru
+        lalu koleksi dimuat ulang agar chunk di memori sesuai katalog.
+        """
+        manifest = self.index_store.lookup(self.collection_key)
+        changed = manifest is not None and manifest.get("version", 0) != self.catalog_version
+        if changed:
+            self.catalog = dict(manifest.get("documents", {}))
+            self.catalog_version = manifest.get("version", 0)
+        self.catalog[document_id] = info
+        self._commit_catalog()
+        if changed:
+            self._attach_collection(self.index_store.lookup(self.collection_key))
+    
+    def _commit_catalog(self):
+        """Simpan daftar dokumen koleksi (dipanggil di dalam key lock)"""
+        self.catalog_version += 1
+        self.index_store.commit(self.collection_key, self.collection_build_id, {
+            "documents": self.catalog,
+            "version": self.catalog_version,
+            "params_key": self._params_key(),
+            "persistent": not self.anonymous,
+        })
+    
+    def _release_index(self):
+        """Lepas index koleksi yang sedang dipakai instance ini"""
+        if self._collection_acquired:
+            self.index_store.release(self.collection_key)
+            self._collection_acquired = False
+        self._close_vectorstore()
+    
+    def _close_vectorstore(self):
+        """Tutup client Chroma; index HNSW dilepas dari memori jika tidak ada client lain"""
+        _close_chroma(self.vectorstore)
+        self.vectorstore = None
+        self.retriever = None
+    
+    @property
+    def resident(self) -> bool:
+        """True jika koleksi sedang dimuat di memori"""
+        return self.vectorstore is not None
+    
+    def spill(self) -> bool:
+        """
+        Lepas chunk, index BM25 dan vector store dari memori
+        
+        Koleksi sudah persisten di disk, jadi tidak ada yang perlu ditulis;
+        index tetap ditandai dipakai agar tidak terkena eviction disk, dan
+        dimuat ulang otomatis saat dibutuhkan lagi (query, hapus, ringkasan).
+        
+        Returns:
+            True jika koleksi dilepas; False jika sedang indexing atau dipakai
+        """
+        if not self.resident or self.indexing:
+            return False
+        
+        # _busy_lock dipegang sampai selesai agar query baru menunggu, bukan
+        # mendapati vector store yang setengah ditutup
+        with self._busy_lock:
+            if self._busy:
+                return False
+            lock = self.index_store.key_lock(self.collection_key)
+            if not lock.acquire(blocking=False):
+                return False
+            try:
+                self._close_vectorstore()
+                self.documents = []
+                self.document_positions = {}
+                self.lexical_index = BM25Index()
+                self.spilled = True
+            finally:
+                lock.release()
+        return True
+    
+    @contextmanager
+    def _mark_busy(self):
+        """Tandai koleksi sedang dipakai (query, stream jawaban, ringkasan) agar tidak di-spill"""
+        with self._busy_lock:
+            self._busy += 1
+        try:
+            yield
+        finally:
+            with self._busy_lock:
+                self._busy -= 1
+    
+    def _rehydrate(self):
+        """Muat ulang koleksi yang sebelumnya di-spill"""
+        if self.spilled:
+            self.open_collection()
+    
+    def memory_bytes(self) -> int:
+        """
+        Perkiraan memori yang dipakai koleksi ini (byte)
+        
+        Mencakup teks dan metadata chunk, index BM25, dan vektor di index HNSW
+        Chroma (dimensi diasumsikan EMBEDDING_DIMENSIONS, float32).
+        """
+        if not self.resident:
+            return 0
+        total = self.lexical_index.memory_bytes()
+        for doc in self.documents:
+            if doc is not None:
+                total += sys.getsizeof(doc.page_content) + sys.getsizeof(doc.metadata)
+                total += EMBEDDING_DIMENSIONS * 4
+        return total
+    
+    def disk_bytes(self) -> int:
+        """Ukuran index koleksi ini di disk (byte)"""
+        return self.index_store.disk_bytes(self.collection_key)
+    
+    def _build_retriever(self, document_ids: Optional[List[str]] = None) -> HybridRetriever:
+        """Buat retriever hybrid (vektor + BM25) untuk semua dokumen atau sebagian"""
+        return HybridRetriever(
+            vectorstore=self.vectorstore,
+            lexical_index=self.lexical_index,
+            documents=self.documents,
+            document_ids=None if document_ids is None else list(document_ids),
+            k=self.retrieval_k,
+            fetch_k=self.fetch_k,
+            vector_weight=self.vector_weight,
+            lexical_weight=self.lexical_weight,
+            rrf_k=self.rrf_k,
+            lexical_min_ratio=self.lexical_min_ratio
+        )
+    
+    def list_documents(self) -> List[Dict]:
+        """
+        Daftar dokumen di koleksi, urut dari yang paling awal ditambahkan
         
-    def load_pdf(self, uploaded_file):
+        Returns:
+            List dictionary {document_id, file_name, num_pages, num_chunks, added_at}
         """
-        Muat dan proses file PDF
+        return [
+            dict(info, document_id=document_id)
+            for document_id, info in sorted(self.catalog.items(), key=lambda item: item[1]["added_at"])
+        ]
+    
+    def remove_document(self, document_id: str) -> bool:
+        """
+        Hapus satu dokumen dari koleksi tanpa membangun ulang index
+        
+        Args:
+            document_id: Id dokumen (hash SHA-256 file)
+            
+        Returns:
+            True jika dokumen ditemukan dan dihapus
+        """
+        with self._mark_busy():
+            self._rehydrate()
+            if self.indexing or self.vectorstore is None:
+                return False
+            
+            with self.index_store.key_lock(self.collection_key):
+                self._sync_catalog()
+                if document_id not in self.catalog:
+                    return False
+                
+                self.vectorstore._collection.delete(where={"document_id": document_id})
+                start, end = self.document_positions.pop(document_id, (0, 0))
+                for position in range(start, end):
+                    self.documents[position] = None
+                self.lexical_index.remove(range(start, end))
+                
+                del self.catalog[document_id]
+                self._commit_catalog()
+            
+            if not self.catalog:
+                self.retriever = None
+            return True
+    
+    def load_pdf(self, uploaded_file, progress_callback: Optional[Callable[[int, int, float], None]] = None):
+        """
+        Tambahkan file PDF ke koleksi
         
         Args:
             uploaded_file: Objek file yang diupload dari Streamlit
+            progress_callback: Dipanggil setiap batch halaman selesai diindeks dengan
+                (halaman_terindeks, total_halaman, chunk_per_detik)
+            
+        Returns:
+            tuple: (success: bool, message: str, num_pages: int)
+        """
+        stream = self.iter_load_pdf(uploaded_file)
+        while True:
+            try:
+                pages_indexed, total_pages, chunks_per_sec = next(stream)
+            except StopIteration as stop:
+                return stop.value
+            if progress_callback:
+                progress_callback(pages_indexed, total_pages, chunks_per_sec)
+    
+    def iter_load_pdf(self, uploaded_file, pages_per_batch: int = 8):
+        """
+        Tambahkan PDF ke koleksi secara streaming: halaman di-split, di-embed dan
+        ditambahkan ke vector store per batch, sehingga query bisa dilakukan
+        sebelum selesai. Hanya chunk dokumen baru yang diproses; dokumen yang
+        sudah ada di koleksi langsung siap.
+        
+        Args:
+            uploaded_file: Objek file yang diupload dari Streamlit
+            pages_per_batch: Jumlah halaman yang diproses per batch
+            
+        Yields:
+            tuple: (halaman_terindeks, total_halaman, chunk_per_detik)
             
         Returns:
             tuple: (success: bool, message: str, num_pages: int)
         """
+        self.indexing = True
+        self.pages_indexed = 0
+        self.total_pages = 0
+        start = time.perf_counter()
+        result = (False, "Ingestion dibatalkan.", 0)
+        
         try:
-            # Buat direktori sementara
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
+            file_bytes = uploaded_file.getbuffer()
+            document_id = hashlib.sha256(file_bytes).hexdigest()
+            self.document_hash = document_id
+            self.open_collection()
             
-            self.temp_dir = tempfile.mkdtemp()
-            temp_file_path = os.path.join(self.temp_dir, uploaded_file.name)
+            # Key lock hanya dipegang di antara yield (cek katalog, salin, commit
+            # per batch), sehingga sesi lain koleksi ini tidak tertahan selama ingestion
+            with self.index_store.key_lock(self.collection_key):
+                self._sync_catalog()
+                
+                # Dokumen yang sama sudah ada di koleksi: tidak perlu diproses ulang
+                info = self.catalog.get(document_id)
+                if info is None:
+                    quota_error = self._quota_error()
+                    if quota_error:
+                        result = (False, quota_error, 0)
+                        return result
+                    if not self.index_store.begin_ingest(self.collection_key, document_id):
+                        result = (False, "Dokumen yang sama sedang diproses di sesi lain.", 0)
+                        return result
+                    # Dokumen yang sama sudah diindeks di koleksi lain: salin chunk dan vektornya
+                    try:
+                        copied = self._copy_document(document_id, uploaded_file.name)
+                    except BaseException:
+                        self.index_store.end_ingest(self.collection_key, document_id)
+                        raise
             
-            # Simpan file yang diupload ke temp
-            with open(temp_file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            if info:
+                num_pages = info["num_pages"]
+                self.pages_indexed = self.total_pages = num_pages
+                yield num_pages, num_pages, 0.0
+                result = (True, f"Dokumen sudah ada di koleksi: {num_pages} halaman, {info['num_chunks']} bagian.", num_pages)
+                return result
             
-            # Muat PDF
-            loader = PyPDFLoader(temp_file_path)
-            documents = loader.load()
+            try:
+                if copied is not None:
+                    result = copied
+                    yield self.pages_indexed, self.total_pages, 0.0
+                else:
+                    result = yield from self._iter_add_document(
+                        document_id, uploaded_file.name, file_bytes, pages_per_batch
+                    )
+            finally:
+                self.index_store.end_ingest(self.collection_key, document_id)
             
-            if not documents:
-                return False, "Gagal membaca PDF. File mungkin kosong atau rusak.", 0
+            if result[0]:
+                self.index_store.evict()
+            return result
             
-            # Pisahkan dokumen menjadi chunk
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                length_function=len,
-            )
+        except Exception as e:
+            result = (False, f"Error saat memproses PDF: {str(e)}", 0)
+            return result
+        finally:
+            self.indexing = False
+            # Diukur manual karena generator ini melewati banyak yield
+            tracer.observe("rag.ingest", time.perf_counter() - start, error=not result[0])
+    
+    def _iter_add_document(self, document_id: str, file_name: str, file_bytes: memoryview, pages_per_batch: int):
+        """
+        Parse, chunk dan embed satu PDF ke index koleksi, per batch halaman
+        
+        Yields:
+            tuple: (halaman_terindeks, total_halaman, chunk_per_detik)
             
-            self.documents = text_splitter.split_documents(documents)
+        Returns:
+            tuple: (success: bool, message: str, num_pages: int)
+        """
+        # PDF dibaca langsung dari buffer upload di memori, tanpa file sementara
+        self.total_pages = count_pages(file_bytes)
+        if self.total_pages == 0:
+            return False, "Gagal membaca PDF. File mungkin kosong atau rusak.", 0
+        
+        chunker = self._create_chunker()
+        
+        start = time.perf_counter()
+        first_position = len(self.documents)
+        num_pages = 0
+        page_batch = []
+        
+        try:
+            # Muat PDF halaman demi halaman
+            for page in self._iter_pages(file_bytes, file_name):
+                page_batch.append(page)
+                if len(page_batch) < pages_per_batch:
+                    continue
+                num_pages += self._index_pages(document_id, file_name, first_position, page_batch, chunker)
+                page_batch = []
+                elapsed = time.perf_counter() - start
+                num_chunks = len(self.documents) - first_position
+                yield num_pages, self.total_pages, num_chunks / elapsed if elapsed > 0 else 0.0
             
-            # Buat vector store
-            self.vectorstore = Chroma.from_documents(
-                documents=self.documents,
-                embedding=self.embeddings,
-                persist_directory=os.path.join(self.temp_dir, "chroma_db")
+            # Batch terakhir juga mengeluarkan sisa teks yang masih ditahan chunker
+            num_pages += self._index_pages(document_id, file_name, first_position, page_batch, chunker, final=True)
+            elapsed = time.perf_counter() - start
+            num_chunks = len(self.documents) - first_position
+            yield num_pages, self.total_pages, num_chunks / elapsed if elapsed > 0 else 0.0
+        except BaseException:
+            # Buang chunk dokumen yang gagal agar koleksi tetap konsisten
+            with self.index_store.key_lock(self.collection_key):
+                self.vectorstore._collection.delete(where={"document_id": document_id})
+            for position in range(first_position, len(self.documents)):
+                self.documents[position] = None
+            self.lexical_index.remove(range(first_position, len(self.documents)))
+            if not self.catalog:
+                self.retriever = None
+            raise
+        
+        num_chunks = len(self.documents) - first_position
+        self.document_positions[document_id] = (first_position, len(self.documents))
+        with self.index_store.key_lock(self.collection_key):
+            self._commit_document(document_id, {
+                "file_name": file_name,
+                "num_pages": num_pages,
+                "num_chunks": num_chunks,
+                "added_at": time.time(),
+            })
+        
+        return True, f"Berhasil memproses {num_pages} halaman menjadi {num_chunks} bagian.", num_pages
+    
+    def _quota_error(self) -> Optional[str]:
+        """Pesan penolakan upload jika kuota koleksi sudah terpakai habis, selain itu None"""
+        if self.max_documents is not None and len(self.catalog) >= self.max_documents:
+            return (f"Koleksi sudah berisi {len(self.catalog)} dokumen (batas {self.max_documents}). "
+                    "Hapus dokumen lama sebelum menambah dokumen baru.")
+        if self.max_collection_bytes is not None:
+            used = self.disk_bytes()
+            if used >= self.max_collection_bytes:
+                return (f"Ukuran koleksi sudah {used / 1024 ** 2:.0f} MB "
+                        f"(batas {self.max_collection_bytes / 1024 ** 2:.0f} MB). "
+                        "Hapus dokumen lama sebelum menambah dokumen baru.")
+        return None
+    
+    def _copy_document(self, document_id: str, file_name: str) -> Optional[tuple]:
+        """
+        Salin chunk dan vektor dokumen dari index lain yang berisi dokumen yang sama
+        
+        Index disimpan per koleksi, sehingga PDF yang sama di koleksi beberapa
+        user tetap punya salinan vektor masing-masing; yang dihemat adalah
+        parse, chunking dan embedding (lihat VectorIndexStore.find_document).
+        
+        Returns:
+            tuple (success, message, num_pages) seperti _iter_add_document,
+            atau None jika tidak ada sumber (atau penyalinan gagal)
+        """
+        from langchain_community.vectorstores import Chroma
+        
+        source = self.index_store.find_document(document_id, self._params_key(), exclude_key=self.collection_key)
+        if source is None:
+            return None
+        info = source["documents"][document_id]
+        
+        # Sumber ditandai dipakai agar tidak terkena eviction selama dibaca
+        self.index_store.acquire(source["key"])
+        try:
+            with span("rag.ingest.copy"):
+                source_store = Chroma(embedding_function=self.embeddings, persist_directory=source["path"])
+                try:
+                    data = source_store._collection.get(
+                        where={"document_id": document_id},
+                        include=["embeddings", "documents", "metadatas"]
+                    )
+                finally:
+                    _close_chroma(source_store)
+        except Exception:
+            return None
+        finally:
+            self.index_store.release(source["key"])
+        if len(data["ids"]) != info["num_chunks"]:
+            return None
+        
+        rows = sorted(
+            zip(data["documents"], data["metadatas"], data["embeddings"]),
+            key=lambda row: row[1].get("chunk_index", 0)
+        )
+        chunks = [Document(page_content=text, metadata=dict(metadata, source=file_name)) for text, metadata, _ in rows]
+        first_position = len(self.documents)
+        with span("rag.ingest.index"):
+            try:
+                self._add_embedded_chunks(chunks, [vector for _, _, vector in rows])
+            except Exception:
+                # Salinan setengah jadi dibuang; dokumen diproses dari awal
+                self.vectorstore._collection.delete(where={"document_id": document_id})
+                return None
+            self.documents.extend(chunks)
+            self.lexical_index.add(chunk.page_content for chunk in chunks)
+        
+        num_pages = info["num_pages"]
+        self.pages_indexed = self.total_pages = num_pages
+        self.document_positions[document_id] = (first_position, len(self.documents))
+        self.catalog[document_id] = {
+            "file_name": file_name,
+            "num_pages": num_pages,
+            "num_chunks": len(chunks),
+            "added_at": time.time(),
+        }
+        self._commit_catalog()
+        if self.retriever is None:
+            self.retriever = self._build_retriever()
+        
+        return True, f"Dokumen disalin dari index yang sudah ada: {num_pages} halaman, {len(chunks)} bagian.", num_pages
+    
+    def _iter_pages(self, source, file_name: str):
+        """
+        Hasilkan Document per halaman PDF secara berurutan
+        
+        PDF besar diekstrak paralel di beberapa proses, PDF kecil serial.
+        
+        Args:
+            source: Buffer (bytes/memoryview) atau path PDF
+            file_name: Nama file asli untuk metadata
+        """
+        pages = extract_pages(
+            source,
+            workers=self.extract_workers,
+            min_pages_for_parallel=self.min_pages_for_parallel
+        )
+        while True:
+            with span("rag.ingest.parse"):
+                item = next(pages, None)
+            if item is None:
+                return
+            page_number, text = item
+            yield Document(
+                page_content=text,
+                metadata={
+                    "source": file_name,
+                    "page": page_number,
+                    "page_label": str(page_number + 1),
+                    "total_pages": self.total_pages
+                }
             )
+    
+    def _create_chunker(self):
+        """Chunker baru untuk satu dokumen sesuai parameter splitter"""
+        if self.splitter == "recursive_character":
+            return _CharacterChunker(self.chunk_size, self.chunk_overlap)
+        return TokenChunker(self.chunk_tokens, self.chunk_overlap_tokens)
+    
+    def _index_pages(
+        self,
+        document_id: str,
+        file_name: str,
+        first_position: int,
+        pages: List[Document],
+        chunker,
+        final: bool = False
+    ) -> int:
+        """
+        Split, embed dan tambahkan satu batch halaman ke vector store
+        
+        Args:
+            document_id: Id dokumen yang sedang ditambahkan
+            file_name: Nama file asli untuk metadata
+            first_position: Posisi chunk pertama dokumen ini di self.documents
+            pages: Halaman dalam batch
+            chunker: Chunker dokumen (lihat _create_chunker)
+            final: True untuk batch terakhir; sisa teks di chunker ikut dikeluarkan
+        
+        Returns:
+            Jumlah halaman yang diproses
+        """
+        with span("rag.ingest.split"):
+            text_chunks = [
+                chunk
+                for page in pages
+                for chunk in chunker.add_page(page.page_content, page.metadata["page"])
+            ]
+            if final:
+                text_chunks += chunker.finish()
+        
+        start_index = len(self.documents) - first_position
+        chunks = []
+        for i, chunk in enumerate(text_chunks):
+            page_label = str(chunk.page_start + 1)
+            if chunk.page_end != chunk.page_start:
+                page_label += f"-{chunk.page_end + 1}"
+            chunks.append(Document(
+                page_content=chunk.text,
+                metadata={
+                    "source": file_name,
+                    "page": chunk.page_start,
+                    "page_end": chunk.page_end,
+                    "page_label": page_label,
+                    "total_pages": self.total_pages,
+                    "char_start": chunk.char_start,
+                    "char_end": chunk.char_end,
+                    "document_id": document_id,
+                    "chunk_index": start_index + i,
+                    "chunk_id": f"{document_id}-{start_index + i}",
+                }
+            ))
+        
+        # Embed chunk secara paralel dalam batch
+        with span("rag.ingest.embed"):
+            vectors = embed_in_batches(
+                self.embeddings,
+                [chunk.page_content for chunk in chunks],
+                batch_size=self.embed_batch_size,
+                max_workers=self.embed_workers,
+                rate_limiter=self.rate_limiter
+            )
+        with span("rag.ingest.index"):
+            with self.index_store.key_lock(self.collection_key):
+                self._add_embedded_chunks(chunks, vectors)
+            self.documents.extend(chunks)
+            # Index leksikal ditambahkan setelah documents agar id BM25 selalu valid
+            self.lexical_index.add(chunk.page_content for chunk in chunks)
+        self.pages_indexed += len(pages)
+        
+        # Retriever dibuat setelah batch pertama agar query bisa langsung dilakukan
+        if self.retriever is None and chunks:
+            self.retriever = self._build_retriever()
+        
+        return len(pages)
+    
+    def _add_embedded_chunks(self, chunks: List[Document], vectors: List[List[float]]):
+        """Masukkan chunk beserta vektor yang sudah dihitung ke vector store, sesuai urutan"""
+        # Chroma membatasi jumlah item per panggilan add
+        insert_batch = 1000
+        for start in range(0, len(chunks), insert_batch):
+            batch = chunks[start:start + insert_batch]
+            self.vectorstore._collection.add(
+                ids=[chunk.metadata["chunk_id"] for chunk in batch],
+                embeddings=vectors[start:start + insert_batch],
+                documents=[chunk.page_content for chunk in batch],
+                metadatas=[chunk.metadata for chunk in batch]
+            )
+    
+    def _answer_cache_key(self, document_ids: List[str]) -> str:
+        """Key cache jawaban: dokumen dalam cakupan + parameter index, model chat, prompt dan retrieval"""
+        settings = json.dumps({
+            "index": self._params(),
+            "chat_model": self.chat_model,
+            "prompt": QA_PROMPT,
+            "retrieval": [self.retrieval_k, self.fetch_k, self.vector_weight,
+                          self.lexical_weight, self.rrf_k, self.lexical_min_ratio],
+        }, sort_keys=True)
+        return f"{text_hash(settings)}:{text_hash(','.join(sorted(document_ids)))}"
+    
+    @traced("rag.query.prepare")
+    def _prepare_query(self, question: str, use_cache: bool, document_ids: Optional[List[str]]) -> tuple:
+        """
+        Bagian sinkron query: cakupan dokumen, cache jawaban dan retrieval
+        
+        Returns:
+            tuple: (answer, sources, prompt, save_answer). Jika prompt None,
+            answer adalah jawaban final (dari cache atau pesan error); jika
+            tidak, jawaban LLM untuk prompt diserahkan ke save_answer.
+        """
+        with self._mark_busy():
+            self.last_answer_cached = False
+            self._rehydrate()
+            if not self.retriever:
+                return "Silakan upload dokumen terlebih dahulu.", [], None, None
+            
+            if document_ids is None:
+                retriever = self.retriever
+                scope = list(self.catalog)
+            else:
+                scope = [document_id for document_id in document_ids if document_id in self.catalog]
+                if not scope:
+                    return "Pilih minimal satu dokumen untuk ditanyakan.", [], None, None
+                retriever = self._build_retriever(scope)
+            
+            # Cache jawaban hanya dipakai setelah index selesai dibangun
+            answer_cache = self.answer_cache if not self.indexing else None
+            question_vector = None
+            if answer_cache is not None:
+                try:
+                    with span("rag.query.embed"):
+                        question_vector = self.embeddings.embed_query(question)
+                except Exception:
+                    answer_cache = None
+            
+            if answer_cache is not None:
+                if use_cache:
+                    with span("rag.query.cache"):
+                        cached = answer_cache.get(self._answer_cache_key(scope), question, question_vector)
+                    if cached is not None:
+                        self.last_answer_cached = True
+                        return cached["answer"], cached["sources"], None, None
+                else:
+                    answer_cache.record_bypass()
+            
+            try:
+                with span("rag.query.retrieve"):
+                    source_documents = retriever.invoke(question)
+            except Exception as e:
+                return f"Error saat memproses pertanyaan: {str(e)}", [], None, None
+            
+            # Dapatkan dokumen sumber
+            sources = []
+            for doc in source_documents:
+                page_num = doc.metadata.get("page", "Unknown")
+                sources.append({
+                    "source": doc.metadata.get("source"),
+                    "document_id": doc.metadata.get("document_id"),
+                    "page": page_num,
+                    "page_end": doc.metadata.get("page_end", page_num),
+                    "content": doc.page_content[:200] + "..."
+                })
             
-            # Buat QA chain
-            self.qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.vectorstore.as_retriever(
-                    search_kwargs={"k": 3}
-                ),
-                return_source_documents=True
+            prompt = QA_PROMPT.format(
+                context="\n\n".join(doc.page_content for doc in source_documents),
+                question=question
             )
+            cache_key = self._answer_cache_key(scope)
             
-            num_pages = len(documents)
-            num_chunks = len(self.documents)
+            def save_answer(answer: str):
+                # Hanya jawaban lengkap tanpa error yang disimpan ke cache
+                if answer_cache is not None and answer:
+                    answer_cache.put(cache_key, question, question_vector, answer, sources)
             
-            return True, f"Berhasil memproses {num_pages} halaman menjadi {num_chunks} bagian.", num_pages
+            return None, sources, prompt, save_answer
+    
+    def stream_query(self, question: str, use_cache: bool = True, document_ids: Optional[List[str]] = None):
+        """
+        Query dokumen dengan jawaban streaming
+        
+        Retrieval dijalankan langsung; jawaban LLM baru dibuat saat iterator
+        token dikonsumsi. Jika cache jawaban aktif dan pertanyaan yang mirip
+        sudah pernah dijawab, jawaban dan sumbernya dikembalikan dari cache.
+        
+        Args:
+            question: Pertanyaan user
+            use_cache: False untuk melewati cache jawaban (jawaban baru tetap disimpan)
+            document_ids: Batasi pencarian ke dokumen tertentu (None = semua dokumen)
             
-        except Exception as e:
-            return False, f"Error saat memproses PDF: {str(e)}", 0
+        Returns:
+            tuple: (tokens: iterator str, sources: list)
+        """
+        answer, sources, prompt, save_answer = self._prepare_query(question, use_cache, document_ids)
+        if prompt is None:
+            return iter([answer]), sources
+        
+        def tokens():
+            parts = []
+            timer = StreamTimer("rag.query.generate")
+            with self._mark_busy():
+                try:
+                    for chunk in self.llm.stream(prompt):
+                        text = message_text(chunk.content)
+                        if text:
+                            timer.token()
+                            parts.append(text)
+                            yield text
+                except Exception as e:
+                    timer.finish(error=True)
+                    yield f"Error saat memproses pertanyaan: {str(e)}"
+                    return
+            timer.finish()
+            save_answer("".join(parts))
+        
+        return tokens(), sources
     
-    def query(self, question: str):
+    async def astream_query(self, question: str, use_cache: bool = True, document_ids: Optional[List[str]] = None):
+        """
+        Versi async stream_query untuk event loop bersama (lihat engine.py)
+        
+        Retrieval dan embedding pertanyaan berjalan di thread agar tidak
+        menahan event loop; token LLM di-stream secara async.
+        
+        Returns:
+            tuple: (tokens: async iterator str, sources: list)
+        """
+        answer, sources, prompt, save_answer = await asyncio.to_thread(
+            self._prepare_query, question, use_cache, document_ids
+        )
+        
+        async def tokens():
+            if prompt is None:
+                yield answer
+                return
+            parts = []
+            timer = StreamTimer("rag.query.generate")
+            with self._mark_busy():
+                try:
+                    async for chunk in self.llm.astream(prompt):
+                        text = message_text(chunk.content)
+                        if text:
+                            timer.token()
+                            parts.append(text)
+                            yield text
+                except Exception as e:
+                    timer.finish(error=True)
+                    yield f"Error saat memproses pertanyaan: {str(e)}"
+                    return
+            timer.finish()
+            save_answer("".join(parts))
+        
+        return tokens(), sources
+    
+    def query(self, question: str, document_ids: Optional[List[str]] = None):
         """
         Query dokumen
         
         Args:
             question: Pertanyaan user
+            document_ids: Batasi pencarian ke dokumen tertentu (None = semua dokumen)
             
         Returns:
             tuple: (answer: str, sources: list)
         """
-        if not self.qa_chain:
-            return "Silakan upload dokumen terlebih dahulu.", []
-        
-        try:
-            result = self.qa_chain({"query": question})
-            answer = result["result"]
-            
-            # Dapatkan dokumen sumber
-            sources = []
-            if "source_documents" in result:
-                for doc in result["source_documents"]:
-                    page_num = doc.metadata.get("page", "Unknown")
-                    sources.append({
-                        "page": page_num,
-                        "content": doc.page_content[:200] + "..."
-                    })
-            
-            return answer, sources
-            
-        except Exception as e:
-            return f"Error saat memproses pertanyaan: {str(e)}", []
+        tokens, sources = self.stream_query(question, document_ids=document_ids)
+        return "".join(tokens), sources
     
-    def get_document_summary(self):
+    def _document_texts(self, document_id: str) -> List[str]:
+        """Teks semua chunk satu dokumen sesuai urutan"""
+        start, end = self.document_positions[document_id]
+        return [doc.page_content for doc in self.documents[start:end] if doc is not None]
+    
+    def get_document_summary(self, document_id: Optional[str] = None):
         """
-        Dapatkan ringkasan dokumen yang dimuat
+        Dapatkan ringkasan satu dokumen di koleksi (map-reduce atas seluruh isi)
+        
+        Args:
+            document_id: Id dokumen (default: dokumen yang terakhir dimuat)
         
         Returns:
             str: Ringkasan dokumen
         """
-        if not self.documents:
-            return "Belum ada dokumen yang dimuat."
+        document_id = document_id or self.document_hash
+        with self._mark_busy():
+            self._rehydrate()
+            if document_id not in self.document_positions:
+                return "Belum ada dokumen yang dimuat."
+            texts = self._document_texts(document_id)
         
         try:
-            # Ambil beberapa chunk pertama untuk konteks
-            context = "\n\n".join([doc.page_content for doc in self.documents[:3]])
-            
-            prompt = f"""
-            Berdasarkan teks berikut, buatlah ringkasan singkat tentang isi dokumen:
-            
-            {context}
-            
-            Ringkasan (maksimal 3-4 kalimat):
-            """
-            
-            response = self.llm.invoke(prompt)
-            return response.content
-            
+            with span("rag.summary"):
+                return self.summarizer.summarize(document_id, texts)
         except Exception as e:
             return f"Error membuat ringkasan: {str(e)}"
     
+    @property
+    def summarizer(self) -> DocumentSummarizer:
+        """Mesin ringkasan; jika tidak diberikan, dibuat saat pertama dipakai"""
+        with self._summarizer_lock:
+            if self._summarizer is None:
+                self._summarizer = DocumentSummarizer(self.llm)
+            return self._summarizer
+    
+    def get_cached_summary(self, document_id: str) -> Optional[str]:
+        """Ringkasan dokumen yang sudah pernah dibuat, tanpa memanggil LLM"""
+        try:
+            return self.summarizer.cached(document_id)
+        except Exception:
+            return None
+    
+    def summarize_in_background(self, document_id: Optional[str] = None) -> Optional[Future]:
+        """
+        Buat ringkasan dokumen di latar belakang; Q&A tetap bisa dipakai
+        
+        Args:
+            document_id: Id dokumen (default: dokumen yang terakhir dimuat)
+            
+        Returns:
+            Future berisi ringkasan, atau None jika dokumen tidak ada di koleksi
+        """
+        document_id = document_id or self.document_hash
+        with self._mark_busy():
+            self._rehydrate()
+            if document_id not in self.document_positions:
+                return None
+            texts = self._document_texts(document_id)
+        return self.summarizer.summarize_in_background(document_id, texts)
+    
     def cleanup(self):
-        """Bersihkan file sementara"""
-        if self.temp_dir and os.path.exists(self.temp_dir):
-            try:
-                shutil.rmtree(self.temp_dir)
-            except:
-                pass
+        """Lepas index yang sedang dipakai; index koleksi sekali pakai ikut dihapus"""
+        self._release_index()
+        if self.anonymous:
+            self.index_store.remove(self.collection_key)
+        # Summarizer bersama milik pemanggil; hanya yang dibuat sendiri yang ditutup
+        if self._owns_summarizer:
+            with self._summarizer_lock:
+                summarizer, self._summarizer = self._summarizer, None
+            if summarizer is not None:
+                summarizer.close()
     
     def __del__(self):
         """Destructor untuk cleanup"""
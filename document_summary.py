@@ -0,0 +1,255 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : document_summary.py
+# Deskripsi    : Ringkasan dokumen map-reduce atas seluruh isi PDF. Kelompok
+#                chunk diringkas paralel, lalu digabung bertingkat menjadi
+#                satu ringkasan akhir yang di-cache berdasarkan hash dokumen.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Map: chunk dikelompokkan hingga group_chars karakter, tiap kelompok
+#   diringkas di thread pool berukuran tetap
+# - Reduce: ringkasan parsial dikelompokkan dan diringkas lagi sampai muat
+#   dalam satu prompt, lalu dibuat ringkasan akhir
+# - Dokumen kecil (muat dalam satu kelompok) cukup satu panggilan LLM
+# - Hasil disimpan di SQLite (summary_cache.db); ringkasan dokumen yang sama
+#   yang sedang berjalan tidak dijalankan dua kali
+#
+# ============================================================================
+
+"""
+Modul ringkasan dokumen map-reduce
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+import hashlib
+import json
+import threading
+import time
+
+from database import ConnectionPool
+from llm_utils import message_text
+
+MAP_PROMPT = """Ringkas bagian dokumen berikut dalam beberapa poin singkat.
+Pertahankan fakta penting seperti nama, angka, tanggal dan istilah kunci.
+
+{text}
+
+Ringkasan bagian:"""
+
+COMBINE_PROMPT = """Berikut ringkasan beberapa bagian berurutan dari satu dokumen.
+Gabungkan menjadi beberapa poin singkat tanpa mengulang informasi yang sama.
+
+{text}
+
+Ringkasan gabungan:"""
+
+REDUCE_PROMPT = """Berikut ringkasan seluruh bagian sebuah dokumen secara berurutan.
+Buatlah ringkasan singkat tentang isi dokumen secara keseluruhan.
+
+{text}
+
+Ringkasan (maksimal 3-4 kalimat):"""
+
+DIRECT_PROMPT = """Berdasarkan teks berikut, buatlah ringkasan singkat tentang isi dokumen:
+
+{text}
+
+Ringkasan (maksimal 3-4 kalimat):"""
+
+
+class SummaryCache:
+    """Penyimpanan ringkasan dokumen persisten berbasis SQLite"""
+    
+    def __init__(self, db_path: str = "summary_cache.db"):
+        """
+        Inisialisasi cache ringkasan
+        
+        Args:
+            db_path: Path file database SQLite untuk cache
+        """
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
+        with self.pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    cache_key TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+    
+    def get(self, cache_key: str) -> Optional[str]:
+        """Ambil ringkasan dari cache, None jika belum ada"""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT summary FROM summaries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return row["summary"] if row else None
+    
+    def put(self, cache_key: str, summary: str):
+        """Simpan ringkasan ke cache"""
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (cache_key, summary, created_at) VALUES (?, ?, ?)",
+                (cache_key, summary, time.time())
+            )
+    
+    def close(self):
+        """Tutup koneksi cache"""
+        self.pool.close()
+
+
+class DocumentSummarizer:
+    """Mesin ringkasan map-reduce dengan thread pool terbatas, dipakai bersama antar sesi"""
+    
+    def __init__(
+        self,
+        llm,
+        cache: Optional[SummaryCache] = None,
+        group_chars: int = 12000,
+        max_workers: int = 4,
+        max_levels: int = 5
+    ):
+        """
+        Inisialisasi mesin ringkasan
+        
+        Args:
+            llm: Model chat LangChain untuk membuat ringkasan
+            cache: Cache ringkasan (default: summary_cache.db)
+            group_chars: Panjang maksimum teks per panggilan LLM (karakter)
+            max_workers: Jumlah panggilan LLM yang berjalan bersamaan
+            max_levels: Batas tingkat penggabungan ringkasan parsial
+        """
+        self.llm = llm
+        self._owns_cache = cache is None
+        self.cache = cache or SummaryCache()
+        self.group_chars = group_chars
+        self.max_workers = max_workers
+        self.max_levels = max_levels
+        self.llm_calls = 0
+        # Dua executor terpisah: tugas ringkasan menunggu hasil panggilan LLM,
+        # sehingga keduanya tidak boleh berbagi pool yang sama
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary-llm")
+        self._jobs_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary-job")
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def cache_key(self, document_id: str) -> str:
+        """Key cache: hash dokumen + model + prompt + ukuran kelompok"""
+        params = json.dumps({
+            "document_id": document_id,
+            "model": getattr(self.llm, "model", type(self.llm).__name__),
+            "prompts": [MAP_PROMPT, COMBINE_PROMPT, REDUCE_PROMPT, DIRECT_PROMPT],
+            "group_chars": self.group_chars,
+        }, sort_keys=True)
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()
+    
+    def cached(self, document_id: str) -> Optional[str]:
+        """Ringkasan yang sudah ada di cache, tanpa memanggil LLM"""
+        return self.cache.get(self.cache_key(document_id))
+    
+    def _group(self, texts: List[str]) -> List[str]:
+        """Gabungkan teks berurutan menjadi kelompok dengan panjang <= group_chars"""
+        groups, current, length = [], [], 0
+        for text in texts:
+            if current and length + len(text) > self.group_chars:
+                groups.append("\n\n".join(current))
+                current, length = [], 0
+            current.append(text)
+            length += len(text) + 2
+        if current:
+            groups.append("\n\n".join(current))
+        return groups
+    
+    def _call(self, prompt: str) -> str:
+        with self._lock:
+            self.llm_calls += 1
+        return message_text(self.llm.invoke(prompt).content).strip()
+    
+    def summarize_texts(self, texts: List[str]) -> str:
+        """
+        Ringkas teks berurutan (chunk dokumen) dengan map-reduce bertingkat
+        
+        Args:
+            texts: Teks chunk sesuai urutan dokumen
+            
+        Returns:
+            Ringkasan akhir
+        """
+        groups = self._group([text for text in texts if text.strip()])
+        if not groups:
+            return ""
+        
+        level = 0
+        while len(groups) > 1 and level < self.max_levels:
+            template = MAP_PROMPT if level == 0 else COMBINE_PROMPT
+            # Urutan hasil dijaga agar ringkasan mengikuti alur dokumen
+            partials = list(self._executor.map(
+                lambda group: self._call(template.format(text=group)), groups
+            ))
+            groups = self._group(partials)
+            level += 1
+        
+        # Jika batas tingkat tercapai, sisa ringkasan parsial dipotong agar muat satu prompt
+        text = "\n\n".join(groups)[:self.group_chars] if len(groups) > 1 else groups[0]
+        template = DIRECT_PROMPT if level == 0 else REDUCE_PROMPT
+        return self._call(template.format(text=text))
+    
+    def summarize(self, document_id: str, texts: List[str]) -> str:
+        """
+        Ringkasan dokumen, dari cache jika sudah pernah dibuat
+        
+        Args:
+            document_id: Hash dokumen
+            texts: Teks chunk dokumen sesuai urutan
+            
+        Returns:
+            Ringkasan dokumen
+        """
+        cache_key = self.cache_key(document_id)
+        summary = self.cache.get(cache_key)
+        if summary is None:
+            summary = self.summarize_texts(texts)
+            self.cache.put(cache_key, summary)
+        return summary
+    
+    def summarize_in_background(self, document_id: str, texts: List[str]) -> Future:
+        """
+        Jalankan summarize di thread latar
+        
+        Permintaan untuk dokumen yang ringkasannya sedang dibuat memakai
+        Future yang sama.
+        
+        Args:
+            document_id: Hash dokumen
+            texts: Teks chunk dokumen sesuai urutan
+            
+        Returns:
+            Future berisi ringkasan
+        """
+        with self._lock:
+            job = self._jobs.get(document_id)
+            if job is not None and not job.done():
+                return job
+            job = self._jobs_executor.submit(self.summarize, document_id, list(texts))
+            self._jobs[document_id] = job
+        
+        def forget(done_job: Future):
+            with self._lock:
+                if self._jobs.get(document_id) is done_job:
+                    del self._jobs[document_id]
+        
+        job.add_done_callback(forget)
+        return job
+    
+    def close(self):
+        """Hentikan thread pool (tugas yang belum mulai dibatalkan) dan tutup cache milik sendiri"""
+        self._jobs_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_cache:
+            self.cache.close()
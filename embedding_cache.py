@@ -0,0 +1,243 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : embedding_cache.py
+# Deskripsi    : Cache embedding per chunk berbasis SQLite. Membungkus model
+#                embedding agar teks yang sama tidak dikirim ulang ke API.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Key cache: (nama model embedding, sha256(teks chunk)); embedding query
+#   disimpan terpisah dari embedding dokumen
+# - Vektor disimpan sebagai float32 dalam kolom BLOB
+# - Eviction LRU berdasarkan waktu pemakaian terakhir saat melewati batas entri;
+#   jumlah baris dilacak di memori sehingga penulisan tidak menghitung ulang
+#   seluruh tabel (COUNT(*) hanya saat batas terlewati)
+#
+# ============================================================================
+
+"""
+Modul cache embedding
+Menyimpan hasil embedding per chunk agar dapat dipakai ulang antar dokumen
+"""
+
+from langchain_core.embeddings import Embeddings
+from array import array
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import threading
+import time
+
+from database import ConnectionPool
+
+
+def text_hash(text: str) -> str:
+    """Hash SHA-256 dari teks chunk"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Penyimpanan embedding persisten berbasis SQLite"""
+    
+    def __init__(self, db_path: str = "embedding_cache.db", max_entries: int = 200000):
+        """
+        Inisialisasi cache embedding
+        
+        Args:
+            db_path: Path file database SQLite untuk cache
+            max_entries: Jumlah maksimum embedding yang disimpan sebelum eviction
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.pool = ConnectionPool(db_path)
+        # Perkiraan jumlah baris (batas atas; None = belum dihitung). Dikoreksi
+        # dengan COUNT(*) setiap kali melewati max_entries
+        self._row_count: Optional[int] = None
+        self._count_lock = threading.Lock()
+        self.init_database()
+    
+    def init_database(self):
+        """Buat tabel cache jika belum ada"""
+        with self.pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_embeddings_last_used
+                ON embeddings (last_used)
+            """)
+    
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Ambil embedding yang tersedia di cache
+        
+        Args:
+            model: Nama model embedding
+            hashes: List hash teks
+            
+        Returns:
+            Dictionary hash -> vektor untuk hash yang ditemukan
+        """
+        found = {}
+        now = time.time()
+        
+        with self.pool.connection() as conn:
+            # Batasi jumlah parameter per query (batas SQLITE_MAX_VARIABLE_NUMBER)
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for row in rows:
+                    vector = array("f")
+                    vector.frombytes(row["vector"])
+                    found[row["text_hash"]] = vector.tolist()
+            
+            if found:
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found]
+                )
+        
+        return found
+    
+    def put_many(self, model: str, items: List[Tuple[str, List[float]]]):
+        """
+        Simpan embedding ke cache
+        
+        Args:
+            model: Nama model embedding
+            items: List (hash teks, vektor)
+        """
+        if not items:
+            return
+        
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(model, h, array("f", vector).tobytes(), now) for h, vector in items]
+            )
+        
+        with self._count_lock:
+            if self._row_count is None:
+                self._row_count = self.count()
+            else:
+                # Baris yang diganti (REPLACE) ikut terhitung; dikoreksi saat evict()
+                self._row_count += len(items)
+            over_limit = self._row_count > self.max_entries
+        if over_limit:
+            self.evict()
+    
+    def count(self) -> int:
+        """Jumlah embedding yang tersimpan"""
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    
+    def evict(self):
+        """Hapus embedding yang paling lama tidak dipakai jika melewati batas"""
+        with self.pool.connection() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            excess = total - self.max_entries
+            with self._count_lock:
+                self._row_count = total - max(excess, 0)
+            if excess <= 0:
+                return
+            
+            conn.execute(
+                """
+                DELETE FROM embeddings WHERE (model, text_hash) IN (
+                    SELECT model, text_hash FROM embeddings
+                    ORDER BY last_used ASC
+                    LIMIT ?
+                )
+                """,
+                (excess,)
+            )
+    
+    def close(self):
+        """Tutup koneksi cache"""
+        self.pool.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Pembungkus model embedding: hanya teks yang belum ada di cache dikirim ke API"""
+    
+    def __init__(self, backend: Embeddings, model_name: str, cache: Optional[EmbeddingCache] = None):
+        """
+        Inisialisasi embeddings dengan cache
+        
+        Args:
+            backend: Model embedding asli (mis. GoogleGenerativeAIEmbeddings)
+            model_name: Nama model, bagian dari key cache
+            cache: Penyimpanan cache (default: embedding_cache.db)
+        """
+        self.backend = backend
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed list teks, memakai cache untuk teks yang sudah pernah di-embed"""
+        hashes = [text_hash(text) for text in texts]
+        cached = self.cache.get_many(self.model_name, list(set(hashes)))
+        
+        # Teks identik dalam satu panggilan cukup di-embed sekali
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = text
+        
+        if missing:
+            vectors = self.backend.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, new_items)
+            cached.update(new_items)
+        
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        
+        return [cached[h] for h in hashes]
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed satu teks query, memakai cache jika tersedia"""
+        # Embedding query bisa berbeda dari embedding dokumen (task type berbeda),
+        # jadi disimpan dengan key model terpisah
+        model = f"{self.model_name}#query"
+        h = text_hash(text)
+        cached = self.cache.get_many(model, [h])
+        if h in cached:
+            with self._lock:
+                self.hits += 1
+            return cached[h]
+        
+        vector = self.backend.embed_query(text)
+        self.cache.put_many(model, [(h, vector)])
+        with self._lock:
+            self.misses += 1
+        return vector
+    
+    def stats(self) -> Dict:
+        """Statistik cache: hits, misses dan hit rate"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,320 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : engine.py
+# Deskripsi    : Engine async untuk chat dan dokumen yang tidak bergantung pada
+#                Streamlit, dipakai oleh app.py, load generator maupun batch job.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - ChatEngine: bangun pesan dari ConversationContext, stream jawaban agent
+#   LangGraph dan simpan riwayat ke ChatbotDatabase
+# - DocumentEngine: sesi DocumentRAG di DocumentRAGRegistry, ingestion lewat
+#   IngestionJobRunner dan query streaming
+# - Semua method I/O berbentuk async sehingga banyak percakapan bisa berbagi
+#   satu event loop; pemanggilan yang masih sinkron (SQLite, Chroma)
+#   dijalankan di thread dengan asyncio.to_thread
+# - Stack agent (LangChain/LangGraph) dan RAG (Chroma) baru diimpor saat
+#   pertama dipakai, sehingga mengimpor modul ini tetap murah
+# - EventLoopThread menjalankan satu event loop di thread latar agar script
+#   sinkron seperti Streamlit bisa memakai engine yang sama
+#
+# ============================================================================
+
+"""
+Modul engine async untuk chat dan dokumen
+"""
+
+from database import ChatbotDatabase
+from conversation_context import ConversationContext
+from client_pool import ClientPool
+from ingestion_jobs import IngestionJob, IngestionJobRunner
+from rag_registry import DocumentRAGRegistry
+from llm_utils import message_text
+from tracing import StreamTimer, span
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import threading
+
+if TYPE_CHECKING:
+    # document_rag membawa Chroma; modul ini dipakai juga oleh proses yang hanya chat
+    from document_rag import DocumentRAG
+
+SYSTEM_PROMPT = (
+    "You are a helpful, friendly assistant chatting with {username}. "
+    "Respond concisely and clearly in Indonesian when appropriate."
+)
+
+EMPTY_ANSWER = "Maaf, saya tidak bisa menghasilkan respons."
+
+
+class EventLoopThread:
+    """Event loop asyncio di thread daemon untuk dipakai dari kode sinkron"""
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="engine-loop", daemon=True)
+        self._thread.start()
+    
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """Jalankan coroutine di event loop dan tunggu hasilnya"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+    
+    def iterate(self, async_iterator: AsyncIterator):
+        """
+        Konsumsi async iterator dari kode sinkron
+        
+        Yields:
+            Item dari async_iterator, satu per satu
+        """
+        finished = False
+        try:
+            while True:
+                try:
+                    yield self.run(async_iterator.__anext__())
+                except StopAsyncIteration:
+                    finished = True
+                    return
+        finally:
+            # Iterator yang ditinggalkan di tengah jalan ditutup di event loop
+            if not finished and hasattr(async_iterator, "aclose"):
+                self.run(async_iterator.aclose())
+    
+    def stop(self):
+        """Hentikan event loop"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+class ChatEngine:
+    """Orkestrasi satu giliran chat: konteks, agent, streaming dan penyimpanan"""
+    
+    def __init__(
+        self,
+        db: ChatbotDatabase,
+        client_pool: ClientPool,
+        conversation_context: ConversationContext,
+        system_prompt: str = SYSTEM_PROMPT
+    ):
+        """
+        Inisialisasi engine chat
+        
+        Args:
+            db: Database riwayat chat
+            client_pool: Pool klien dan agent Gemini
+            conversation_context: Pembangun jendela konteks dengan ringkasan bergulir
+            system_prompt: Template system prompt (placeholder {username})
+        """
+        self.db = db
+        self.client_pool = client_pool
+        self.conversation_context = conversation_context
+        self.system_prompt = system_prompt
+    
+    async def history_page(self, user_id: int, before_id: Optional[int] = None, page_size: int = 50) -> List[Dict]:
+        """Satu halaman riwayat chat (lihat ChatbotDatabase.get_chat_history_page)"""
+        return await asyncio.to_thread(
+            self.db.get_chat_history_page, user_id, before_id=before_id, page_size=page_size
+        )
+    
+    async def stream_chat(
+        self,
+        user_id: int,
+        username: str,
+        prompt: str,
+        chat_model: str,
+        temperature: float = 0.7,
+        top_p: float = 0.95,
+        top_k: int = 20
+    ) -> AsyncIterator[str]:
+        """
+        Kirim pesan user dan stream jawaban agent
+        
+        Konteks disusun dari riwayat yang sudah tersimpan ditambah prompt di
+        memori, lalu pesan user diantrikan (write-behind) sebelum agent
+        dipanggil; jawaban lengkap (atau pesan error) disimpan setelah stream
+        selesai, lalu ringkasan percakapan lama diperbarui di latar belakang.
+        
+        Yields:
+            Potongan teks jawaban saat tiba
+        """
+        from langchain_core.messages import AIMessageChunk, SystemMessage
+        
+        parts = []
+        timer = None
+        prompt_queued = False
+        try:
+            agent = self.client_pool.get_agent(chat_model, temperature, top_p, top_k)
+            # Giliran terakhir dikirim utuh, percakapan lama diwakili ringkasan.
+            # Prompt diberikan dari memori lalu baru diantrikan, sehingga
+            # giliran ini tidak menunggu commit write-behind
+            messages = await asyncio.to_thread(self._build_messages, user_id, prompt)
+            # queue_message bisa memblokir saat antrean writer penuh: jalankan di
+            # thread agar stream lain di event loop bersama tidak ikut tertahan
+            await asyncio.to_thread(self.db.queue_message, user_id, "user", prompt)
+            prompt_queued = True
+            system_message = SystemMessage(content=self.system_prompt.format(username=username))
+            
+            timer = StreamTimer("chat.agent")
+            async for chunk, metadata in agent.astream(
+                {"messages": [system_message] + messages},
+                stream_mode="messages"
+            ):
+                if isinstance(chunk, AIMessageChunk):
+                    text = message_text(chunk.content)
+                    if text:
+                        timer.token()
+                        parts.append(text)
+                        yield text
+            timer.finish()
+            
+            if not parts:
+                parts.append(EMPTY_ANSWER)
+                yield EMPTY_ANSWER
+        except Exception as e:
+            if timer is not None:
+                timer.finish(error=True)
+            error = f"Terjadi kesalahan: {e}"
+            parts.append(error)
+            yield error
+        finally:
+            # Await di finally tetap aman saat stream ditutup (aclose); yield tidak
+            await asyncio.to_thread(
+                self._save_turn, user_id, None if prompt_queued else prompt, "".join(parts)
+            )
+    
+    def _save_turn(self, user_id: int, prompt: Optional[str], answer: str):
+        """Antrikan prompt (jika belum) dan jawaban, lalu perbarui ringkasan di latar"""
+        if prompt is not None:
+            self.db.queue_message(user_id, "user", prompt)
+        self.db.queue_message(user_id, "assistant", answer)
+        self.conversation_context.update_summary_in_background(user_id)
+    
+    def _build_messages(self, user_id: int, prompt: str) -> list:
+        with span("chat.context"):
+            return self.conversation_context.build_messages(user_id, prompt)
+    
+    async def chat(self, user_id: int, username: str, prompt: str, chat_model: str, **params) -> str:
+        """Satu giliran chat tanpa streaming; mengembalikan jawaban lengkap"""
+        return "".join([text async for text in self.stream_chat(user_id, username, prompt, chat_model, **params)])
+
+
+class DocumentEngine:
+    """Sesi DocumentRAG, ingestion dan query dokumen"""
+    
+    def __init__(
+        self,
+        registry: DocumentRAGRegistry,
+        ingestion_runner: IngestionJobRunner,
+        rag_factory: Callable[[str, str, str], "DocumentRAG"],
+        poll_interval: float = 0.2
+    ):
+        """
+        Inisialisasi engine dokumen
+        
+        Args:
+            registry: Registry instance DocumentRAG
+            ingestion_runner: Runner job ingestion latar belakang
+            rag_factory: Pembuat DocumentRAG baru dari (collection_id, chat_model, embedding_model)
+            poll_interval: Jarak pemeriksaan status job ingestion saat ditunggu (detik)
+        """
+        self.registry = registry
+        self.ingestion_runner = ingestion_runner
+        self.rag_factory = rag_factory
+        self.poll_interval = poll_interval
+    
+    async def open_session(self, session_key: str, collection_id: str, chat_model: str, embedding_model: str) -> "DocumentRAG":
+        """
+        Buka sesi dokumen; instance dibuat ulang jika koleksi atau model berubah
+        
+        Returns:
+            DocumentRAG dengan koleksi yang sudah dimuat
+        """
+        rag = await asyncio.to_thread(self.registry.get, session_key)
+        if rag is None or (rag.collection_id, rag.chat_model, rag.embedding_model) != (
+                collection_id, chat_model, embedding_model):
+            # Factory (import LangChain/Chroma, klien) dan register (cleanup
+            # instance lama) berjalan di thread agar tidak menahan event loop
+            rag = await asyncio.to_thread(self.rag_factory, collection_id, chat_model, embedding_model)
+            rag = await asyncio.to_thread(self.registry.register, session_key, rag)
+        await asyncio.to_thread(rag.open_collection)
+        return rag
+    
+    def session(self, session_key: str) -> Optional["DocumentRAG"]:
+        """Instance sesi tanpa memuat ulang koleksi yang sudah di-spill"""
+        return self.registry.peek(session_key)
+    
+    def close_session(self, session_key: str, job_ids: Optional[List[str]] = None):
+        """Batalkan job ingestion sesi, lalu lepas instance-nya dari registry"""
+        for job_id in job_ids or []:
+            self.ingestion_runner.cancel(job_id)
+            job = self.ingestion_runner.get(job_id)
+            if job is not None:
+                job.wait(timeout=10.0)
+        self.registry.discard(session_key)
+    
+    def _require(self, session_key: str) -> "DocumentRAG":
+        rag = self.registry.peek(session_key)
+        if rag is None:
+            raise KeyError(f"Sesi dokumen tidak ditemukan: {session_key}")
+        return rag
+    
+    def submit(self, session_key: str, uploaded_file) -> IngestionJob:
+        """Jadwalkan ingestion file ke koleksi sesi (tidak menunggu)"""
+        return self.ingestion_runner.submit(self._require(session_key), uploaded_file)
+    
+    def job(self, job_id: str) -> Optional[IngestionJob]:
+        """Status job ingestion"""
+        return self.ingestion_runner.get(job_id)
+    
+    def cancel(self, job_id: str) -> bool:
+        """Minta job ingestion dibatalkan"""
+        return self.ingestion_runner.cancel(job_id)
+    
+    async def ingest(self, session_key: str, uploaded_file) -> tuple:
+        """
+        Ingestion file dan tunggu sampai selesai
+        
+        Returns:
+            tuple: (success: bool, message: str, num_pages: int)
+        """
+        job = self.submit(session_key, uploaded_file)
+        while not job.finished:
+            await asyncio.sleep(self.poll_interval)
+        return job.result
+    
+    async def stream_query(
+        self,
+        session_key: str,
+        question: str,
+        use_cache: bool = True,
+        document_ids: Optional[List[str]] = None
+    ) -> tuple:
+        """
+        Query koleksi sesi dengan jawaban streaming
+        
+        Returns:
+            tuple: (tokens: async iterator str, sources: list, cached: bool)
+        """
+        rag = self._require(session_key)
+        tokens, sources = await rag.astream_query(question, use_cache=use_cache, document_ids=document_ids)
+        return tokens, sources, rag.last_answer_cached
+    
+    async def query(self, session_key: str, question: str, **params) -> tuple:
+        """
+        Query koleksi sesi tanpa streaming
+        
+        Returns:
+            tuple: (answer: str, sources: list)
+        """
+        tokens, sources, _ = await self.stream_query(session_key, question, **params)
+        return "".join([text async for text in tokens]), sources
+    
+    async def remove_document(self, session_key: str, document_id: str) -> bool:
+        """Hapus satu dokumen dari koleksi sesi"""
+        return await asyncio.to_thread(self._require(session_key).remove_document, document_id)
+    
+    async def summarize(self, session_key: str, document_id: Optional[str] = None) -> str:
+        """Ringkasan satu dokumen di koleksi sesi"""
+        return await asyncio.to_thread(self._require(session_key).get_document_summary, document_id)
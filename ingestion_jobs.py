@@ -0,0 +1,187 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : ingestion_jobs.py
+# Deskripsi    : Runner job ingestion dokumen di latar belakang dengan id job,
+#                progres, pembatalan dan deduplikasi antar sesi.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Job berjalan di thread pool milik proses, bukan di script Streamlit,
+#   sehingga tetap berjalan walaupun halaman di-rerun atau ditinggalkan
+# - File yang sama untuk koleksi yang sama memakai job yang sudah berjalan
+# - File yang sama untuk koleksi berbeda dijalankan bergantian, sehingga job
+#   kedua memakai embedding yang sudah di-cache job pertama
+# - Pembatalan diperiksa setiap batch halaman; chunk yang sudah masuk dibuang
+#
+# ============================================================================
+
+"""
+Modul runner job ingestion dokumen
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import hashlib
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class IngestionJob:
+    """Status satu job ingestion dokumen"""
+    
+    def __init__(self, collection_key: str, document_id: str, file_name: str):
+        self.job_id = uuid.uuid4().hex
+        self.collection_key = collection_key
+        self.document_id = document_id
+        self.file_name = file_name
+        self.status = QUEUED
+        self.pages_indexed = 0
+        self.total_pages = 0
+        self.chunks_per_sec = 0.0
+        # (success, message, num_pages) seperti DocumentRAG.load_pdf
+        self.result: Optional[tuple] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+    
+    @property
+    def finished(self) -> bool:
+        """True jika job sudah selesai, gagal atau dibatalkan"""
+        return self.status in (DONE, FAILED, CANCELLED)
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Tunggu job selesai; False jika timeout"""
+        return self.done_event.wait(timeout)
+
+
+class IngestionJobRunner:
+    """Thread pool untuk job ingestion DocumentRAG, dipakai bersama oleh semua sesi"""
+    
+    def __init__(self, max_workers: int = 2, max_finished_jobs: int = 200):
+        """
+        Inisialisasi runner
+        
+        Args:
+            max_workers: Jumlah ingestion yang berjalan bersamaan
+            max_finished_jobs: Jumlah job selesai yang statusnya tetap disimpan
+        """
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        # (collection_key, document_id) -> job yang belum selesai
+        self._active: Dict[tuple, IngestionJob] = {}
+        self._document_locks: Dict[str, threading.Lock] = {}
+        self._collection_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+    
+    def _key_lock(self, locks: Dict[str, threading.Lock], key: str) -> threading.Lock:
+        with self._lock:
+            return locks.setdefault(key, threading.Lock())
+    
+    def submit(self, rag, uploaded_file) -> IngestionJob:
+        """
+        Jadwalkan ingestion file ke koleksi DocumentRAG
+        
+        Args:
+            rag: Instance DocumentRAG tujuan
+            uploaded_file: Objek file yang diupload dari Streamlit
+            
+        Returns:
+            Job baru, atau job yang sudah berjalan untuk file dan koleksi yang sama
+        """
+        document_id = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        active_key = (rag.collection_key, document_id)
+        
+        with self._lock:
+            job = self._active.get(active_key)
+            if job is not None:
+                return job
+            
+            job = IngestionJob(rag.collection_key, document_id, uploaded_file.name)
+            self._active[active_key] = job
+            self._jobs[job.job_id] = job
+            self._prune_finished()
+        
+        self._executor.submit(self._run, job, rag, uploaded_file)
+        return job
+    
+    def _prune_finished(self):
+        """Buang status job selesai yang paling lama (dipanggil di dalam lock)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+    
+    def _run(self, job: IngestionJob, rag, uploaded_file):
+        """Jalankan satu job di thread pool"""
+        try:
+            # Urutan lock selalu dokumen -> koleksi agar tidak terjadi deadlock
+            with self._key_lock(self._document_locks, job.document_id), \
+                    self._key_lock(self._collection_locks, job.collection_key):
+                if job.cancel_event.is_set():
+                    job.result = (False, "Dibatalkan.", 0)
+                    job.status = CANCELLED
+                    return
+                
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.result = self._ingest(job, rag, uploaded_file)
+                if job.status != CANCELLED:
+                    job.status = DONE if job.result[0] else FAILED
+        except Exception as e:
+            job.result = (False, f"Error saat memproses PDF: {str(e)}", 0)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active.pop((job.collection_key, job.document_id), None)
+            job.done_event.set()
+    
+    def _ingest(self, job: IngestionJob, rag, uploaded_file) -> tuple:
+        """Konsumsi iter_load_pdf sambil memperbarui progres dan memeriksa pembatalan"""
+        stream = rag.iter_load_pdf(uploaded_file)
+        while True:
+            if job.cancel_event.is_set():
+                # Menutup generator membuang chunk dokumen yang sudah masuk
+                stream.close()
+                job.status = CANCELLED
+                return False, "Dibatalkan.", job.pages_indexed
+            try:
+                job.pages_indexed, job.total_pages, job.chunks_per_sec = next(stream)
+            except StopIteration as stop:
+                return stop.value
+    
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Cari job berdasarkan id"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Minta job dibatalkan
+        
+        Returns:
+            True jika job ada dan belum selesai
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_event.set()
+        return True
+    
+    def jobs_for(self, collection_key: str) -> List[IngestionJob]:
+        """Semua job (aktif dan yang baru selesai) untuk satu koleksi, urut waktu dibuat"""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.collection_key == collection_key]
@@ -0,0 +1,224 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : lexical_index.py
+# Deskripsi    : Index leksikal BM25 di memori untuk chunk dokumen, serta
+#                penggabungan peringkat dengan reciprocal rank fusion (RRF).
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Inverted index: term -> posting list (id chunk, frekuensi term) yang
+#   disimpan dalam array bertipe (4 byte per angka), bukan list objek Python
+# - Chunk bisa ditambahkan bertahap selama ingestion; pencarian aman
+#   dijalankan bersamaan dari thread lain
+# - Id chunk = urutan chunk saat ditambahkan; chunk yang dihapus hanya
+#   ditandai (tombstone) sehingga id chunk lain tidak bergeser
+#
+# ============================================================================
+
+"""
+Modul index leksikal BM25 dan reciprocal rank fusion
+"""
+
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import heapq
+import math
+import re
+import threading
+import unicodedata
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Pecah teks menjadi token: huruf kecil, tanpa diakritik, hanya huruf/angka
+    
+    Args:
+        text: Teks yang akan di-tokenize
+        
+    Returns:
+        List token
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return TOKEN_PATTERN.findall(text)
+
+
+class BM25Index:
+    """Inverted index BM25 dengan posting list berbasis array"""
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Inisialisasi index kosong
+        
+        Args:
+            k1: Parameter saturasi frekuensi term BM25
+            b: Parameter normalisasi panjang dokumen BM25
+        """
+        self.k1 = k1
+        self.b = b
+        self._term_ids: Dict[str, int] = {}
+        self._posting_docs: List[array] = []
+        self._posting_freqs: List[array] = []
+        self._doc_lengths = array("I")
+        self._total_length = 0
+        self._removed = set()
+        # Normalisasi panjang per chunk; dihitung ulang setelah ada penambahan
+        self._norms = None
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._doc_lengths) - len(self._removed)
+    
+    @property
+    def vocabulary_size(self) -> int:
+        """Jumlah term unik di index"""
+        return len(self._term_ids)
+    
+    def add(self, texts: Iterable[str]):
+        """
+        Tambahkan chunk ke index; id chunk melanjutkan urutan sebelumnya
+        
+        Args:
+            texts: Teks chunk
+        """
+        # Tokenize di luar lock agar pencarian tidak ikut menunggu
+        tokenized = [tokenize(text) for text in texts]
+        
+        with self._lock:
+            for tokens in tokenized:
+                doc_id = len(self._doc_lengths)
+                frequencies: Dict[str, int] = {}
+                for token in tokens:
+                    frequencies[token] = frequencies.get(token, 0) + 1
+                
+                for term, frequency in frequencies.items():
+                    term_id = self._term_ids.get(term)
+                    if term_id is None:
+                        term_id = len(self._posting_docs)
+                        self._term_ids[term] = term_id
+                        self._posting_docs.append(array("I"))
+                        self._posting_freqs.append(array("I"))
+                    self._posting_docs[term_id].append(doc_id)
+                    self._posting_freqs[term_id].append(frequency)
+                
+                self._doc_lengths.append(len(tokens))
+                self._total_length += len(tokens)
+            self._norms = None
+    
+    def remove(self, doc_ids: Iterable[int]):
+        """
+        Hapus chunk dari hasil pencarian tanpa membangun ulang index
+        
+        Posting list tidak diubah; statistik IDF sedikit melenceng sampai
+        index dibangun ulang, tetapi panjang rata-rata chunk tetap akurat.
+        
+        Args:
+            doc_ids: Id chunk yang dihapus
+        """
+        with self._lock:
+            for doc_id in doc_ids:
+                if doc_id < len(self._doc_lengths) and doc_id not in self._removed:
+                    self._removed.add(doc_id)
+                    self._total_length -= self._doc_lengths[doc_id]
+            self._norms = None
+    
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        doc_filter: Optional[Callable[[int], bool]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Cari chunk dengan skor BM25 tertinggi
+        
+        Args:
+            query: Teks query
+            k: Jumlah hasil maksimum
+            doc_filter: Jika diisi, hanya chunk dengan doc_filter(id) True yang dikembalikan
+            
+        Returns:
+            List (id chunk, skor) terurut dari skor tertinggi
+        """
+        terms = set(tokenize(query))
+        scores: Dict[int, float] = {}
+        
+        with self._lock:
+            num_docs = len(self._doc_lengths) - len(self._removed)
+            if num_docs <= 0 or not terms:
+                return []
+            if self._norms is None:
+                average_length = (self._total_length / num_docs) or 1.0
+                k1, b = self.k1, self.b
+                self._norms = array("f", (
+                    k1 * (1.0 - b + b * length / average_length) for length in self._doc_lengths
+                ))
+            norms = self._norms
+            
+            for term in terms:
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    continue
+                docs = self._posting_docs[term_id]
+                freqs = self._posting_freqs[term_id]
+                # Posting chunk yang dihapus masih terhitung; dibatasi agar IDF tidak negatif
+                df = min(len(docs), num_docs)
+                idf = math.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+                weight = idf * (self.k1 + 1.0)
+                get = scores.get
+                for doc_id, frequency in zip(docs, freqs):
+                    scores[doc_id] = get(doc_id, 0.0) + weight * frequency / (frequency + norms[doc_id])
+            
+            for doc_id in self._removed.intersection(scores):
+                del scores[doc_id]
+        
+        items = scores.items()
+        if doc_filter is not None:
+            items = [item for item in items if doc_filter(item[0])]
+        return heapq.nlargest(k, items, key=lambda item: item[1])
+    
+    def memory_bytes(self) -> int:
+        """Perkiraan ukuran data posting list dan panjang dokumen (byte)"""
+        with self._lock:
+            postings = sum(
+                docs.itemsize * len(docs) + freqs.itemsize * len(freqs)
+                for docs, freqs in zip(self._posting_docs, self._posting_freqs)
+            )
+            lengths = self._doc_lengths.itemsize * len(self._doc_lengths)
+            norms = self._norms.itemsize * len(self._norms) if self._norms is not None else 0
+            return postings + lengths + norms
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]],
+    weights: Sequence[float] = None,
+    k: int = 60
+) -> List[Tuple[int, float]]:
+    """
+    Gabungkan beberapa peringkat dengan reciprocal rank fusion berbobot
+    
+    Skor item = jumlah bobot / (k + peringkat) dari setiap peringkat yang memuatnya.
+    
+    Args:
+        rankings: List peringkat, masing-masing list id terurut dari yang terbaik
+        weights: Bobot per peringkat (default: semua 1.0)
+        k: Konstanta RRF; makin besar, makin kecil pengaruh peringkat teratas
+        
+    Returns:
+        List (id, skor) terurut dari skor tertinggi
+    """
+    if weights is None:
+        weights = [1.0] * len(rankings)
+    
+    scores: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, item in enumerate(ranking, 1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+    
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,26 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : llm_utils.py
+# Deskripsi    : Fungsi bantu kecil untuk hasil LLM yang dipakai bersama oleh
+#                chat dan RAG dokumen.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+
+"""
+Fungsi bantu untuk hasil LLM
+"""
+
+
+def message_text(content) -> str:
+    """Ambil teks dari konten pesan/chunk LLM (string atau list bagian konten)"""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return "".join(parts)
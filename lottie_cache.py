@@ -0,0 +1,185 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : lottie_cache.py
+# Deskripsi    : Cache animasi Lottie: memo di memori, cache di disk, salinan
+#                lokal opsional, dan pengambilan dari jaringan di latar belakang.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - get() tidak pernah melakukan request jaringan; jika animasi belum ada,
+#   hasilnya None dan pengambilan dijadwalkan di thread latar
+# - Urutan pencarian: memori -> salinan lokal (assets/lottie/<nama>.json)
+#   -> cache disk -> jaringan (latar belakang, timeout pendek)
+# - preload() dipanggil saat startup agar semua animasi siap sebelum dipakai
+# - URL yang gagal diunduh diingat dengan backoff eksponensial, sehingga
+#   rerun berikutnya tidak langsung membuat request baru
+# - File dotLottie (.lottie, arsip zip) dikonversi ke JSON animasi pertamanya
+#
+# ============================================================================
+
+"""
+Modul cache animasi Lottie
+"""
+
+from typing import Dict, Optional, Tuple
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+
+import requests
+
+from tracing import traced
+
+
+class LottieCache:
+    """Cache animasi Lottie tanpa I/O jaringan di jalur render"""
+    
+    def __init__(
+        self,
+        animations: Dict[str, str],
+        cache_dir: str = ".lottie_cache",
+        bundled_dir: str = os.path.join("assets", "lottie"),
+        timeout: float = 3.0,
+        retry_after: float = 60.0,
+        max_retry_after: float = 3600.0
+    ):
+        """
+        Inisialisasi cache
+        
+        Args:
+            animations: Mapping nama animasi -> URL
+            cache_dir: Direktori cache disk untuk animasi yang sudah diunduh
+            bundled_dir: Direktori salinan lokal opsional (<nama>.json)
+            timeout: Timeout request jaringan (detik)
+            retry_after: Jeda sebelum URL yang gagal dicoba lagi (detik), dilipatgandakan
+                setiap kegagalan berturut-turut
+            max_retry_after: Batas jeda percobaan ulang (detik)
+        """
+        self.animations = dict(animations)
+        self.names_by_url = {url: name for name, url in self.animations.items()}
+        self.cache_dir = cache_dir
+        self.bundled_dir = bundled_dir
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+        self._memo: Dict[str, Optional[dict]] = {}
+        self._fetching = set()
+        # url -> (jumlah kegagalan berturut-turut, waktu monotonic boleh dicoba lagi)
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+    
+    def _cache_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+    
+    def _read_local(self, url: str) -> Optional[dict]:
+        """Baca animasi dari salinan lokal atau cache disk"""
+        paths = []
+        name = self.names_by_url.get(url)
+        if name:
+            paths.append(os.path.join(self.bundled_dir, f"{name}.json"))
+        paths.append(self._cache_path(url))
+        
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                continue
+        return None
+    
+    @staticmethod
+    def _parse(url: str, content: bytes) -> dict:
+        """JSON animasi dari respons; file dotLottie diambil animasi pertamanya"""
+        if not content.startswith(b"PK"):
+            return json.loads(content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            names = [name for name in archive.namelist() if name.startswith("animations/") and name.endswith(".json")]
+            try:
+                manifest = json.loads(archive.read("manifest.json"))
+                first = f"animations/{manifest['animations'][0]['id']}.json"
+                if first in names:
+                    names.insert(0, first)
+            except (KeyError, IndexError, ValueError):
+                pass
+            if not names:
+                raise ValueError(f"File dotLottie tanpa animasi: {url}")
+            return json.loads(archive.read(names[0]))
+    
+    @traced("lottie.fetch")
+    def _fetch(self, url: str):
+        """Unduh animasi dan simpan ke cache disk (dijalankan di thread latar)"""
+        data = None
+        try:
+            response = requests.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                return
+            data = self._parse(url, response.content)
+            
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._cache_path(url) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._cache_path(url))
+            
+        except Exception:
+            # Gagal mengunduh bukan masalah: UI tetap jalan tanpa animasi
+            pass
+        finally:
+            with self._lock:
+                self._fetching.discard(url)
+                if data is not None:
+                    self._memo[url] = data
+                    self._failures.pop(url, None)
+                else:
+                    failures = self._failures.get(url, (0, 0.0))[0] + 1
+                    delay = min(self.max_retry_after, self.retry_after * 2 ** (failures - 1))
+                    self._failures[url] = (failures, time.monotonic() + delay)
+    
+    def _schedule_fetch(self, url: str):
+        with self._lock:
+            if url in self._fetching:
+                return
+            failure = self._failures.get(url)
+            if failure is not None and time.monotonic() < failure[1]:
+                return
+            self._fetching.add(url)
+        threading.Thread(target=self._fetch, args=(url,), name="lottie-fetch", daemon=True).start()
+    
+    @traced("lottie.get")
+    def get(self, name_or_url: str) -> Optional[dict]:
+        """
+        Dapatkan animasi Lottie tanpa menunggu jaringan
+        
+        Args:
+            name_or_url: Nama di animations atau URL animasi
+            
+        Returns:
+            JSON animasi, atau None jika belum tersedia (pengambilan dijadwalkan,
+            kecuali URL ini baru saja gagal diunduh)
+        """
+        url = self.animations.get(name_or_url, name_or_url)
+        
+        with self._lock:
+            if self._memo.get(url) is not None:
+                return self._memo[url]
+        
+        data = self._read_local(url)
+        if data is not None:
+            with self._lock:
+                self._memo[url] = data
+            return data
+        
+        self._schedule_fetch(url)
+        return None
+    
+    def preload(self):
+        """Muat semua animasi ke memori; yang belum ada di disk diunduh di latar belakang"""
+        for url in self.animations.values():
+            self.get(url)
@@ -0,0 +1,183 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : pdf_extract.py
+# Deskripsi    : Ekstraksi teks PDF per halaman, paralel di beberapa proses
+#                untuk file besar dan serial untuk file kecil.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Modul ini sengaja hanya bergantung pada pypdf agar proses worker cepat
+#   dijalankan (tanpa memuat LangChain/Chroma)
+# - Sumber PDF bisa berupa path, file-like object, atau buffer di memori
+#   (bytes/memoryview); buffer dibaca tanpa disalin ke file sementara
+# - Worker membaca buffer lewat shared memory dan mengekstrak satu rentang
+#   halaman; hasil dikembalikan berurutan sesuai nomor halaman
+#
+# ============================================================================
+
+"""
+Modul ekstraksi teks PDF paralel
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterator, List, Tuple, Union
+import io
+import multiprocessing
+import os
+
+from pypdf import PdfReader
+
+
+class MemoryViewReader(io.RawIOBase):
+    """Stream baca-saja di atas buffer memori, tanpa menyalin isinya"""
+    
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, target) -> int:
+        size = min(len(target), len(self._view) - self._pos)
+        if size <= 0:
+            return 0
+        target[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        else:
+            raise ValueError(f"whence tidak valid: {whence}")
+        self._pos = max(self._pos, 0)
+        return self._pos
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+PdfSource = Union[str, bytes, bytearray, memoryview, io.IOBase]
+
+
+def open_pdf(source: PdfSource) -> PdfReader:
+    """Buka PdfReader dari path, file-like object, atau buffer di memori"""
+    if isinstance(source, str) or hasattr(source, "read"):
+        return PdfReader(source)
+    return PdfReader(io.BufferedReader(MemoryViewReader(source)))
+
+
+def count_pages(source: PdfSource) -> int:
+    """Jumlah halaman dalam file PDF"""
+    return len(open_pdf(source).pages)
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[str]:
+    """Ekstrak teks halaman [start, end) dari file PDF (dijalankan di worker)"""
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() for i in range(start, end)]
+
+
+def _extract_shared_page_range(name: str, size: int, start: int, end: int) -> List[str]:
+    """Ekstrak teks halaman [start, end) dari PDF di shared memory (dijalankan di worker)"""
+    # Worker memakai resource tracker milik proses utama; proses utama yang unlink
+    shm = shared_memory.SharedMemory(name=name)
+    stream = MemoryViewReader(shm.buf[:size])
+    try:
+        reader = PdfReader(io.BufferedReader(stream))
+        texts = [reader.pages[i].extract_text() for i in range(start, end)]
+        del reader
+        return texts
+    finally:
+        stream.close()
+        shm.close()
+
+
+def _page_ranges(num_pages: int, workers: int) -> List[Tuple[int, int]]:
+    """Bagi halaman menjadi beberapa rentang agar beban worker seimbang"""
+    # Beberapa rentang per worker supaya worker yang selesai cepat dapat tugas lagi
+    shard_size = max(1, -(-num_pages // (workers * 4)))
+    return [(start, min(start + shard_size, num_pages)) for start in range(0, num_pages, shard_size)]
+
+
+def extract_pages(
+    source: PdfSource,
+    workers: int = 0,
+    min_pages_for_parallel: int = 64
+) -> Iterator[Tuple[int, str]]:
+    """
+    Ekstrak teks setiap halaman PDF, paralel jika file cukup besar
+    
+    Args:
+        source: Path, file-like object, atau buffer (bytes/memoryview) berisi PDF
+        workers: Jumlah proses worker (0 = jumlah CPU, 1 = selalu serial)
+        min_pages_for_parallel: Di bawah jumlah halaman ini ekstraksi berjalan serial
+        
+    Yields:
+        tuple: (nomor_halaman (mulai dari 0), teks halaman), berurutan
+    """
+    reader = open_pdf(source)
+    num_pages = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+    
+    if workers <= 1 or num_pages < min_pages_for_parallel:
+        for i in range(num_pages):
+            yield i, reader.pages[i].extract_text()
+        return
+    
+    ranges = _page_ranges(num_pages, workers)
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+    # "spawn" aman dipakai dari proses yang sudah menjalankan banyak thread
+    context = multiprocessing.get_context("spawn")
+    
+    if isinstance(source, str):
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = executor.map(_extract_page_range, [source] * len(ranges), starts, ends)
+            for start, texts in zip(starts, results):
+                for offset, text in enumerate(texts):
+                    yield start + offset, text
+        return
+    
+    # Buffer di memori dibagi ke worker lewat shared memory (satu salinan untuk semua)
+    if hasattr(source, "read"):
+        source.seek(0)
+        data = memoryview(source.getbuffer() if hasattr(source, "getbuffer") else source.read())
+    else:
+        data = memoryview(source).cast("B")
+    
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    try:
+        shm.buf[:len(data)] = data
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = executor.map(
+                _extract_shared_page_range,
+                [shm.name] * len(ranges),
+                [len(data)] * len(ranges),
+                starts,
+                ends
+            )
+            for start, texts in zip(starts, results):
+                for offset, text in enumerate(texts):
+                    yield start + offset, text
+    finally:
+        data.release()
+        shm.close()
+        shm.unlink()
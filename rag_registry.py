@@ -0,0 +1,249 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : rag_registry.py
+# Deskripsi    : Registry global instance DocumentRAG dengan idle timeout,
+#                batas memori/disk, spill ke disk dan metrik.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Instance DocumentRAG dimiliki registry, bukan st.session_state; sesi hanya
+#   menyimpan key, sehingga tab yang ditinggalkan tidak menahan memori
+# - Instance yang idle lebih lama dari idle_timeout di-spill: chunk, index BM25
+#   dan client Chroma dilepas, koleksi tetap di disk dan dimuat ulang saat
+#   sesi kembali
+# - Jika total memori melebihi max_resident_bytes, instance yang paling lama
+#   tidak dipakai di-spill lebih dulu (LRU)
+# - Instance yang idle lebih lama dari drop_after dibuang seluruhnya
+# - Sweep dijalankan oleh thread latar setiap sweep_interval, bukan di jalur
+#   request (get/register)
+# - stats() memakai ukuran memori/disk dari sweep terakhir, sehingga scrape
+#   metrik tidak menelusuri index di disk
+#
+# ============================================================================
+
+"""
+Modul registry instance DocumentRAG
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+import threading
+import time
+
+
+class _Entry:
+    """Instance DocumentRAG beserta waktu pemakaian terakhir"""
+    
+    def __init__(self, rag):
+        self.rag = rag
+        self.last_used = time.monotonic()
+        self.memory_bytes = 0
+
+
+class DocumentRAGRegistry:
+    """Registry instance DocumentRAG per sesi, dipakai bersama oleh seluruh proses"""
+    
+    def __init__(
+        self,
+        idle_timeout: float = 15 * 60,
+        drop_after: float = 24 * 60 * 60,
+        max_resident_bytes: int = 1024 ** 3,
+        max_disk_bytes: Optional[int] = None,
+        min_idle_seconds: float = 60.0,
+        sweep_interval: float = 30.0
+    ):
+        """
+        Inisialisasi registry
+        
+        Args:
+            idle_timeout: Detik tanpa akses sebelum instance di-spill dari memori
+            drop_after: Detik tanpa akses sebelum instance dibuang dari registry
+            max_resident_bytes: Batas total perkiraan memori instance yang dimuat
+            max_disk_bytes: Batas ukuran index di disk (None = batas VectorIndexStore)
+            min_idle_seconds: Instance yang baru dipakai tidak di-spill walaupun melewati batas memori
+            sweep_interval: Jarak antar sweep otomatis oleh thread latar (detik)
+        """
+        self.idle_timeout = idle_timeout
+        self.drop_after = drop_after
+        self.max_resident_bytes = max_resident_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.min_idle_seconds = min_idle_seconds
+        self.sweep_interval = sweep_interval
+        # Urutan LRU: entry yang paling lama tidak dipakai di depan
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._sweeper = None
+        self._stop = threading.Event()
+        # Ukuran index di disk dari sweep terakhir (lihat stats)
+        self._disk_bytes = 0
+        self.spills = 0
+        self.rehydrations = 0
+        self.drops = 0
+    
+    def register(self, key: str, rag):
+        """
+        Simpan instance baru untuk key; instance lama dengan key yang sama dibersihkan
+        
+        Returns:
+            Instance yang disimpan
+        """
+        with self._lock:
+            self.discard(key)
+            self._entries[key] = _Entry(rag)
+        self._ensure_sweeper()
+        return rag
+    
+    def peek(self, key: str):
+        """Instance untuk key tanpa memuat ulang atau mengubah waktu pemakaian"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.rag if entry is not None else None
+    
+    def get(self, key: str):
+        """
+        Ambil instance untuk key dan tandai baru dipakai
+        
+        Instance yang sudah di-spill dimuat ulang dari disk.
+        
+        Returns:
+            Instance DocumentRAG, atau None jika belum ada / sudah dibuang
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(key)
+        
+        if entry.rag.spilled:
+            entry.rag.open_collection()
+            with self._lock:
+                self.rehydrations += 1
+        
+        return entry.rag
+    
+    def discard(self, key: str) -> bool:
+        """
+        Buang instance untuk key dan lepas index-nya (mis. saat logout)
+        
+        Returns:
+            True jika key ada di registry
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry.rag.cleanup()
+        return True
+    
+    def _ensure_sweeper(self):
+        """Jalankan thread sweep saat instance pertama didaftarkan"""
+        with self._lock:
+            if self._sweeper is not None or self._stop.is_set():
+                return
+            self._sweeper = threading.Thread(target=self._run_sweeper, name="rag-registry-sweep", daemon=True)
+            self._sweeper.start()
+    
+    def _run_sweeper(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception:
+                pass
+    
+    def close(self):
+        """Hentikan thread sweep"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+    
+    def sweep(self):
+        """Spill instance idle, tegakkan batas memori/disk, dan buang instance yang ditinggalkan"""
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._entries.items())
+        
+        # Instance yang sudah lama ditinggalkan dibuang seluruhnya
+        for key, entry in entries:
+            if now - entry.last_used > self.drop_after and not entry.rag.indexing:
+                with self._lock:
+                    if self._entries.get(key) is not entry:
+                        continue
+                    del self._entries[key]
+                    self.drops += 1
+                entry.rag.cleanup()
+        
+        with self._lock:
+            entries = list(self._entries.values())
+        
+        # Instance idle di-spill; sisanya dihitung terhadap batas memori
+        resident = []
+        for entry in entries:
+            if not entry.rag.resident:
+                entry.memory_bytes = 0
+                continue
+            if now - entry.last_used > self.idle_timeout and self._spill(entry):
+                continue
+            entry.memory_bytes = entry.rag.memory_bytes()
+            resident.append(entry)
+        
+        total_bytes = sum(entry.memory_bytes for entry in resident)
+        for entry in resident:
+            if total_bytes <= self.max_resident_bytes:
+                break
+            if now - entry.last_used < self.min_idle_seconds:
+                continue
+            memory_bytes = entry.memory_bytes
+            if self._spill(entry):
+                total_bytes -= memory_bytes
+        
+        index_stores = self._index_stores(entries)
+        if self.max_disk_bytes is not None:
+            for index_store in index_stores:
+                index_store.evict(max_bytes=self.max_disk_bytes)
+        self._disk_bytes = sum(index_store.disk_bytes() for index_store in index_stores)
+    
+    def _spill(self, entry: _Entry) -> bool:
+        """Spill satu instance dan catat metriknya"""
+        if not entry.rag.spill():
+            return False
+        entry.memory_bytes = 0
+        with self._lock:
+            self.spills += 1
+        return True
+    
+    @staticmethod
+    def _index_stores(entries) -> list:
+        """VectorIndexStore unik yang dipakai instance di registry"""
+        stores = {}
+        for entry in entries:
+            stores.setdefault(entry.rag.index_store.root_dir, entry.rag.index_store)
+        return list(stores.values())
+    
+    def stats(self) -> Dict:
+        """
+        Metrik registry untuk menentukan ukuran pod
+        
+        Jumlah instance dihitung saat ini; resident_bytes dan disk_bytes
+        berasal dari sweep terakhir.
+        
+        Returns:
+            Dictionary berisi instances, resident, spilled, resident_bytes,
+            disk_bytes, spills, rehydrations dan drops
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            counters = {"spills": self.spills, "rehydrations": self.rehydrations, "drops": self.drops}
+        
+        resident = [entry for entry in entries if entry.rag.resident]
+        return dict(
+            counters,
+            instances=len(entries),
+            resident=len(resident),
+            spilled=len(entries) - len(resident),
+            resident_bytes=sum(entry.memory_bytes for entry in resident),
+            disk_bytes=self._disk_bytes
+        )
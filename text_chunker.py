@@ -0,0 +1,232 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : text_chunker.py
+# Deskripsi    : Pemecah teks dokumen menjadi chunk berdasarkan perkiraan
+#                jumlah token, lintas batas halaman.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Ukuran chunk dihitung dalam perkiraan token (±4 karakter per token,
+#   dibulatkan ke atas per kata), bukan karakter
+# - Halaman digabung menjadi satu teks dokumen (dipisah PAGE_SEPARATOR);
+#   halaman pendek dikemas bersama halaman berikutnya sehingga tidak
+#   menghasilkan banyak chunk kecil
+# - Setiap chunk mencatat rentang halaman dan offset karakter di teks dokumen
+# - Satuan potong adalah baris; baris yang lebih panjang dari satu chunk
+#   (mis. teks tanpa baris baru) dipotong per kata
+# - Halaman diproses secara streaming, setiap baris hanya dipindai sekali dan
+#   batas chunk dicari dengan bisect atas jumlah token kumulatif, sehingga
+#   waktu berjalan linear terhadap panjang teks
+#
+# ============================================================================
+
+"""
+Modul chunking teks berbasis token lintas halaman
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List, NamedTuple
+import re
+
+# Pemisah antar halaman di teks dokumen gabungan (dihitung sebagai batas paragraf)
+PAGE_SEPARATOR = "\n\n"
+
+# Perkiraan rata-rata karakter per token
+CHARS_PER_TOKEN = 4
+
+LINE_PATTERN = re.compile(r"[^\n]+")
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def _word_tokens(words: List[str]) -> int:
+    """Perkiraan token sederet kata: rata-rata ceil(panjang kata / CHARS_PER_TOKEN), minimal satu"""
+    return max(1, (sum(map(len, words)) + len(words) * 3 // 2) // CHARS_PER_TOKEN)
+
+
+def estimate_tokens(text: str) -> int:
+    """Perkiraan jumlah token teks (lihat TokenChunker)"""
+    return _word_tokens(text.split())
+
+
+class TextChunk(NamedTuple):
+    """Satu chunk beserta posisinya di teks dokumen"""
+    text: str
+    char_start: int
+    char_end: int
+    page_start: int
+    page_end: int
+    tokens: int
+
+
+class TokenChunker:
+    """
+    Chunker streaming: halaman ditambahkan satu per satu, chunk yang sudah
+    penuh langsung dikembalikan, sisanya dikeluarkan oleh finish()
+    """
+    
+    def __init__(self, chunk_tokens: int = 256, overlap_tokens: int = 48, min_break_ratio: float = 0.5):
+        """
+        Inisialisasi chunker
+        
+        Args:
+            chunk_tokens: Ukuran maksimum chunk (perkiraan token)
+            overlap_tokens: Jumlah token akhir chunk yang diulang di awal chunk berikutnya
+            min_break_ratio: Chunk dipotong di akhir kalimat hanya jika panjangnya
+                sudah minimal rasio ini dari chunk_tokens
+        """
+        if chunk_tokens <= 0:
+            raise ValueError("chunk_tokens harus lebih dari 0")
+        if not 0 <= overlap_tokens < chunk_tokens * min_break_ratio:
+            raise ValueError("overlap_tokens harus lebih kecil dari chunk_tokens * min_break_ratio")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_break_tokens = max(1, int(chunk_tokens * min_break_ratio))
+        # Teks dokumen mulai dari offset _base; bagian sebelumnya sudah tidak dibutuhkan
+        self._text = ""
+        self._base = 0
+        self._length = 0
+        self._num_pages = 0
+        # Potongan (baris, atau kata dari baris panjang) di antrean sebagai array
+        # paralel: offset awal/akhir, halaman, dan jumlah token kumulatif
+        # (_cum[i] = token sebelum potongan ke-i)
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._pages: List[int] = []
+        self._cum: List[int] = [0]
+        # Indeks potongan yang menutup baris atau halaman (terurut)
+        self._bounds: List[int] = []
+        # Potongan pertama chunk berikutnya, dan potongan pertama yang belum pernah dikeluarkan
+        self._head = 0
+        self._fresh = 0
+    
+    def add_page(self, text: str, page: int) -> List[TextChunk]:
+        """
+        Tambahkan teks satu halaman
+        
+        Args:
+            text: Teks halaman
+            page: Nomor halaman (mulai 0)
+            
+        Returns:
+            Chunk yang sudah penuh (bisa kosong)
+        """
+        if self._num_pages:
+            self._text += PAGE_SEPARATOR
+            self._length += len(PAGE_SEPARATOR)
+            self._mark_boundary(len(self._ends) - 1)
+        self._num_pages += 1
+        offset = self._length
+        self._text += text
+        self._length += len(text)
+        
+        first = len(self._ends)
+        starts, ends, tokens = self._starts, self._ends, []
+        for line in LINE_PATTERN.finditer(text):
+            words = line.group().split()
+            if not words:
+                continue
+            line_tokens = _word_tokens(words)
+            if line_tokens <= self.chunk_tokens:
+                content = line.group()
+                starts.append(offset + line.start() + len(content) - len(content.lstrip()))
+                ends.append(offset + line.end() - len(content) + len(content.rstrip()))
+                tokens.append(line_tokens)
+            else:
+                self._split_words(text, line.start(), line.end(), offset, tokens)
+            self._mark_boundary(len(ends) - 1)
+        
+        self._pages.extend([page] * (len(ends) - first))
+        self._cum.extend(accumulate(tokens, initial=self._cum[-1]))
+        self._cum.pop(first)
+        
+        chunks = []
+        while self._cum[-1] - self._cum[self._head] > self.chunk_tokens:
+            chunk = self._emit()
+            if chunk is not None:
+                chunks.append(chunk)
+        
+        self._trim()
+        return chunks
+    
+    def finish(self) -> List[TextChunk]:
+        """
+        Keluarkan sisa teks sebagai chunk terakhir
+        
+        Returns:
+            Chunk terakhir (kosong jika tidak ada teks baru sejak chunk sebelumnya)
+        """
+        chunks = []
+        if len(self._ends) > self._fresh:
+            chunks.append(self._make_chunk(self._head, len(self._ends) - 1))
+        self._head = self._fresh = len(self._ends)
+        self._trim()
+        return chunks
+    
+    def _split_words(self, text: str, start: int, end: int, offset: int, tokens: List[int]):
+        """Tambahkan baris panjang ke antrean per kata; kata yang lebih panjang dari satu chunk dipecah"""
+        max_chars = self.chunk_tokens * CHARS_PER_TOKEN
+        for word in WORD_PATTERN.finditer(text, start, end):
+            for piece_start in range(word.start(), word.end(), max_chars):
+                piece_end = min(piece_start + max_chars, word.end())
+                self._starts.append(offset + piece_start)
+                self._ends.append(offset + piece_end)
+                tokens.append(_word_tokens([text[piece_start:piece_end]]))
+    
+    def _mark_boundary(self, index: int):
+        if index >= 0 and (not self._bounds or self._bounds[-1] < index):
+            self._bounds.append(index)
+    
+    def _emit(self):
+        """
+        Keluarkan satu chunk dari awal antrean dan sisakan overlap
+        
+        Returns:
+            TextChunk, atau None jika hanya overlap yang dibuang agar kata berikutnya muat
+        """
+        cum = self._cum
+        head = self._head
+        # Potongan terakhir yang masih muat dalam chunk_tokens (minimal satu)
+        last = max(head, bisect_right(cum, cum[head] + self.chunk_tokens) - 2)
+        if last < self._fresh:
+            self._head = self._fresh
+            return None
+        
+        # Potong di akhir baris terakhir jika chunk sudah cukup panjang
+        cut = last
+        i = bisect_right(self._bounds, last) - 1
+        if i >= 0 and self._bounds[i] >= head and cum[self._bounds[i] + 1] - cum[head] >= self.min_break_tokens:
+            cut = self._bounds[i]
+        chunk = self._make_chunk(head, cut)
+        
+        # Overlap: potongan terakhir chunk sampai overlap_tokens, minimal maju satu potongan
+        self._head = min(cut + 1, max(head + 1, bisect_left(cum, cum[cut + 1] - self.overlap_tokens)))
+        self._fresh = cut + 1
+        return chunk
+    
+    def _make_chunk(self, first: int, last: int) -> TextChunk:
+        """Chunk dari potongan ke-first sampai potongan ke-last"""
+        return TextChunk(
+            text=self._text[self._starts[first] - self._base:self._ends[last] - self._base],
+            char_start=self._starts[first],
+            char_end=self._ends[last],
+            page_start=self._pages[first],
+            page_end=self._pages[last],
+            tokens=self._cum[last + 1] - self._cum[first]
+        )
+    
+    def _trim(self):
+        """Buang potongan dan teks sebelum awal chunk berikutnya (sekali per halaman)"""
+        shift = self._head
+        if shift:
+            del self._starts[:shift], self._ends[:shift], self._pages[:shift], self._cum[:shift]
+            self._bounds = [index - shift for index in self._bounds if index >= shift]
+            self._head = 0
+            self._fresh -= shift
+        new_base = self._starts[0] if self._starts else self._length
+        if new_base > self._base:
+            self._text = self._text[new_base - self._base:]
+            self._base = new_base
@@ -0,0 +1,352 @@
+# ============================================================================
+# Nama Proyek  : Teman Gemini
+# File         : tracing.py
+# Deskripsi    : Lapisan tracing ringan: span per tahap, histogram latensi,
+#                dan ekspor metrik format teks Prometheus.
+# Pembuat      : Zaki Fuadi
+# Versi        : v1.0
+# Lisensi      : MIT
+# ============================================================================
+#
+# Catatan:
+# - Nonaktif secara default; aktifkan dengan TEMAN_GEMINI_TRACING=1 atau
+#   "tracing_enabled" di config.json. Saat nonaktif, span() mengembalikan
+#   objek no-op bersama dan observe() langsung kembali
+# - Setiap span dicatat di histogram teman_gemini_span_duration_seconds
+#   dengan label span; span yang gagal juga menambah span_errors_total
+# - Span di dalam span lain dirangkum per nama ke trace induknya, sehingga
+#   recent_traces() menunjukkan ke tahap mana waktu satu permintaan habis
+# - Tahap yang melewati yield (mis. streaming token LLM) diukur dengan
+#   StreamTimer atau observe(), bukan span, agar trace tidak bocor ke
+#   pemanggil generator
+# - Statistik komponen lain (cache, registry) bisa ditambahkan sebagai gauge
+#   lewat register_collector()
+# - Metrik diekspor lewat endpoint HTTP lokal (/metrics) atau file teks
+#   (mis. untuk textfile collector node_exporter)
+#
+# ============================================================================
+
+"""
+Modul tracing dan ekspor metrik Prometheus
+"""
+
+from collections import deque
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+import functools
+import os
+import threading
+import time
+
+METRIC_PREFIX = "teman_gemini"
+
+# Batas bucket histogram (detik), dari query SQLite sampai ingestion PDF besar
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Trace yang sedang berjalan di konteks ini (thread atau task asyncio)
+_current_trace: ContextVar[Optional[Dict]] = ContextVar("current_trace", default=None)
+
+
+class _Histogram:
+    """Histogram kumulatif dengan bucket tetap"""
+    
+    def __init__(self, buckets: tuple):
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+class _NoopSpan:
+    """Span kosong yang dipakai saat tracing nonaktif"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """Span aktif: mengukur durasi blok dan mencatatnya saat keluar"""
+    
+    __slots__ = ("tracer", "name", "start", "trace", "is_root")
+    
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+    
+    def __enter__(self):
+        self.trace = _current_trace.get()
+        self.is_root = self.trace is None
+        if self.is_root:
+            self.trace = {"name": self.name, "started_at": time.time(), "stages": {}}
+            _current_trace.set(self.trace)
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        error = exc_type is not None and not issubclass(exc_type, GeneratorExit)
+        if self.is_root:
+            _current_trace.set(None)
+            self.tracer._finish_trace(self.trace, seconds, error)
+            self.tracer._record(self.name, seconds, error)
+        else:
+            self.tracer.observe(self.name, seconds, error)
+        return False
+
+
+class Tracer:
+    """Pencatat span dan metrik; satu instance global per proses (lihat `tracer`)"""
+    
+    def __init__(self, enabled: bool = False, buckets: tuple = DEFAULT_BUCKETS, max_traces: int = 200):
+        """
+        Inisialisasi tracer
+        
+        Args:
+            enabled: Aktifkan pencatatan span
+            buckets: Batas bucket histogram (detik)
+            max_traces: Jumlah trace terakhir yang disimpan untuk recent_traces()
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self._histograms: Dict[str, _Histogram] = {}
+        self._traces = deque(maxlen=max_traces)
+        self._collectors: Dict[str, Callable[[], Dict]] = {}
+        self._lock = threading.Lock()
+    
+    def span(self, name: str):
+        """
+        Context manager yang mengukur durasi blok sebagai satu tahap
+        
+        Args:
+            name: Nama tahap, mis. "rag.query.retrieve"
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return _Span(self, name)
+    
+    def observe(self, name: str, seconds: float, error: bool = False):
+        """Catat durasi tahap yang diukur manual (mis. streaming yang melewati yield)"""
+        if not self.enabled:
+            return
+        trace = _current_trace.get()
+        if trace is not None:
+            stage = trace["stages"].setdefault(name, {"count": 0, "seconds": 0.0})
+            stage["count"] += 1
+            stage["seconds"] += seconds
+        self._record(name, seconds, error)
+    
+    def _record(self, name: str, seconds: float, error: bool):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram.counts[i] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+            if error:
+                histogram.errors += 1
+    
+    def _finish_trace(self, trace: Dict, seconds: float, error: bool):
+        # Span tunggal (mis. satu query database) cukup tercatat di histogram
+        if not trace["stages"]:
+            return
+        trace["seconds"] = seconds
+        trace["error"] = error
+        with self._lock:
+            self._traces.append(trace)
+    
+    def recent_traces(self, limit: int = 20) -> List[Dict]:
+        """
+        Trace terakhir, yang terbaru lebih dulu
+        
+        Returns:
+            List {name, started_at, seconds, error, stages: {nama: {count, seconds}}}
+        """
+        with self._lock:
+            return list(self._traces)[::-1][:limit]
+    
+    def register_collector(self, name: str, collect: Callable[[], Dict]):
+        """
+        Tambahkan statistik komponen sebagai gauge saat metrik diekspor
+        
+        Args:
+            name: Nama komponen, mis. "answer_cache"
+            collect: Fungsi tanpa argumen yang mengembalikan {metrik: angka}
+        """
+        with self._lock:
+            self._collectors[name] = collect
+    
+    def reset(self):
+        """Kosongkan semua histogram dan trace"""
+        with self._lock:
+            self._histograms.clear()
+            self._traces.clear()
+    
+    def render_prometheus(self) -> str:
+        """Semua metrik dalam format teks Prometheus (exposition format 0.0.4)"""
+        with self._lock:
+            histograms = {
+                name: (list(h.counts), h.sum, h.count, h.errors)
+                for name, h in sorted(self._histograms.items())
+            }
+            collectors = dict(self._collectors)
+        
+        metric = f"{METRIC_PREFIX}_span_duration_seconds"
+        lines = [
+            f"# HELP {metric} Durasi span per tahap.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, (counts, total, count, _) in histograms.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {bucket_count}')
+            lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {total}')
+            lines.append(f'{metric}_count{{span="{name}"}} {count}')
+        
+        metric = f"{METRIC_PREFIX}_span_errors_total"
+        lines += [f"# HELP {metric} Jumlah span yang berakhir dengan error.", f"# TYPE {metric} counter"]
+        for name, (_, _, _, errors) in histograms.items():
+            lines.append(f'{metric}{{span="{name}"}} {errors}')
+        
+        for component, collect in sorted(collectors.items()):
+            try:
+                values = collect()
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f"{METRIC_PREFIX}_{component}_{key}"
+                lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        
+        return "\n".join(lines) + "\n"
+
+
+tracer = Tracer(enabled=os.environ.get("TEMAN_GEMINI_TRACING", "").lower() in ("1", "true", "yes"))
+
+
+def span(name: str):
+    """Span pada tracer global (lihat Tracer.span)"""
+    if not tracer.enabled:
+        return NOOP_SPAN
+    return _Span(tracer, name)
+
+
+def traced(name: str):
+    """
+    Decorator: bungkus setiap pemanggilan fungsi dalam satu span
+    
+    Saat tracing nonaktif, biayanya hanya satu pemeriksaan atribut.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with _Span(tracer, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class StreamTimer:
+    """
+    Pengukur tahap streaming yang melewati yield/await
+    
+    Mencatat waktu sampai potongan pertama sebagai "<name>.first_token" dan
+    durasi total sebagai "<name>" saat finish() dipanggil.
+    """
+    
+    __slots__ = ("name", "start", "first")
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter() if tracer.enabled else None
+        self.first = False
+    
+    def token(self):
+        """Tandai satu potongan diterima"""
+        if self.start is None or self.first:
+            return
+        self.first = True
+        tracer.observe(f"{self.name}.first_token", time.perf_counter() - self.start)
+    
+    def finish(self, error: bool = False):
+        """Catat durasi total stream"""
+        if self.start is None:
+            return
+        tracer.observe(self.name, time.perf_counter() - self.start, error)
+        self.start = None
+
+
+class MetricsExporter:
+    """Ekspor metrik tracer lewat endpoint HTTP lokal dan/atau file teks"""
+    
+    def __init__(self, source: Tracer = tracer):
+        self.source = source
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+    
+    def start_http(self, port: int, host: str = "127.0.0.1") -> str:
+        """
+        Layani GET /metrics di thread latar
+        
+        Returns:
+            URL endpoint metrik
+        """
+        source = self.source
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = source.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+    
+    def write_file(self, path: str):
+        """Tulis metrik ke file secara atomik"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.source.render_prometheus())
+        os.replace(tmp_path, path)
+    
+    def start_file(self, path: str, interval: float = 15.0):
+        """Tulis metrik ke file setiap interval detik di thread latar"""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.write_file(path)
+                except OSError:
+                    pass
+        
+        threading.Thread(target=run, name="metrics-file", daemon=True).start()
+    
+    def stop(self):
+        """Hentikan endpoint HTTP dan penulisan file"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()